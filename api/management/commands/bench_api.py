@@ -0,0 +1,92 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from api import views
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Замер пропускной способности API: вызывает представления '
+            'напрямую и печатает запросы в секунду и перцентили задержки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Создать столько постов на время замера (откатывается)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                self.run(options['requests'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count):
+        author, _ = User.objects.get_or_create(username='bench-author')
+        category, _ = Category.objects.get_or_create(
+            slug='bench', defaults={'title': 'bench', 'description': ''})
+        now = timezone.now()
+        posts = Post.objects.bulk_create(
+            (Post(title=f'bench {index}', text='text ' * 200,
+                  excerpt='text ' * 20, author=author, category=category,
+                  pub_date=now - timedelta(minutes=index))
+             for index in range(count)),
+            batch_size=1000,
+        )
+        Comment.objects.bulk_create(
+            (Comment(text='comment', author=author, post=post)
+             for post in posts[:100] for _ in range(10)),
+            batch_size=1000,
+        )
+
+    def run(self, count):
+        factory = RequestFactory()
+        post = Post.objects.published().order_by('-pub_date').first()
+        cases = [
+            ('post_list', views.post_list, '/api/v1/posts/', (), {}),
+            ('post_list?fields=id,title', views.post_list,
+             '/api/v1/posts/', (), {'fields': 'id,title'}),
+            ('category_list', views.category_list,
+             '/api/v1/categories/', (), {}),
+        ]
+        if post is not None:
+            cases += [
+                ('post_detail', views.post_detail,
+                 f'/api/v1/posts/{post.pk}/', (post.pk,), {}),
+                ('comment_list', views.comment_list,
+                 f'/api/v1/posts/{post.pk}/comments/', (post.pk,), {}),
+            ]
+        for name, view, path, args, params in cases:
+            timings = []
+            started = time.perf_counter()
+            for _ in range(count):
+                request = factory.get(path, params)
+                request.user = AnonymousUser()
+                begin = time.perf_counter()
+                view(request, *args)
+                timings.append(time.perf_counter() - begin)
+            elapsed = time.perf_counter() - started
+            timings.sort()
+            self.stdout.write(
+                f'{name:28} {count / elapsed:8.0f} req/s  '
+                f'p50 {statistics.median(timings) * 1000:6.2f} ms  '
+                f'p99 {timings[int(len(timings) * 0.99) - 1] * 1000:6.2f} ms'
+            )
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from api.utils import encode_cursor
+from blog.models import Category, Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(API_PAGE_SIZE=3)
+class TestApi(TestCase):
+    POSTS_COUNT = 7
+    UNPUBLISHED_POST = 1
+    PUBLISHED_IN_FUTURE_POST = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+        cls.hidden_category = Category.objects.create(
+            title='hidden', description='desc', slug='hidden',
+            is_published=False,
+        )
+        now = timezone.now()
+        cls.posts = Post.objects.bulk_create(
+            Post(
+                title=f'title {index}', text='text',
+                author=cls.author, category=cls.category,
+                pub_date=now - timedelta(days=index)
+            ) for index in range(cls.POSTS_COUNT)
+        )
+        cls.posts[cls.UNPUBLISHED_POST].is_published = False
+        cls.posts[cls.UNPUBLISHED_POST].save()
+        cls.posts[cls.PUBLISHED_IN_FUTURE_POST].pub_date = (
+            now + timedelta(days=1))
+        cls.posts[cls.PUBLISHED_IN_FUTURE_POST].save()
+        cls.comments = Comment.objects.bulk_create(
+            Comment(text=f'comment {index}', author=cls.author,
+                    post=cls.posts[0])
+            for index in range(4)
+        )
+        cls.visible_ids = [
+            post.pk for index, post in enumerate(cls.posts)
+            if index not in (
+                cls.UNPUBLISHED_POST, cls.PUBLISHED_IN_FUTURE_POST)
+        ]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            payload = response.json()
+            ids.extend(row['id'] for row in payload['results'])
+            url = payload['next']
+        return ids
+
+    def test_post_list_cursor_pagination_hides_invisible(self):
+        self.assertEqual(
+            self.walk(reverse('api:v1:post_list')), self.visible_ids)
+
+    def test_author_sees_own_hidden_posts(self):
+        self.client.force_login(self.author)
+        self.assertEqual(
+            len(self.walk(reverse('api:v1:post_list'))), self.POSTS_COUNT)
+
+    def test_field_selection(self):
+        response = self.client.get(
+            reverse('api:v1:post_list'), {'fields': 'id,author'})
+        row = response.json()['results'][0]
+        self.assertEqual(row, {'id': self.posts[0].pk, 'author': 'author'})
+
+    def test_unknown_field(self):
+        response = self.client.get(
+            reverse('api:v1:post_list'), {'fields': 'password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse('api:v1:post_list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_tampered_cursor(self):
+        date = timezone.now().isoformat()
+        urls = (
+            reverse('api:v1:post_list'),
+            reverse('api:v1:comment_list', args=(self.posts[0].pk,)),
+        )
+        for url in urls:
+            for values in (['garbage', 1], [date, 10 ** 30], [{}, 1],
+                           [None, None], [date, '1'], ['2023-13-45T00:00', 1],
+                           ['2023-03-05T00:00:00', 1]):
+                with self.subTest(url=url, values=values):
+                    response = self.client.get(
+                        url, {'cursor': encode_cursor(values)})
+                    self.assertEqual(
+                        response.status_code, HTTPStatus.BAD_REQUEST)
+                    self.assertEqual(
+                        response.json()['detail'], 'Неверный курсор')
+
+    def test_post_detail(self):
+        Post.objects.filter(pk=self.posts[0].pk).update(
+            archived_comments_count=3)
+        url = reverse('api:v1:post_detail', args=(self.posts[0].pk,))
+        payload = self.client.get(url).json()
+        self.assertEqual(payload['comment_count'], 4)
+        self.assertEqual(payload['category'], self.category.slug)
+        hidden = reverse(
+            'api:v1:post_detail',
+            args=(self.posts[self.UNPUBLISHED_POST].pk,))
+        self.assertEqual(
+            self.client.get(hidden).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_comment_list(self):
+        url = reverse('api:v1:comment_list', args=(self.posts[0].pk,))
+        self.assertEqual(
+            self.walk(url), [comment.pk for comment in self.comments])
+
+    def test_category_list_only_published(self):
+        payload = self.client.get(reverse('api:v1:category_list')).json()
+        self.assertEqual(
+            [row['slug'] for row in payload['results']], [self.category.slug])
+
+    def test_author_detail(self):
+        url = reverse('api:v1:author_detail', args=(self.author.username,))
+        self.assertEqual(self.client.get(url).json()['username'], 'author')
+
+    def test_conditional_request(self):
+        url = reverse('api:v1:post_list')
+        response = self.client.get(url)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_read_only(self):
+        response = self.client.post(reverse('api:v1:post_list'))
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
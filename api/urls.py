@@ -0,0 +1,30 @@
+from django.urls import include, path
+
+from . import views
+
+app_name = 'api'
+
+v1_patterns = [
+    path('posts/', views.post_list, name='post_list'),
+    path('posts/<int:pk>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:pk>/comments/',
+        views.comment_list,
+        name='comment_list'
+    ),
+    path('categories/', views.category_list, name='category_list'),
+    path(
+        'authors/<str:username>/',
+        views.author_detail,
+        name='author_detail'
+    ),
+    path(
+        'deletions/<int:pk>/',
+        views.deletion_detail,
+        name='deletion_detail'
+    ),
+]
+
+urlpatterns = [
+    path('v1/', include((v1_patterns, 'v1'))),
+]
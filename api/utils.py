@@ -0,0 +1,166 @@
+import base64
+import binascii
+import hashlib
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+
+MAX_ID = 2 ** 63 - 1
+
+
+class ApiError(Exception):
+
+    def __init__(self, detail, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def json_response(request, data, status=HTTPStatus.OK):
+    body = json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    response = HttpResponse(
+        body, status=status, content_type='application/json')
+    patch_vary_headers(response, ('Cookie',))
+    if status != HTTPStatus.OK:
+        return response
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def api_view(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = json_response(
+                request, {'detail': 'Метод не поддерживается'},
+                status=HTTPStatus.METHOD_NOT_ALLOWED)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            error = ApiError('Не найдено', HTTPStatus.NOT_FOUND)
+        except ApiError as api_error:
+            error = api_error
+        return json_response(
+            request, {'detail': error.detail}, status=error.status)
+    return wrapper
+
+
+def select_fields(request, available, default):
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(default)
+    names = list(dict.fromkeys(
+        name.strip() for name in requested.split(',') if name.strip()))
+    unknown = set(names) - set(available)
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return names
+
+
+def fetch_rows(queryset, fields, available, extra=()):
+    """Read only the requested columns with values_list().
+
+    Output names may differ from ORM lookups (``author`` is read from
+    ``author__username``), so rows are zipped into dicts here rather than
+    annotated, which would clash with model field names.
+    """
+    lookups = [available[name] for name in fields] + list(extra)
+    return [
+        (dict(zip(fields, row)), row[len(fields):])
+        for row in queryset.values_list(*lookups)
+    ]
+
+
+def encode_cursor(values):
+    data = json.dumps([
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError):
+        raise ApiError('Неверный курсор')
+    if not isinstance(values, list) or len(values) != size:
+        raise ApiError('Неверный курсор')
+    return values
+
+
+def cursor_value(field, value):
+    """Check a decoded cursor value against its ordering ``field``."""
+    if isinstance(field, models.DateTimeField):
+        try:
+            parsed = parse_datetime(value) if isinstance(value, str) else None
+        except ValueError:
+            parsed = None
+        if parsed is None or timezone.is_naive(parsed):
+            raise ApiError('Неверный курсор')
+        return parsed
+    if isinstance(field, models.IntegerField):
+        if type(value) is not int or not -MAX_ID <= value <= MAX_ID:
+            raise ApiError('Неверный курсор')
+        return value
+    if isinstance(field, models.CharField) and isinstance(value, str):
+        return value
+    raise ApiError('Неверный курсор')
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('Неверный limit')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def paginate(request, queryset, fields, available, ordering):
+    """Keyset pagination over ``ordering`` (e.g. ``('-pub_date', '-id')``).
+
+    The cursor holds the ordering values of the last returned row, so every
+    page is a single indexed range query however deep the client goes.
+    """
+    keys = [field.lstrip('-') for field in ordering]
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        values = [
+            cursor_value(queryset.model._meta.get_field(key), value)
+            for key, value in zip(keys, decode_cursor(cursor, len(keys)))
+        ]
+        condition = Q()
+        for index, (field, key) in enumerate(zip(ordering, keys)):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(
+                **dict(zip(keys[:index], values[:index])),
+                **{f'{key}__{lookup}': values[index]},
+            )
+        queryset = queryset.filter(condition)
+    limit = get_limit(request)
+    rows = fetch_rows(queryset[:limit + 1], fields, available, extra=keys)
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(rows[-1][1])
+        next_url = f'{request.path}?{params.urlencode()}'
+    return {
+        'results': [row for row, _ in rows],
+        'next': next_url,
+    }
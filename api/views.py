@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import Http404
+
+from blog.models import Category, Comment, Post
+from core.models import DeletionJob
+from .utils import api_view, fetch_rows, json_response, paginate, select_fields
+
+User = get_user_model()
+
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'excerpt': 'excerpt',
+    'text': 'text',
+    'text_html': 'text_html',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'location': 'location__name',
+    'image': 'image',
+    'comment_count': 'comment_count',
+}
+POST_LIST_FIELDS = (
+    'id', 'title', 'excerpt', 'pub_date', 'author', 'category', 'location',
+    'image', 'comment_count',
+)
+POST_DETAIL_FIELDS = (
+    'id', 'title', 'text_html', 'pub_date', 'author', 'category', 'location',
+    'image', 'comment_count',
+)
+POST_ORDERING = ('-pub_date', '-id')
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'text': 'text',
+    'created_at': 'created_at',
+    'is_edited': 'is_edited',
+}
+COMMENT_ORDERING = ('created_at', 'id')
+
+CATEGORY_FIELDS = {
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'posts_count': 'posts_count',
+    'last_pub_date': 'last_pub_date',
+}
+CATEGORY_ORDERING = ('title', 'id')
+
+AUTHOR_FIELDS = {
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'date_joined': 'date_joined',
+}
+
+
+def get_posts(request, fields):
+    posts = Post.objects.visible_to(request.user)
+    if 'comment_count' in fields:
+        # comment_list serves live comments only, so the count does too.
+        posts = posts.with_comment_count(archived=False)
+    return posts
+
+
+def image_urls(rows):
+    for row in rows:
+        if row.get('image'):
+            row['image'] = default_storage.url(row['image'])
+    return rows
+
+
+@api_view
+def post_list(request):
+    fields = select_fields(request, POST_FIELDS, POST_LIST_FIELDS)
+    posts = get_posts(request, fields)
+    if 'category' in request.GET:
+        posts = posts.filter(category__slug=request.GET['category'])
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    page = paginate(request, posts, fields, POST_FIELDS, POST_ORDERING)
+    image_urls(page['results'])
+    return json_response(request, page)
+
+
+@api_view
+def post_detail(request, pk):
+    fields = select_fields(request, POST_FIELDS, POST_DETAIL_FIELDS)
+    rows = fetch_rows(
+        get_posts(request, fields).filter(pk=pk), fields, POST_FIELDS)
+    if not rows:
+        raise Http404
+    return json_response(request, image_urls([rows[0][0]])[0])
+
+
+@api_view
+def comment_list(request, pk):
+    if not Post.objects.visible_to(request.user).filter(pk=pk).exists():
+        raise Http404
+    fields = select_fields(request, COMMENT_FIELDS, COMMENT_FIELDS)
+    comments = Comment.objects.filter(post_id=pk, is_published=True)
+    return json_response(request, paginate(
+        request, comments, fields, COMMENT_FIELDS, COMMENT_ORDERING))
+
+
+@api_view
+def category_list(request):
+    fields = select_fields(request, CATEGORY_FIELDS, CATEGORY_FIELDS)
+    categories = Category.objects.filter(is_published=True)
+    return json_response(request, paginate(
+        request, categories, fields, CATEGORY_FIELDS, CATEGORY_ORDERING))
+
+
+@api_view
+def author_detail(request, username):
+    fields = select_fields(request, AUTHOR_FIELDS, AUTHOR_FIELDS)
+    rows = fetch_rows(
+        User.objects.filter(username=username, is_active=True),
+        fields, AUTHOR_FIELDS)
+    if not rows:
+        raise Http404
+    return json_response(request, rows[0][0])
+
+
+@api_view
+def deletion_detail(request, pk):
+    if not request.user.is_authenticated:
+        raise Http404
+    jobs = DeletionJob.objects.filter(pk=pk)
+    if not request.user.is_staff:
+        jobs = jobs.filter(requested_by=request.user)
+    job = jobs.first()
+    if job is None:
+        raise Http404
+    return json_response(request, {
+        'id': job.pk,
+        'object': job.object_repr,
+        'status': job.status,
+        'total': job.total,
+        'deleted': job.deleted,
+        'progress': round(job.progress, 3),
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    })
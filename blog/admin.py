@@ -6,11 +6,14 @@ from .models import Category, Comment, Location, Post
 class CategoryAdmin(admin.ModelAdmin):
     list_display = (
         'title',
+        'posts_count',
+        'last_pub_date',
         'is_published'
     )
     list_editable = (
         'is_published',
     )
+    search_fields = ('title',)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -20,25 +23,29 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
         'location',
         'category',
+        'views_count',
         'is_published',
     )
     list_editable = (
         'is_published',
         'pub_date',
-        'location',
-        'category'
     )
     list_display_links = ('title',)
+    list_select_related = ('author', 'location', 'category')
+    autocomplete_fields = ('location', 'category')
 
 
 class LocationAdmin(admin.ModelAdmin):
     list_display = (
         'name',
+        'posts_count',
+        'last_pub_date',
         'is_published'
     )
     list_editable = (
         'is_published',
     )
+    search_fields = ('name',)
 
 
 class CommentAdmin(admin.ModelAdmin):
@@ -52,6 +59,9 @@ class CommentAdmin(admin.ModelAdmin):
     list_editable = (
         'is_published',
     )
+    list_filter = ('is_published',)
+    list_select_related = ('author', 'post__author')
+    raw_id_fields = ('author', 'post', 'parent')
 
 
 admin.site.register(Category, CategoryAdmin)
@@ -0,0 +1,74 @@
+"""Moving comments of inactive posts to the ``ArchivedComment`` table.
+
+A post is inactive when it has comments but none newer than the cutoff.
+All its comments and their revisions are copied to the archive and
+deleted from the hot ``blog_comment`` table in one transaction per batch
+of posts, so an interrupted run simply continues with the posts that
+still qualify.
+"""
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Value, When
+
+from .models import (ArchivedComment, ArchivedCommentRevision, Comment,
+                     CommentRevision, Post)
+
+ARCHIVED_FIELDS = (
+    'id', 'post_id', 'author_id', 'text', 'is_published', 'is_edited',
+    'created_at', 'date_edited', 'parent_id', 'path', 'depth',
+)
+ARCHIVED_REVISION_FIELDS = (
+    'comment_id', 'number', 'created_at', 'is_snapshot', 'data',
+)
+
+
+def inactive_posts(cutoff):
+    return Post.objects.filter(
+        Exists(Comment.objects.filter(post=OuterRef('pk')))
+    ).exclude(
+        Exists(Comment.objects.filter(
+            post=OuterRef('pk'), created_at__gte=cutoff))
+    ).order_by('pk')
+
+
+def archive_posts(post_ids):
+    """Archive all comments of ``post_ids``; return how many were moved."""
+    with transaction.atomic():
+        comments = Comment.objects.filter(post_id__in=post_ids)
+        rows = [
+            ArchivedComment(**row)
+            for row in comments.values(*ARCHIVED_FIELDS).iterator()
+        ]
+        ArchivedComment.objects.bulk_create(rows, ignore_conflicts=True)
+        ArchivedCommentRevision.objects.bulk_create([
+            ArchivedCommentRevision(**row)
+            for row in CommentRevision.objects.filter(
+                comment__post_id__in=post_ids
+            ).values(*ARCHIVED_REVISION_FIELDS).iterator()
+        ], ignore_conflicts=True)
+        counts = {}
+        for row in rows:
+            counts[row.post_id] = counts.get(row.post_id, 0) + 1
+        Post.objects.filter(pk__in=counts).update(
+            archived_comments_count=F('archived_comments_count') + Case(
+                *(When(pk=pk, then=Value(count))
+                  for pk, count in counts.items()),
+                default=Value(0),
+            )
+        )
+        comments.delete()
+    return len(rows)
+
+
+def archive(cutoff, batch_size, progress=None):
+    """Archive inactive posts in batches keyed by post id."""
+    last_pk = 0
+    moved = 0
+    while True:
+        post_ids = list(inactive_posts(cutoff).filter(
+            pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+        if not post_ids:
+            return moved
+        moved += archive_posts(post_ids)
+        last_pk = post_ids[-1]
+        if progress is not None:
+            progress(last_pk, moved)
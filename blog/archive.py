@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractMonth, ExtractYear, Greatest
+from django.utils import timezone
+
+from .models import ArchiveMonth, Post
+
+
+def month_key(pub_date):
+    local = timezone.localtime(pub_date)
+    return local.year, local.month
+
+
+def month_range(year, month=None):
+    """Return the [start, end) bounds of a year or month in local time."""
+    if month is None:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    elif month == 12:
+        start, end = datetime(year, 12, 1), datetime(year + 1, 1, 1)
+    else:
+        start, end = datetime(year, month, 1), datetime(year, month + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def add(key, delta):
+    year, month = key
+    months = ArchiveMonth.objects.filter(year=year, month=month)
+    updated = months.update(
+        posts_count=Greatest(F('posts_count') + delta, 0))
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            ArchiveMonth.objects.create(
+                year=year, month=month, posts_count=delta)
+    except IntegrityError:
+        months.update(posts_count=F('posts_count') + delta)
+
+
+def recount(key):
+    year, month = key
+    start, end = month_range(year, month)
+    ArchiveMonth.objects.update_or_create(
+        year=year, month=month,
+        defaults={'posts_count': Post.objects.published().filter(
+            pub_date__gte=start, pub_date__lt=end).count()},
+    )
+
+
+def apply_transition(old, new):
+    old_key = month_key(old.pub_date) if old.visible else None
+    new_key = month_key(new.pub_date) if new.visible else None
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        add(old_key, -1)
+    if new_key is not None:
+        add(new_key, 1)
+
+
+def rebuild():
+    """Recompute the whole histogram with one GROUP BY and swap it in."""
+    tzinfo = timezone.get_current_timezone()
+    rows = Post.objects.published().order_by().annotate(
+        year=ExtractYear('pub_date', tzinfo=tzinfo),
+        month=ExtractMonth('pub_date', tzinfo=tzinfo),
+    ).values('year', 'month').annotate(posts_count=Count('pk'))
+    months = [ArchiveMonth(**row) for row in rows]
+    with transaction.atomic():
+        ArchiveMonth.objects.all().delete()
+        ArchiveMonth.objects.bulk_create(months)
+    return len(months)
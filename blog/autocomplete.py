@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+
+from .models import Category, Location
+
+SOURCES = {
+    'locations': (Location, 'name'),
+    'categories': (Category, 'title'),
+}
+MAX_QUERY_LENGTH = 100
+
+
+class PrefixCache:
+    """Small per-process LRU of recent prefix lookups with a TTL.
+
+    Lookups for short prefixes ("м", "мо") repeat constantly while users
+    type, so a few hundred entries absorb most of the index reads. Other
+    workers are not notified about edits and rely on the TTL instead.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.data = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.timeout, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+cache = PrefixCache(
+    settings.AUTOCOMPLETE_CACHE_SIZE, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+
+
+def search(source, query):
+    model, label = SOURCES[source]
+    prefix = query.strip().casefold()[:MAX_QUERY_LENGTH]
+    key = (source, prefix)
+    results = cache.get(key)
+    if results is None:
+        rows = model.objects.filter(
+            is_published=True,
+            search_name__gte=prefix,
+            search_name__lt=prefix + '\U0010ffff',
+        ).order_by('search_name').values_list(
+            'pk', label)[:settings.AUTOCOMPLETE_LIMIT]
+        results = [{'id': pk, 'text': text} for pk, text in rows]
+        cache.set(key, results)
+    return results
@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Category, Location, Post
+
+TARGETS = (
+    (Category, 'category', 'category_id'),
+    (Location, 'location', 'location_id'),
+)
+
+
+class PostState(NamedTuple):
+    visible: bool
+    category_id: Optional[int]
+    location_id: Optional[int]
+    pub_date: Optional[datetime]
+
+
+HIDDEN = PostState(False, None, None, None)
+
+
+def get_state(post, category_published=None):
+    if category_published is None:
+        category_published = (
+            post.category_id is None or post.category.is_published)
+    visible = bool(
+        post.is_published
+        and post.pub_date is not None
+        and post.pub_date <= timezone.now()
+        and category_published
+    )
+    return PostState(visible, post.category_id, post.location_id,
+                     post.pub_date)
+
+
+def latest_visible(relation):
+    return Subquery(
+        Post.objects.published().filter(**{relation: OuterRef('pk')})
+        .order_by().values(relation).annotate(latest=Max('pub_date'))
+        .values('latest')
+    )
+
+
+def apply_transition(old, new):
+    """Move a post's contribution from the ``old`` to the ``new`` state.
+
+    Counts change with single ``F()`` updates. The latest publication date
+    only needs a recount when the post that held it stops counting.
+    """
+    for model, relation, attr in TARGETS:
+        targets = {getattr(old, attr), getattr(new, attr)} - {None}
+        for pk in targets:
+            was = old.visible and getattr(old, attr) == pk
+            now = new.visible and getattr(new, attr) == pk
+            delta = now - was
+            if delta or now:
+                update = {}
+                if delta:
+                    update['posts_count'] = Greatest(
+                        F('posts_count') + delta, 0)
+                if now:
+                    update['last_pub_date'] = Greatest(
+                        Coalesce('last_pub_date', new.pub_date),
+                        new.pub_date)
+                model.objects.filter(pk=pk).update(**update)
+            if was and not (now and new.pub_date >= old.pub_date):
+                model.objects.filter(
+                    pk=pk, last_pub_date__lte=old.pub_date
+                ).update(last_pub_date=latest_visible(relation))
+
+
+def recount(model, relation, pks=None, batch_size=1000):
+    """Recompute counters from posts in bulk and return the drifted rows."""
+    stats = Post.objects.published().order_by().values(relation).annotate(
+        count=Count('pk'), latest=Max('pub_date'))
+    if pks is not None:
+        stats = stats.filter(**{f'{relation}__in': pks})
+    actual = {
+        row[relation]: (row['count'], row['latest']) for row in stats
+        if row[relation] is not None
+    }
+    objects = model.objects.order_by('pk').only(
+        'posts_count', 'last_pub_date')
+    if pks is not None:
+        objects = objects.filter(pk__in=pks)
+    fixed = 0
+    drifted = []
+    for obj in objects.iterator(chunk_size=batch_size):
+        count, latest = actual.get(obj.pk, (0, None))
+        if (obj.posts_count, obj.last_pub_date) != (count, latest):
+            obj.posts_count, obj.last_pub_date = count, latest
+            drifted.append(obj)
+        if len(drifted) >= batch_size:
+            model.objects.bulk_update(
+                drifted, ['posts_count', 'last_pub_date'])
+            fixed += len(drifted)
+            drifted = []
+    model.objects.bulk_update(drifted, ['posts_count', 'last_pub_date'])
+    return fixed + len(drifted)
@@ -0,0 +1,57 @@
+"""Hide-then-purge deletion of posts and users with large histories."""
+from django.conf import settings
+from django.db.models import F, Min
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from core import deletion
+from . import sitemaps, tasks
+from .models import Post
+
+
+def is_large(obj):
+    queryset = type(obj)._base_manager.filter(pk=obj.pk)
+    return deletion.count_rows(queryset) >= settings.BULK_DELETE_THRESHOLD
+
+
+def delete_post(post, requested_by=None):
+    """Unpublish the post now and delete it with its comments later."""
+    post.is_published = False
+    post.save(update_fields=('is_published',))
+    return deletion.schedule(post, requested_by)
+
+
+def delete_user(user, requested_by=None):
+    """Deactivate the user, hide their posts and delete everything later.
+
+    Posts are hidden with one ``UPDATE`` that bypasses the visibility
+    signals, so only the categories, locations, archive months and sitemap
+    segments they counted towards are recounted in the background.
+    """
+    user.is_active = False
+    user.save(update_fields=('is_active',))
+    visible = Post.objects.published().filter(author=user).order_by()
+    tzinfo = timezone.get_current_timezone()
+    months = visible.annotate(
+        year=ExtractYear('pub_date', tzinfo=tzinfo),
+        month=ExtractMonth('pub_date', tzinfo=tzinfo),
+    ).values_list('year', 'month').distinct()
+    segments = list(visible.annotate(
+        segment=F('pk') / settings.SITEMAP_SEGMENT_SIZE
+    ).values('segment').annotate(first=Min('pk')).values_list(
+        'first', flat=True))
+    tasks.recount_hidden_posts.enqueue(
+        user.pk,
+        distinct_ids(visible, 'category_id'),
+        distinct_ids(visible, 'location_id'),
+        [list(key) for key in months],
+    )
+    for pk in segments:
+        sitemaps.schedule('posts', pk)
+    Post.objects.filter(author=user).update(is_published=False)
+    return deletion.schedule(user, requested_by)
+
+
+def distinct_ids(queryset, field):
+    return list(queryset.filter(**{f'{field}__isnull': False}).values_list(
+        field, flat=True).distinct())
@@ -0,0 +1,97 @@
+"""Periodic e-mail digests of new comments for post authors.
+
+New comments only add a row to the :class:`CommentNotification` outbox.
+``manage.py send_digests`` groups the rows of every author whose digest
+is due and sends the messages in batches over one mail connection.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import CommentNotification
+
+User = get_user_model()
+Frequency = User.DigestFrequency
+
+PERIODS = {
+    Frequency.HOURLY: timedelta(hours=1),
+    Frequency.DAILY: timedelta(days=1),
+    Frequency.WEEKLY: timedelta(days=7),
+}
+
+
+def due(now):
+    condition = Q()
+    for frequency, period in PERIODS.items():
+        condition |= Q(digest_frequency=frequency) & (
+            Q(digest_sent_at__isnull=True)
+            | Q(digest_sent_at__lte=now - period))
+    return condition
+
+
+def build_message(user, notifications):
+    posts = [
+        (post, [notification.comment for notification in group])
+        for post, group in groupby(
+            notifications, key=lambda notification: notification.comment.post)
+    ]
+    context = {
+        'user': user,
+        'posts': posts,
+        'count': len(notifications),
+        'site_url': settings.SITE_URL,
+    }
+    return EmailMessage(
+        subject=render_to_string(
+            'emails/comment_digest_subject.txt', context).strip(),
+        body=render_to_string('emails/comment_digest.txt', context),
+        to=[user.email],
+    )
+
+
+def send_digests(now=None, batch_size=None):
+    now = now or timezone.now()
+    batch_size = batch_size or settings.DIGEST_BATCH_SIZE
+    CommentNotification.objects.filter(
+        Q(recipient__digest_frequency=Frequency.NEVER)
+        | Q(comment__is_published=False)
+    ).delete()
+    recipients = list(User.objects.filter(
+        due(now),
+        Exists(CommentNotification.objects.filter(recipient=OuterRef('pk'))),
+    ).order_by('pk').values_list('pk', flat=True))
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(recipients), batch_size):
+            sent += send_batch(
+                connection, recipients[start:start + batch_size], now)
+    return sent
+
+
+def send_batch(connection, recipient_ids, now):
+    notifications = CommentNotification.objects.filter(
+        recipient_id__in=recipient_ids
+    ).select_related(
+        'recipient', 'comment__author', 'comment__post'
+    ).only(
+        'recipient__username', 'recipient__email', 'comment__text',
+        'comment__created_at', 'comment__author__username',
+        'comment__post__title',
+    ).order_by('recipient_id', 'comment__post_id', 'id')
+    messages, sent_ids = [], []
+    for user, group in groupby(
+            notifications, key=lambda notification: notification.recipient):
+        group = list(group)
+        sent_ids.extend(notification.pk for notification in group)
+        if user.email:
+            messages.append(build_message(user, group))
+    connection.send_messages(messages)
+    CommentNotification.objects.filter(pk__in=sent_ids).delete()
+    User.objects.filter(pk__in=recipient_ids).update(digest_sent_at=now)
+    return len(messages)
@@ -0,0 +1,79 @@
+"""Near-duplicate texts of posts and comments.
+
+Candidates come from the MinHash band keys indexed on the models (see
+:mod:`blog.minhash`) and are kept when the word sets of the texts have a
+Jaccard similarity of at least ``DUPLICATE_SIMILARITY``.
+"""
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+
+from . import minhash
+
+
+def find(queryset, text, limit=None):
+    """Objects of ``queryset`` whose text is a near-duplicate of ``text``."""
+    keys = minhash.band_keys(text)
+    if keys is None:
+        return []
+    model = queryset.model
+    candidates = queryset.filter(reduce(or_, (
+        Q(**{field: key}) for field, key in zip(model.BAND_FIELDS, keys))))
+    return [
+        candidate for candidate in candidates.order_by('pk')[
+            :settings.DUPLICATE_CANDIDATES]
+        if minhash.similarity(text, candidate.text)
+        >= settings.DUPLICATE_SIMILARITY
+    ][:limit]
+
+
+def backfill(model, batch_size=2000):
+    """Index texts saved before the band keys existed or by bulk writes."""
+    updated = 0
+    queryset = model.objects.filter(text_band_0__isnull=True).only('text')
+    batch = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        obj.index_text()
+        if obj.text_band_0 is not None:
+            batch.append(obj)
+        if len(batch) == batch_size:
+            updated += model.objects.bulk_update(batch, model.BAND_FIELDS)
+            batch = []
+    return updated + model.objects.bulk_update(batch, model.BAND_FIELDS)
+
+
+def clusters(queryset):
+    """Group near-duplicates, yield ``(original, [copies])`` pairs.
+
+    Objects are scanned oldest first. Each one is compared only with the
+    originals found so far that share one of its band keys. Only the band
+    keys of the originals are kept, their texts are read back for the
+    candidates, so memory grows with the number of distinct texts but not
+    with their length or their copies.
+    """
+    model = queryset.model
+    buckets = [{} for _ in model.BAND_FIELDS]
+    copies = {}
+    rows = queryset.exclude(text_band_0__isnull=True).order_by(
+        'pk').values_list('pk', 'text', *model.BAND_FIELDS)
+    for pk, text, *keys in rows.iterator(chunk_size=2000):
+        candidates = {
+            original for bucket, key in zip(buckets, keys)
+            for original in bucket.get(key, ())
+        }
+        texts = dict(queryset.filter(pk__in=candidates).order_by().values_list(
+            'pk', 'text')) if candidates else {}
+        original = next((
+            original for original in sorted(texts)
+            if minhash.similarity(text, texts[original])
+            >= settings.DUPLICATE_SIMILARITY
+        ), None)
+        if original is not None:
+            copies.setdefault(original, []).append(pk)
+            continue
+        for bucket, key in zip(buckets, keys):
+            bucket.setdefault(key, []).append(pk)
+    for pk in sorted(copies):
+        yield pk, copies[pk]
@@ -0,0 +1,147 @@
+"""Personal feeds of followed authors.
+
+A post that becomes visible is copied into the :class:`FeedItem` inbox of
+every follower of its author by a background task, so reading a feed is
+an index range scan over one user's inbox. Authors with more than
+``FEED_FANOUT_LIMIT`` followers are not fanned out: their posts are
+merged into the feed at read time instead, and their inbox items are left
+out of it. When such an author drops back to the limit, the latest posts
+are copied into the inboxes of all followers again.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from users.models import Follow
+from . import tasks
+from .models import FeedItem, Post
+
+User = get_user_model()
+
+BACKFILL_POSTS = 50
+
+
+def follow(user, author):
+    with transaction.atomic():
+        _, created = Follow.objects.get_or_create(follower=user, author=author)
+        if created:
+            User.objects.filter(pk=author.pk).update(
+                followers_count=F('followers_count') + 1)
+            tasks.backfill_feed.enqueue(user.pk, author.pk)
+    return created
+
+
+def unfollow(user, author):
+    with transaction.atomic():
+        deleted, _ = Follow.objects.filter(
+            follower=user, author=author).delete()
+        if deleted:
+            FeedItem.objects.filter(user=user, post__author=author).delete()
+    return bool(deleted)
+
+
+def follower_removed(author_id):
+    """Count a deleted follow, however it was deleted."""
+    User.objects.filter(pk=author_id).update(
+        followers_count=Greatest(F('followers_count') - 1, 0))
+    if User.objects.filter(
+        pk=author_id, followers_count=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        tasks.backfill_followers_feeds.enqueue(author_id)
+
+
+def fan_out(post_id):
+    post = Post.objects.published().filter(pk=post_id).select_related(
+        'author').only('pub_date', 'author__followers_count').first()
+    if (post is None
+            or post.author.followers_count > settings.FEED_FANOUT_LIMIT):
+        return 0
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('follower_id', flat=True).iterator(
+        chunk_size=settings.FEED_BATCH_SIZE)
+    items = [
+        FeedItem(user_id=user_id, post_id=post_id, pub_date=post.pub_date)
+        for user_id in followers
+    ]
+    FeedItem.objects.bulk_create(
+        items, batch_size=settings.FEED_BATCH_SIZE, ignore_conflicts=True)
+    return len(items)
+
+
+def latest_posts(author_id):
+    """Posts to copy into inboxes, none for authors above the limit."""
+    if User.objects.filter(
+        pk=author_id, followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists():
+        return []
+    return list(Post.objects.published().filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('pk', 'pub_date')[:BACKFILL_POSTS])
+
+
+def backfill(user_id, author_id):
+    """Copy the author's latest posts into a new follower's inbox."""
+    FeedItem.objects.bulk_create([
+        FeedItem(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in latest_posts(author_id)
+    ], ignore_conflicts=True)
+
+
+def backfill_followers(author_id):
+    """Copy the author's latest posts into the inboxes of all followers."""
+    posts = latest_posts(author_id)
+    if not posts:
+        return 0
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'follower_id', flat=True).iterator(
+            chunk_size=settings.FEED_BATCH_SIZE)
+    items = []
+    count = 0
+    for user_id in followers:
+        items += [FeedItem(user_id=user_id, post_id=pk, pub_date=pub_date)
+                  for pk, pub_date in posts]
+        count += 1
+        if len(items) >= settings.FEED_BATCH_SIZE:
+            FeedItem.objects.bulk_create(items, ignore_conflicts=True)
+            items = []
+    FeedItem.objects.bulk_create(items, ignore_conflicts=True)
+    return count
+
+
+def keyset(prefix, anchor):
+    """Rows strictly after the ``(pub_date, id)`` of the ``anchor`` post."""
+    if anchor is None:
+        return Q()
+    pub_date, pk = anchor
+    return (Q(**{f'{prefix}pub_date__lt': pub_date})
+            | Q(**{f'{prefix}pub_date': pub_date, 'pk__lt': pk}))
+
+
+def feed_posts(user, before=None, limit=None):
+    """Return up to ``limit + 1`` feed posts, newest first.
+
+    ``before`` is the id of the last post of the previous page.
+    """
+    limit = limit or settings.POSTS_ON_PAGE
+    anchor = None
+    if before is not None:
+        anchor = Post.objects.filter(pk=before).values_list(
+            'pub_date', 'pk').first()
+    celebrities = list(user.following.filter(
+        author__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('author_id', flat=True))
+    # Inbox items of authors who crossed the limit after the fan-out are
+    # served by the read-time query below.
+    posts = list(Post.objects.published().filter(
+        Q(feed_items__user=user) & keyset('feed_items__', anchor)
+    ).exclude(
+        author_id__in=celebrities
+    ).order_by('-feed_items__pub_date', '-pk').for_cards()[:limit + 1])
+    if celebrities:
+        posts += Post.objects.published().filter(
+            keyset('', anchor), author_id__in=celebrities
+        ).order_by('-pub_date', '-pk').for_cards()[:limit + 1]
+        posts.sort(key=lambda post: (post.pub_date, post.pk), reverse=True)
+    return posts[:limit + 1]
@@ -1,10 +1,46 @@
-from django.forms import DateTimeInput, ModelForm, Textarea
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import (DateTimeInput, HiddenInput, ModelForm, Select,
+                          Textarea)
+from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
 from django.utils import timezone
 
+from . import images
 from .models import Comment, Post
 from .validators import date_in_future
 
 
+class AutocompleteSelect(Select):
+    """Select that renders only the chosen option.
+
+    The rest are fetched by autocomplete.js from the ``blog:autocomplete``
+    endpoint, while the form field still validates the submitted id.
+    """
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse(
+            'blog:autocomplete', args=(self.source,))
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [pk for pk in value if str(pk).isdigit()]
+        options = [self.create_option(
+            name, '', self.choices.field.empty_label, not selected, 0)]
+        if selected:
+            chosen = self.choices.queryset.filter(pk__in=selected)
+            for index, obj in enumerate(chosen, start=1):
+                options.append(self.create_option(
+                    name, obj.pk, str(obj), True, index))
+        return [(None, options, 0)]
+
+
 class PostForm(ModelForm):
     class Meta:
         model = Post
@@ -20,11 +56,14 @@ class PostForm(ModelForm):
             'pub_date': DateTimeInput({
                 'type': 'datetime-local',
                 'style': 'width:200px',
-            })
+            }),
+            'location': AutocompleteSelect('locations'),
+            'category': AutocompleteSelect('categories'),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, oversized=(), **kwargs):
         super().__init__(*args, **kwargs)
+        self.oversized = oversized
         if all((
             self.instance,
             self.instance.pk,
@@ -41,6 +80,15 @@ class PostForm(ModelForm):
             date_in_future(pub_date)
         return pub_date
 
+    def clean_image(self):
+        if 'image' in self.oversized:
+            raise ValidationError('Файл больше {}.'.format(
+                filesizeformat(settings.FILE_UPLOAD_MAX_SIZE)))
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return images.normalize(image)
+        return image
+
 
 class CommentCreateForm(ModelForm):
 
@@ -51,3 +99,10 @@ class CommentCreateForm(ModelForm):
         widgets = {
             'text': Textarea({'rows': '4'})
         }
+
+
+class CommentReplyForm(CommentCreateForm):
+
+    class Meta(CommentCreateForm.Meta):
+        fields = ['text', 'parent']
+        widgets = {**CommentCreateForm.Meta.widgets, 'parent': HiddenInput}
@@ -0,0 +1,100 @@
+"""Buffered post view counters.
+
+Views are counted in memory by every worker process and written to the
+database at most once per ``VIEWS_FLUSH_INTERVAL`` seconds with one
+upsert into the daily :class:`~blog.models.PostViews` buckets and one
+``UPDATE`` of ``Post.views_count``. Views buffered by a worker that
+crashes are lost, which is acceptable for popularity statistics.
+"""
+import atexit
+import re
+import time
+from collections import Counter
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Post, PostViews
+
+BOT_RE = re.compile(
+    r'bot|crawl|spider|slurp|archiver|preview|headless|curl|wget|'
+    r'python-requests|httpclient|monitor',
+    re.IGNORECASE,
+)
+
+
+def is_bot(request):
+    user_agent = request.headers.get('User-Agent', '')
+    return not user_agent or BOT_RE.search(user_agent) is not None
+
+
+class ViewBuffer:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.counts = Counter()
+        self.lock = Lock()
+        self.flushed_at = time.monotonic()
+
+    def add(self, post_id):
+        with self.lock:
+            self.counts[post_id, timezone.localdate()] += 1
+
+    def flush_if_due(self):
+        if time.monotonic() - self.flushed_at >= self.interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+        if counts:
+            write(counts)
+
+    def pending(self):
+        with self.lock:
+            return sum(self.counts.values())
+
+
+def write(counts):
+    table = connection.ops.quote_name(PostViews._meta.db_table)
+    totals = Counter()
+    for (post_id, _), views in counts.items():
+        totals[post_id] += views
+    with transaction.atomic():
+        existing = set(Post.objects.filter(
+            pk__in=totals).values_list('pk', flat=True))
+        rows = [
+            (post_id, connection.ops.adapt_datefield_value(day), views)
+            for (post_id, day), views in counts.items()
+            if post_id in existing
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {table} (post_id, day, views) '
+                f'VALUES (%s, %s, %s) '
+                f'ON CONFLICT (post_id, day) '
+                f'DO UPDATE SET views = {table}.views + excluded.views',
+                rows,
+            )
+        Post.objects.filter(pk__in=existing).update(
+            views_count=F('views_count') + Case(
+                *(When(pk=pk, then=Value(totals[pk])) for pk in existing),
+                default=Value(0),
+            )
+        )
+
+
+buffer = ViewBuffer(settings.VIEWS_FLUSH_INTERVAL)
+atexit.register(buffer.flush)
+
+
+def record_view(request, post):
+    if request.method != 'GET' or is_bot(request):
+        return
+    if request.user.pk == post.author_id:
+        return
+    buffer.add(post.pk)
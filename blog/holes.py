@@ -0,0 +1,49 @@
+"""Per-user parts of shared pages, see ``core.holes``."""
+from django.template.loader import render_to_string
+
+from core.holes import hole
+from .forms import CommentCreateForm
+
+
+@hole
+def post_actions(request, post_id, author_id, buttons=False):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'includes/post_actions.html',
+        {'post_id': post_id, 'buttons': buttons})
+
+
+@hole
+def comment_actions(request, post_id, comment_id, author_id, edited=False):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'includes/comment_actions.html',
+        {'post_id': post_id, 'comment_id': comment_id, 'edited': edited})
+
+
+@hole
+def comment_form(request, post_id):
+    if request.user.is_anonymous:
+        return ''
+    return render_to_string(
+        'includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentCreateForm()},
+        request=request)
+
+
+@hole
+def feed_link(request, view_name):
+    if request.user.is_anonymous:
+        return ''
+    return render_to_string(
+        'includes/feed_link.html', {'view_name': view_name})
+
+
+@hole
+def user_menu(request, view_name, username):
+    return render_to_string(
+        'includes/user_menu.html',
+        {'view_name': view_name or '', 'username': username},
+        request=request)
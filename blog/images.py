@@ -0,0 +1,70 @@
+"""Validation and normalisation of uploaded post images.
+
+Uploads arrive as temporary files (see ``core.uploads``). The pixel size
+is read from the image header and checked before anything is decoded,
+then the image is decoded at most once, reduced to
+``IMAGE_MAX_DIMENSION`` and re-encoded without EXIF, GPS or other
+metadata. JPEG sources are decoded at a reduced scale with ``draft()``,
+so a large photo never exists in memory at full resolution.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+}
+OUTPUT_MODES = {
+    'JPEG': ('RGB', 'L'),
+    'WEBP': ('RGB', 'RGBA'),
+}
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+SPOOL_SIZE = 1024 * 1024
+
+
+def check_dimensions(image):
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f'Слишком большое изображение: {width}×{height} пикселей.')
+
+
+def normalize(upload):
+    """Return a metadata-free, size-limited copy of an uploaded image."""
+    upload.seek(0)
+    with Image.open(upload) as image:
+        check_dimensions(image)
+        source_format = image.format
+        limit = settings.IMAGE_MAX_DIMENSION
+        if source_format == 'JPEG':
+            # draft() only scales down while both sides stay at least as
+            # large as requested, so ask for the aspect-preserving target.
+            scale = min(1, limit / max(image.size))
+            image.draft('RGB', tuple(
+                max(1, int(side * scale)) for side in image.size))
+        image.load()
+        image.thumbnail((limit, limit))
+        ImageOps.exif_transpose(image, in_place=True)
+        output_format = (
+            source_format if source_format in SAVE_OPTIONS else 'PNG')
+        modes = OUTPUT_MODES.get(output_format)
+        if modes and image.mode not in modes:
+            image = image.convert('RGB' if 'A' not in image.mode
+                                  or output_format == 'JPEG' else 'RGBA')
+        # Encoders copy XMP, EXIF and comments from ``info``; only the
+        # colour profile is kept.
+        image.info = {
+            key: value for key, value in image.info.items()
+            if key == 'icc_profile'
+        }
+        stream = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        image.save(stream, output_format, **SAVE_OPTIONS[output_format])
+    stream.seek(0)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(stream, name=f'{stem}.{EXTENSIONS[output_format]}')
@@ -0,0 +1,84 @@
+import base64
+import datetime
+import gzip
+import sys
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+BATCH_SIZE = 2000
+PROGRESS_EVERY = 50000
+
+MODELS_ORDER = (
+    'users.customuser',
+    'blog.category',
+    'blog.location',
+    'blog.post',
+    'blog.comment',
+    'blog.archivedcomment',
+    'blog.archivedcommentrevision',
+)
+
+
+class JsonlEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without truncating microseconds, bytes in base64."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(o).decode()
+        return super().default(o)
+
+
+def get_models(labels=None):
+    labels = [label.lower() for label in labels or MODELS_ORDER]
+    unknown = set(labels) - set(MODELS_ORDER)
+    if unknown:
+        raise LookupError(
+            f'Неизвестные модели: {", ".join(sorted(unknown))}')
+    return [
+        apps.get_model(label) for label in MODELS_ORDER if label in labels
+    ]
+
+
+def get_field_names(model):
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def get_binary_field_names(model):
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if isinstance(field, models.BinaryField)
+    ]
+
+
+def open_stream(path, mode):
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+@contextmanager
+def raw_timestamps(model):
+    """Keep imported auto_now/auto_now_add values instead of now()."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, models.DateField)
+        and (field.auto_now or field.auto_now_add)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog import archival
+
+
+class Command(BaseCommand):
+    help = ('Переносит комментарии постов без свежих обсуждений в архивную '
+            'таблицу. Работает пачками; прерванный запуск можно повторить.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.COMMENTS_ARCHIVE_DAYS,
+            help='Архивировать посты без комментариев за последние N дней')
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Постов в одной транзакции')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        moved = archival.archive(
+            cutoff, options['batch_size'], progress=self.progress)
+        self.stdout.write(
+            self.style.SUCCESS(f'Перенесено комментариев: {moved}'))
+
+    def progress(self, last_pk, moved):
+        self.stdout.write(f'  до поста {last_pk}: {moved}')
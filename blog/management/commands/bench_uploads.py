@@ -0,0 +1,107 @@
+import io
+import resource
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from django.test.client import BOUNDARY, MULTIPART_CONTENT
+from PIL import Image
+
+from blog.forms import PostForm
+
+PATH = '/posts/create/'
+
+
+def rss_kb(field='VmRSS'):
+    """Resident memory of the process in KiB, from ``/proc`` when present."""
+    try:
+        for line in Path('/proc/self/status').read_text().splitlines():
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak():
+    """Reset ``VmHWM`` so that it only covers the measured rounds."""
+    try:
+        Path('/proc/self/clear_refs').write_text('5')
+    except OSError:
+        pass
+
+
+def make_jpeg(width, height):
+    noise = Image.effect_noise((width // 8, height // 8), 32)
+    image = Image.merge('RGB', (
+        Image.linear_gradient('L').resize((width, height)),
+        noise.resize((width, height)),
+        Image.radial_gradient('L').resize((width, height)),
+    ))
+    stream = io.BytesIO()
+    image.save(stream, 'JPEG', quality=90)
+    return stream.getvalue()
+
+
+class Command(BaseCommand):
+    help = ('Замер памяти при загрузке картинок: параллельно разбирает '
+            'multipart-запросы с большим JPEG и проверяет их формой поста, '
+            'печатая RSS процесса после каждого раунда.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=6000)
+        parser.add_argument('--height', type=int, default=4000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with tempfile.NamedTemporaryFile(suffix='.multipart') as payload:
+            payload.write(
+                f'--{BOUNDARY}\r\nContent-Disposition: form-data; '
+                'name="image"; filename="photo.jpg"\r\n'
+                'Content-Type: image/jpeg\r\n\r\n'.encode())
+            jpeg = make_jpeg(options['width'], options['height'])
+            payload.write(jpeg)
+            payload.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+            payload.flush()
+            self.stdout.write(
+                f'Картинка {options["width"]}×{options["height"]}, '
+                f'{len(jpeg) / 1024 / 1024:.1f} МБ; '
+                f'RSS до замера {rss_kb() / 1024:.0f} МБ')
+            del jpeg
+            reset_peak()
+            threads = options['threads']
+            for number in range(1, options['rounds'] + 1):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(threads) as pool:
+                    results = list(pool.map(
+                        lambda _: self.upload(payload.name), range(threads)))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'раунд {number}: {threads} загрузок за {elapsed:.2f} с, '
+                    f'ошибок {threads - sum(results)}, '
+                    f'RSS {rss_kb() / 1024:.0f} МБ, '
+                    f'пик {rss_kb("VmHWM") / 1024:.0f} МБ')
+
+    def upload(self, path):
+        with open(path, 'rb') as stream:
+            request = WSGIRequest({
+                'REQUEST_METHOD': 'POST',
+                'PATH_INFO': PATH,
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': stream,
+                'CONTENT_TYPE': MULTIPART_CONTENT,
+                'CONTENT_LENGTH': str(Path(path).stat().st_size),
+            })
+            form = PostForm(
+                files=request.FILES,
+                oversized=getattr(request, 'oversized_uploads', ()))
+            form.is_valid()
+            for upload in request.FILES.values():
+                upload.close()
+            return 'image' not in form.errors
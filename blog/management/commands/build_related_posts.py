@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from blog import related
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает похожие публикации по TF-IDF заголовков и '
+            'текстов. Запускайте по расписанию, например раз в сутки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--new', action='store_true',
+            help='Обработать только публикации без рекомендаций')
+
+    def handle(self, *args, **options):
+        if options['new']:
+            post_ids = list(Post.objects.published().filter(
+                related_posts__isnull=True).values_list('pk', flat=True))
+            processed = related.update(post_ids)
+        else:
+            processed = related.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано публикаций: {processed}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import sitemaps
+
+
+class Command(BaseCommand):
+    help = ('Полностью пересобирает сегменты карты сайта и индекс '
+            'sitemap.xml, читая таблицы потоком. Обычно сегменты '
+            'обновляются сами после изменений, команда нужна при первом '
+            'запуске и после массовых правок в обход save().')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sections', nargs='*',
+            help='Разделы для пересборки ({}), по умолчанию все'.format(
+                ', '.join(sitemaps.SECTIONS)))
+
+    def handle(self, *args, **options):
+        unknown = set(options['sections']) - set(sitemaps.SECTIONS)
+        if unknown:
+            raise CommandError(f'Неизвестные разделы: {", ".join(unknown)}')
+        urls = sitemaps.rebuild(options['sections'])
+        self.stdout.write(self.style.SUCCESS(f'Готово, адресов: {urls}'))
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from blog import revisions
+
+
+class Command(BaseCommand):
+    help = ('Удаляет старые версии публикаций и комментариев по настройкам '
+            'REVISION_RETENTION_DAYS, REVISION_MAX_COUNT и '
+            'REVISION_THIN_AFTER_DAYS и пересобирает дельты оставшихся.')
+
+    def handle(self, *args, **options):
+        thin = timezone.now() - timedelta(
+            days=settings.REVISION_THIN_AFTER_DAYS)
+        for model, revision_model in revisions.REVISIONS.items():
+            owner_field = next(
+                field.name for field in revision_model._meta.fields
+                if field.related_model is model)
+            owner_ids = revision_model.objects.values(owner_field).annotate(
+                count=Count('pk'), oldest=Min('created_at'),
+            ).filter(
+                Q(count__gt=settings.REVISION_MAX_COUNT) | Q(oldest__lt=thin)
+            ).values_list(owner_field, flat=True)
+            deleted = sum(
+                revisions.compact(owner)
+                for owner in model.objects.filter(
+                    pk__in=list(owner_ids)).iterator(chunk_size=500)
+            )
+            self.stdout.write(
+                f'{revision_model._meta.verbose_name_plural}: удалено '
+                f'{deleted}')
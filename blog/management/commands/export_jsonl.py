@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ._jsonl import (BATCH_SIZE, MODELS_ORDER, PROGRESS_EVERY, JsonlEncoder,
+                     get_field_names, get_models, open_stream)
+
+
+class Command(BaseCommand):
+    help = ('Потоковая выгрузка пользователей, категорий, меток, постов, '
+            'комментариев и архивных комментариев с их версиями в JSONL '
+            '(по объекту на строку).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для выгрузки (.gz — со сжатием, - — stdout)')
+        parser.add_argument(
+            '--models', nargs='+', default=MODELS_ORDER,
+            help='Модели для выгрузки, например blog.post blog.comment')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            models = get_models(options['models'])
+        except LookupError as error:
+            raise CommandError(error)
+        encoder = JsonlEncoder(ensure_ascii=False)
+        stream = open_stream(options['path'], 'w')
+        try:
+            for model in models:
+                self.export_model(
+                    model, stream, encoder, options['batch_size'])
+        finally:
+            if options['path'] != '-':
+                stream.close()
+
+    def export_model(self, model, stream, encoder, batch_size):
+        label = model._meta.label_lower
+        field_names = get_field_names(model)
+        rows = model.objects.order_by('pk').values_list(
+            'pk', *field_names).iterator(chunk_size=batch_size)
+        count = 0
+        for pk, *values in rows:
+            stream.write(encoder.encode({
+                'model': label,
+                'pk': pk,
+                'fields': dict(zip(field_names, values)),
+            }))
+            stream.write('\n')
+            count += 1
+            if not count % PROGRESS_EVERY:
+                self.stderr.write(f'{label}: {count}')
+        self.stderr.write(self.style.SUCCESS(f'{label}: выгружено {count}'))
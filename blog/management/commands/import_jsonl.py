@@ -0,0 +1,127 @@
+import base64
+import json
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from blog import archive, counters, duplicates, related, sitemaps, threads
+from blog.models import Category, Comment, Location, Post
+from ._jsonl import (BATCH_SIZE, PROGRESS_EVERY, get_binary_field_names,
+                     get_field_names, get_models, open_stream, raw_timestamps)
+
+
+class Command(BaseCommand):
+    help = ('Потоковая загрузка данных из JSONL, созданного export_jsonl. '
+            'Объекты сохраняются пачками через bulk_create, первичные ключи '
+            'и внешние ключи сохраняются как есть, без запросов на строку. '
+            'bulk_create обходит save() и сигналы, поэтому после загрузки '
+            'пересчитываются пути веток комментариев, признаки MinHash, '
+            'счётчики, архив по месяцам, похожие публикации и карта сайта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для загрузки (.gz — со сжатием, - — stdin)')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--ignore-existing', action='store_true',
+            help='Пропускать объекты, первичные ключи которых уже заняты')
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересчитывать производные данные; тогда запустите '
+                 'remove_duplicates --dry-run, reconcile_counters, '
+                 'rebuild_archive, build_related_posts и build_sitemaps '
+                 'вручную')
+
+    def handle(self, *args, **options):
+        self.models = {
+            model._meta.label_lower: model for model in get_models()}
+        self.batch_size = options['batch_size']
+        self.ignore_conflicts = options['ignore_existing']
+        self.counts = {}
+        stream = open_stream(options['path'], 'r')
+        try:
+            with transaction.atomic(), ExitStack() as stack:
+                for model in self.models.values():
+                    stack.enter_context(raw_timestamps(model))
+                self.load(stream)
+                self.reset_sequences()
+        finally:
+            if options['path'] != '-':
+                stream.close()
+        for label, count in self.counts.items():
+            self.stderr.write(
+                self.style.SUCCESS(f'{label}: загружено {count}'))
+        if not options['skip_rebuild']:
+            self.rebuild()
+
+    def rebuild(self):
+        """Fill what ``save()`` and the signals maintain for single rows."""
+        steps = (
+            ('Пути веток комментариев', threads.backfill, Comment),
+            ('MinHash публикаций', duplicates.backfill, Post),
+            ('MinHash комментариев', duplicates.backfill, Comment),
+            ('Счётчики категорий', counters.recount, Category, 'category'),
+            ('Счётчики мест', counters.recount, Location, 'location'),
+            ('Месяцы архива', archive.rebuild),
+            ('Похожие публикации', related.rebuild),
+            ('Карта сайта', sitemaps.rebuild),
+        )
+        for name, func, *args in steps:
+            self.stderr.write(f'{name}: {func(*args)}')
+
+    def load(self, stream):
+        model, fields, binary_fields, batch = None, None, [], []
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                label = record['model']
+            except (ValueError, KeyError):
+                raise CommandError(f'Строка {line_number}: неверный формат')
+            if model is None or label != model._meta.label_lower:
+                self.flush(model, batch)
+                batch = []
+                try:
+                    model = self.models[label]
+                except KeyError:
+                    raise CommandError(
+                        f'Строка {line_number}: неизвестная модель {label}')
+                fields = set(get_field_names(model))
+                binary_fields = get_binary_field_names(model)
+            values = {
+                name: value for name, value in record['fields'].items()
+                if name in fields
+            }
+            for name in binary_fields:
+                if values.get(name) is not None:
+                    values[name] = base64.b64decode(values[name])
+            batch.append(model(pk=record['pk'], **values))
+            if len(batch) >= self.batch_size:
+                self.flush(model, batch)
+                batch = []
+        self.flush(model, batch)
+
+    def flush(self, model, batch):
+        if not batch:
+            return
+        model.objects.bulk_create(
+            batch,
+            batch_size=self.batch_size,
+            ignore_conflicts=self.ignore_conflicts,
+        )
+        label = model._meta.label_lower
+        before = self.counts.get(label, 0)
+        self.counts[label] = before + len(batch)
+        if before // PROGRESS_EVERY != self.counts[label] // PROGRESS_EVERY:
+            self.stderr.write(f'{label}: {self.counts[label]}')
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), list(self.models.values()))
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
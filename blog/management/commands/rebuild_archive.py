@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog import archive
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает помесячную гистограмму публикаций одним '
+            'GROUP BY. Запускайте периодически, чтобы учесть отложенные '
+            'публикации, и после массовых правок в обход save().')
+
+    def handle(self, *args, **options):
+        months = archive.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Месяцев в архиве: {months}'))
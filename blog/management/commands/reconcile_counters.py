@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog import counters
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики публикаций и даты последних публикаций '
+            'категорий и меток и исправляет расхождения. Запускайте '
+            'периодически: отложенные публикации попадают в счётчики '
+            'после наступления даты публикации именно при пересчёте.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model, relation, _ in counters.TARGETS:
+            fixed = counters.recount(
+                model, relation, batch_size=options['batch_size'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: исправлено {fixed}')
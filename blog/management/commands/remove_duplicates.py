@@ -0,0 +1,51 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+
+from blog import duplicates
+from blog.models import Comment, Post
+from core import holes
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = ('Индексирует тексты публикаций и комментариев без полос MinHash '
+            'и ищет почти одинаковые тексты. У комментариев остаётся самый '
+            'ранний, копии снимаются с публикации (или удаляются с '
+            '--delete); о похожих публикациях только выводится отчёт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-copies', type=int, default=1,
+            help='Трогать только тексты, повторённые хотя бы столько раз.')
+        parser.add_argument('--delete', action='store_true')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            indexed = duplicates.backfill(model)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: проиндексировано '
+                f'{indexed}')
+        for original, copies in duplicates.clusters(Post.objects.all()):
+            self.stdout.write(
+                f'Публикация {original} повторяется в {sorted(copies)}')
+        copies = list(chain.from_iterable(
+            copies
+            for _, copies in duplicates.clusters(
+                Comment.objects.filter(is_published=True))
+            if len(copies) >= options['min_copies']
+        ))
+        if not options['dry_run']:
+            for start in range(0, len(copies), BATCH_SIZE):
+                batch = Comment.objects.filter(
+                    pk__in=copies[start:start + BATCH_SIZE])
+                if options['delete']:
+                    batch.delete()
+                else:
+                    batch.update(is_published=False)
+            holes.invalidate()
+        self.stdout.write(
+            f'Копий комментариев: {len(copies)}'
+            f'{" (ничего не изменено)" if options["dry_run"] else ""}')
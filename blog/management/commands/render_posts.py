@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.models import Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = ('Заполняет сохранённые HTML и анонс текста постов. По умолчанию '
+            'обрабатываются только посты без них, с --all — все.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать все посты, например после смены разметки')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk').only('pk', 'text')
+        if not options['all']:
+            posts = posts.filter(Q(text_html='') | Q(excerpt=''))
+        batch_size = options['batch_size']
+        last_pk, total = 0, 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.render_text()
+            Post.objects.bulk_update(batch, ['text_html', 'excerpt'])
+            last_pk = batch[-1].pk
+            total += len(batch)
+            self.stderr.write(f'Обработано постов: {total}')
+        self.stdout.write(self.style.SUCCESS(f'Готово, постов: {total}'))
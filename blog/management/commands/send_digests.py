@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog import digests
+
+
+class Command(BaseCommand):
+    help = ('Отправляет авторам сводки новых комментариев с учётом '
+            'выбранной частоты. Запускайте по расписанию, например '
+            'каждые 15 минут.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        sent = digests.send_digests(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
@@ -0,0 +1,29 @@
+import markdown
+import nh3
+
+MARKDOWN_EXTENSIONS = ('extra', 'sane_lists')
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'dl', 'dt',
+    'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'li', 'ol', 'p',
+    'pre', 's', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th',
+    'thead', 'tr', 'ul',
+}
+
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'ol': {'start'},
+    'td': {'align'},
+    'th': {'align'},
+}
+
+
+def render_markdown(text: str) -> str:
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={'http', 'https', 'mailto'},
+    )
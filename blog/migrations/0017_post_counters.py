@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-19 17:08
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    visible = Post.objects.filter(
+        Q(category__isnull=True) | Q(category__is_published=True),
+        is_published=True,
+        pub_date__lte=timezone.now(),
+    ).order_by()
+    for model_name, relation in (
+        ('Category', 'category'), ('Location', 'location')
+    ):
+        model = apps.get_model('blog', model_name)
+        rows = visible.filter(**{f'{relation}__isnull': False}).values(
+            relation).annotate(count=Count('pk'), latest=Max('pub_date'))
+        for row in rows:
+            model.objects.filter(pk=row[relation]).update(
+                posts_count=row['count'], last_pub_date=row['latest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_post_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='last_pub_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя публикация'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Публикаций'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='last_pub_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя публикация'),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Публикаций'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-19 17:12
+
+from django.db import migrations, models
+
+
+def fill_search_names(apps, schema_editor):
+    for model_name, field in (('Category', 'title'), ('Location', 'name')):
+        model = apps.get_model('blog', model_name)
+        objects = model.objects.only(field)
+        for obj in objects.iterator():
+            obj.search_name = getattr(obj, field).casefold()
+            obj.save(update_fields=['search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-19 17:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+
+def fill_archive(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    ArchiveMonth = apps.get_model('blog', 'ArchiveMonth')
+    tzinfo = timezone.get_default_timezone()
+    rows = Post.objects.filter(
+        Q(category__isnull=True) | Q(category__is_published=True),
+        is_published=True,
+        pub_date__lte=timezone.now(),
+    ).order_by().annotate(
+        year=ExtractYear('pub_date', tzinfo=tzinfo),
+        month=ExtractMonth('pub_date', tzinfo=tzinfo),
+    ).values('year', 'month').annotate(posts_count=Count('pk'))
+    ArchiveMonth.objects.bulk_create(ArchiveMonth(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_search_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+            ],
+            options={
+                'verbose_name': 'Месяц архива',
+                'verbose_name_plural': 'Архив по месяцам',
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivemonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='blog_archive_month_unique'),
+        ),
+        migrations.RunPython(fill_archive, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 17:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Просмотры'),
+        ),
+        migrations.CreateModel(
+            name='PostViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='blog.post')),
+            ],
+            options={
+                'verbose_name': 'Просмотры за день',
+                'verbose_name_plural': 'Просмотры по дням',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postviews',
+            index=models.Index(fields=['day', 'post'], name='blog_post_views_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postviews',
+            constraint=models.UniqueConstraint(fields=('post', 'day'), name='blog_post_views_unique'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-19 17:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0023_commentnotification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='archived_comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев в архиве'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_published', models.BooleanField(verbose_name='Опубликовано')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('text', models.TextField(verbose_name='Текст комментария')),
+                ('is_edited', models.BooleanField(verbose_name='Отметка о редактировании')),
+                ('date_edited', models.DateTimeField(verbose_name='Время редактирования')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to='blog.post')),
+            ],
+            options={
+                'verbose_name': 'Архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ('created_at',),
+            },
+        ),
+    ]
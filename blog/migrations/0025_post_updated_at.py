@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 18:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0024_archivedcomment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0025_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_band_0',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 1'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_band_1',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 2'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_band_2',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 3'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_band_3',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 4'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_band_0',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 1'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_band_1',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 2'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_band_2',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 3'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_band_3',
+            field=models.BigIntegerField(db_index=True, editable=False, null=True, verbose_name='Полоса MinHash 4'),
+        ),
+    ]
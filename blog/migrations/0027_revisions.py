@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-19 18:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0026_text_bands'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Заменена')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полная копия')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'Версия публикации',
+                'verbose_name_plural': 'Версии публикаций',
+                'ordering': ('-number',),
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Заменена')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полная копия')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='blog.comment', verbose_name='Комментарий')),
+            ],
+            options={
+                'verbose_name': 'Версия комментария',
+                'verbose_name_plural': 'Версии комментариев',
+                'ordering': ('-number',),
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='blog_post_revision_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='commentrevision',
+            constraint=models.UniqueConstraint(fields=('comment', 'number'), name='blog_comment_revision_unique'),
+        ),
+    ]
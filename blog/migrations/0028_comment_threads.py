@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-19 18:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SEGMENT_WIDTH = 7
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BATCH_SIZE = 1000
+
+
+def segment(pk):
+    digits = []
+    while pk:
+        pk, digit = divmod(pk, len(DIGITS))
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rjust(SEGMENT_WIDTH, '0')
+
+
+def fill_paths(apps, schema_editor):
+    # Existing comments become the roots of their own threads.
+    comment_model = apps.get_model('blog', 'Comment')
+    batch = []
+    for comment in comment_model.objects.only('pk').iterator(
+            chunk_size=BATCH_SIZE):
+        comment.path = segment(comment.pk)
+        batch.append(comment)
+        if len(batch) == BATCH_SIZE:
+            comment_model.objects.bulk_update(batch, ['path'])
+            batch = []
+    comment_model.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0027_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='replies', to='blog.comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='blog_comment_thread_idx'),
+        ),
+    ]
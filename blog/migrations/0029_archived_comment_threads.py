@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-19 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SEGMENT_WIDTH = 7
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BATCH_SIZE = 1000
+
+
+def segment(pk):
+    digits = []
+    while pk:
+        pk, digit = divmod(pk, len(DIGITS))
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rjust(SEGMENT_WIDTH, '0')
+
+
+def fill_paths(apps, schema_editor):
+    # Comments archived before threads existed stay thread roots.
+    archived_model = apps.get_model('blog', 'ArchivedComment')
+    batch = []
+    for comment in archived_model.objects.only('pk').iterator(
+            chunk_size=BATCH_SIZE):
+        comment.path = segment(comment.pk)
+        batch.append(comment)
+        if len(batch) == BATCH_SIZE:
+            archived_model.objects.bulk_update(batch, ['path'])
+            batch = []
+    archived_model.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0028_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Уровень вложенности'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.archivedcomment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='path',
+            field=models.CharField(default='', max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-19 18:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0029_archived_comment_threads'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCommentRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полная копия')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+                ('created_at', models.DateTimeField(verbose_name='Заменена')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='blog.archivedcomment', verbose_name='Комментарий')),
+            ],
+            options={
+                'verbose_name': 'Версия архивного комментария',
+                'verbose_name_plural': 'Версии архивных комментариев',
+                'ordering': ('-number',),
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedcommentrevision',
+            constraint=models.UniqueConstraint(fields=('comment', 'number'), name='blog_archived_comment_revision_unique'),
+        ),
+    ]
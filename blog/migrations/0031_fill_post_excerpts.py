@@ -0,0 +1,46 @@
+# Generated by Django 4.2 on 2026-10-19 19:02
+
+from html import unescape
+
+from django.db import migrations
+from django.db.models import Q
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from blog.markup import render_markdown
+
+EXCERPT_WORDS = 20
+EXCERPT_LENGTH = 400
+BATCH_SIZE = 500
+
+
+def fill_excerpts(apps, schema_editor):
+    # Posts saved before 0014 and 0015 have neither HTML nor an excerpt.
+    post_model = apps.get_model('blog', 'Post')
+    posts = post_model.objects.filter(
+        Q(text_html='') | Q(excerpt='')
+    ).order_by('pk').only('pk', 'text')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        for post in batch:
+            post.text_html = render_markdown(post.text)
+            post.excerpt = Truncator(
+                Truncator(unescape(strip_tags(post.text_html))).words(
+                    EXCERPT_WORDS)
+            ).chars(EXCERPT_LENGTH)
+        post_model.objects.bulk_update(batch, ['text_html', 'excerpt'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0030_archived_comment_revisions'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+"""MinHash signatures of texts for near-duplicate detection.
+
+A text is reduced to the set of its words. For ``BANDS * ROWS`` random
+hash functions the signature keeps the smallest hash of any word; two
+texts agree on each entry with probability equal to the Jaccard
+similarity of their word sets. Every band of ``ROWS`` entries is hashed
+into one integer key, and texts that share any band key become candidate
+duplicates (locality-sensitive hashing): with four bands of four rows a
+pair with similarity 0.9 is found with probability 0.99, a pair with
+similarity 0.3 with probability 0.03. An index on the band keys thus finds
+candidates without scanning the table, and they are then verified with
+:func:`similarity`.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+BANDS = 4
+ROWS = 4
+MIN_WORDS = 8
+PRIME = (1 << 31) - 1
+TOKEN_RE = re.compile(r'\w+')
+
+_random = np.random.default_rng(20240601)
+COEFFICIENTS = _random.integers(1, PRIME, size=(2, BANDS * ROWS, 1),
+                                dtype=np.int64)
+
+
+def words(text):
+    return set(TOKEN_RE.findall(text.casefold()))
+
+
+def band_keys(text):
+    """Signed 64-bit band keys of ``text``, ``None`` if it is too short.
+
+    Short texts such as "Спасибо за статью!" are legitimately repeated by
+    many people, so they are not indexed.
+    """
+    tokens = words(text)
+    if len(tokens) < MIN_WORDS:
+        return None
+    hashes = np.array([
+        int.from_bytes(hashlib.blake2b(
+            token.encode(), digest_size=4).digest(), 'big')
+        for token in tokens
+    ], dtype=np.int64)
+    multipliers, offsets = COEFFICIENTS
+    signature = ((multipliers * hashes + offsets) % PRIME).min(axis=1)
+    return [
+        int.from_bytes(hashlib.blake2b(
+            band.tobytes(), digest_size=8).digest(), 'big', signed=True)
+        for band in signature.reshape(BANDS, ROWS)
+    ]
+
+
+def similarity(first, second):
+    """Jaccard similarity of the word sets of two texts."""
+    first, second = words(first), words(second)
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
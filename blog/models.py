@@ -1,18 +1,79 @@
+from html import unescape
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
 
 from core.models import PublishedModel
+from . import minhash, threads
+from .markup import render_markdown
 
 User = get_user_model()
 
+EXCERPT_WORDS = 20
+EXCERPT_LENGTH = 400
+
+
+class TextBandsModel(models.Model):
+    """MinHash band keys of ``text``, see :mod:`blog.minhash`."""
+
+    text_band_0 = models.BigIntegerField(
+        'Полоса MinHash 1', null=True, editable=False, db_index=True)
+    text_band_1 = models.BigIntegerField(
+        'Полоса MinHash 2', null=True, editable=False, db_index=True)
+    text_band_2 = models.BigIntegerField(
+        'Полоса MinHash 3', null=True, editable=False, db_index=True)
+    text_band_3 = models.BigIntegerField(
+        'Полоса MinHash 4', null=True, editable=False, db_index=True)
+
+    BAND_FIELDS = tuple(f'text_band_{band}' for band in range(minhash.BANDS))
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.index_text()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.BAND_FIELDS}
+        super().save(*args, **kwargs)
+
+    def index_text(self):
+        keys = minhash.band_keys(self.text) or [None] * minhash.BANDS
+        for field, key in zip(self.BAND_FIELDS, keys):
+            setattr(self, field, key)
+
+
+class PostCountersModel(PublishedModel):
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Публикаций',
+        default=0,
+        editable=False)
+    last_pub_date = models.DateTimeField(
+        verbose_name='Последняя публикация',
+        null=True,
+        blank=True,
+        editable=False)
+
+    class Meta:
+        abstract = True
+
 
-class Category(PublishedModel):
+class Category(PostCountersModel):
     title = models.CharField(
         max_length=256,
         verbose_name='Заголовок')
     description = models.TextField(verbose_name='Описание')
     slug = models.SlugField(unique=True)
+    search_name = models.CharField(
+        max_length=256,
+        db_index=True,
+        default='',
+        editable=False)
 
     class Meta:
         verbose_name = 'Тематическая категория'
@@ -22,12 +83,21 @@ class Category(PublishedModel):
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.search_name = self.title.casefold()
+        super().save(*args, **kwargs)
+
 
-class Location(PublishedModel):
+class Location(PostCountersModel):
     name = models.CharField(
         max_length=256,
         verbose_name='Название места'
     )
+    search_name = models.CharField(
+        max_length=256,
+        db_index=True,
+        default='',
+        editable=False)
 
     class Meta:
         verbose_name = 'Географическая метка'
@@ -37,13 +107,74 @@ class Location(PublishedModel):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.search_name = self.name.casefold()
+        super().save(*args, **kwargs)
+
+
+class PostQuerySet(models.QuerySet):
+    CARD_FIELDS = (
+        'title',
+        'excerpt',
+        'pub_date',
+        'is_published',
+        'image',
+        'author__username',
+        'location__name',
+        'category__title',
+        'category__slug',
+        'category__is_published',
+        'archived_comments_count',
+    )
+
+    @staticmethod
+    def published_filter():
+        return (
+            models.Q(category__isnull=True)
+            | models.Q(category__is_published=True)
+        ) & models.Q(is_published=True, pub_date__lte=timezone.now())
+
+    def published(self):
+        return self.filter(self.published_filter())
 
-class Post(PublishedModel):
+    def visible_to(self, user):
+        if user.is_anonymous:
+            return self.published()
+        return self.filter(self.published_filter() | models.Q(author=user))
+
+    def with_comment_count(self, archived=True):
+        count = Coalesce(models.Subquery(
+            Comment.objects.filter(post=models.OuterRef('pk')).order_by()
+            .values('post').annotate(count=models.Count('pk'))
+            .values('count'),
+            output_field=models.IntegerField(),
+        ), 0)
+        if archived:
+            count += models.F('archived_comments_count')
+        return self.annotate(comment_count=count)
+
+    def for_cards(self):
+        return self.select_related(
+            'author', 'location', 'category'
+        ).only(*self.CARD_FIELDS).with_comment_count()
+
+
+class Post(PublishedModel, TextBandsModel):
     title = models.CharField(
         max_length=256,
         verbose_name='Заголовок')
     text = models.TextField(
-        verbose_name='Текст')
+        verbose_name='Текст',
+        help_text='Поддерживается разметка Markdown.')
+    text_html = models.TextField(
+        verbose_name='Текст в HTML',
+        blank=True,
+        editable=False)
+    excerpt = models.CharField(
+        verbose_name='Анонс',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False)
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         help_text='Если установить дату и время в будущем — можно делать'
@@ -72,11 +203,28 @@ class Post(PublishedModel):
         blank=True,
         null=True,
         )
+    views_count = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False)
+    archived_comments_count = models.PositiveIntegerField(
+        'Комментариев в архиве',
+        default=0,
+        editable=False)
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'), name='blog_post_pub_date_idx'),
+        )
 
     def __str__(self) -> str:
         return (f'{self.author}: {self.title[:10]}'
@@ -85,8 +233,29 @@ class Post(PublishedModel):
     def save(self, *args, **kwargs):
         if not self.pub_date:
             self.pub_date = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.render_text()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'text_html', 'excerpt'}
         super().save(*args, **kwargs)
 
+    def render_text(self):
+        self.text_html = render_markdown(self.text)
+        self.excerpt = Truncator(
+            Truncator(unescape(strip_tags(self.text_html))).words(
+                EXCERPT_WORDS)
+        ).chars(EXCERPT_LENGTH)
+
+    @property
+    def is_visible(self):
+        return (
+            self.is_published
+            and self.pub_date <= timezone.now()
+            and (self.category is None or self.category.is_published)
+        )
+
     @property
     def days_to_publish(self):
         time = self.pub_date - timezone.now()
@@ -95,7 +264,7 @@ class Post(PublishedModel):
         return -1
 
 
-class Comment(PublishedModel):
+class Comment(PublishedModel, TextBandsModel):
     text = models.TextField('Текст комментария')
     author = models.ForeignKey(
         User,
@@ -116,17 +285,296 @@ class Comment(PublishedModel):
         on_delete=models.CASCADE,
         related_name='comments'
     )
+    parent = models.ForeignKey(
+        'self',
+        verbose_name='Ответ на',
+        null=True,
+        blank=True,
+        # Replies keep their path and stay in place in the thread.
+        on_delete=models.SET_NULL,
+        related_name='replies'
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=255,
+        default='',
+        editable=False)
+    depth = models.PositiveSmallIntegerField(
+        'Уровень вложенности',
+        default=0,
+        editable=False)
 
     class Meta:
         ordering = ('created_at',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'path'), name='blog_comment_thread_idx'),
+        )
 
     def __str__(self):
         return (f'{self.author} к посту {self.post}'
                 f' от {self.created_at.strftime("%Y-%m-%d %H:%M")}')
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.path:
+            return super().save(*args, **kwargs)
+        threads.limit_depth(self)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Comment.objects.filter(pk=self.pk).update(
+                **dict(zip(('path', 'depth'), threads.place(self))))
+
     @property
     def days_from_publish(self):
         time = timezone.now() - self.created_at
         return time.days
+
+
+class ArchiveMonth(models.Model):
+    year = models.PositiveSmallIntegerField('Год')
+    month = models.PositiveSmallIntegerField('Месяц')
+    posts_count = models.PositiveIntegerField('Публикаций', default=0)
+
+    class Meta:
+        verbose_name = 'Месяц архива'
+        verbose_name_plural = 'Архив по месяцам'
+        ordering = ('-year', '-month')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('year', 'month'), name='blog_archive_month_unique'),
+        )
+
+    def __str__(self):
+        return f'{self.month:02}.{self.year}: {self.posts_count}'
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts'
+    )
+    related = models.ForeignKey(
+        Post,
+        verbose_name='Похожая публикация',
+        on_delete=models.CASCADE,
+        related_name='recommended_in'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожая публикация'
+        verbose_name_plural = 'Похожие публикации'
+        ordering = ('post', '-score')
+        indexes = (
+            models.Index(
+                fields=('post', '-score'), name='blog_related_post_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'related'), name='blog_related_unique'),
+        )
+
+    def __str__(self):
+        return f'{self.post_id} → {self.related_id}: {self.score:.3f}'
+
+
+class PostViews(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='daily_views'
+    )
+    day = models.DateField('День')
+    views = models.PositiveIntegerField('Просмотры', default=0)
+
+    class Meta:
+        verbose_name = 'Просмотры за день'
+        verbose_name_plural = 'Просмотры по дням'
+        indexes = (
+            models.Index(fields=('day', 'post'), name='blog_post_views_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'day'), name='blog_post_views_unique'),
+        )
+
+    def __str__(self):
+        return f'{self.post_id} {self.day}: {self.views}'
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='blog_feed_item_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='blog_feed_item_unique'),
+        )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class CommentNotification(models.Model):
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comment_notifications'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Уведомление о комментарии'
+        verbose_name_plural = 'Уведомления о комментариях'
+        indexes = (
+            models.Index(
+                fields=('recipient', 'id'),
+                name='blog_comment_notice_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.recipient_id}: {self.comment_id}'
+
+
+class ArchivedComment(models.Model):
+    """Read-only copy of an old comment moved out of ``blog_comment``.
+
+    Timestamps are copied from the original, so they are plain fields.
+    """
+
+    is_published = models.BooleanField('Опубликовано')
+    created_at = models.DateTimeField('Дата создания')
+    text = models.TextField('Текст комментария')
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    is_edited = models.BooleanField('Отметка о редактировании')
+    date_edited = models.DateTimeField('Время редактирования')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    parent = models.ForeignKey(
+        'self',
+        verbose_name='Ответ на',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    path = models.CharField('Путь в ветке', max_length=255, default='')
+    depth = models.PositiveSmallIntegerField('Уровень вложенности', default=0)
+
+    class Meta:
+        ordering = ('created_at',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return f'{self.author_id} к посту {self.post_id}'
+
+    days_from_publish = Comment.days_from_publish
+
+
+class Revision(models.Model):
+    """A previous version of ``tracked_fields``, see :mod:`blog.revisions`."""
+
+    number = models.PositiveIntegerField('Номер')
+    created_at = models.DateTimeField('Заменена', auto_now_add=True)
+    is_snapshot = models.BooleanField('Полная копия', default=False)
+    data = models.BinaryField('Данные')
+
+    class Meta:
+        abstract = True
+        ordering = ('-number',)
+
+    def __str__(self):
+        return f'Версия {self.number} от {self.created_at:%Y-%m-%d %H:%M}'
+
+
+class PostRevision(Revision):
+    tracked_fields = ('title', 'text')
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Публикация',
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+
+    class Meta(Revision.Meta):
+        verbose_name = 'Версия публикации'
+        verbose_name_plural = 'Версии публикаций'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'number'), name='blog_post_revision_unique'),
+        )
+
+
+class CommentRevision(Revision):
+    tracked_fields = ('text',)
+    comment = models.ForeignKey(
+        Comment,
+        verbose_name='Комментарий',
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+
+    class Meta(Revision.Meta):
+        verbose_name = 'Версия комментария'
+        verbose_name_plural = 'Версии комментариев'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('comment', 'number'),
+                name='blog_comment_revision_unique'),
+        )
+
+
+class ArchivedCommentRevision(Revision):
+    """Revision carried over when its comment was archived."""
+
+    tracked_fields = ('text',)
+    created_at = models.DateTimeField('Заменена')
+    comment = models.ForeignKey(
+        ArchivedComment,
+        verbose_name='Комментарий',
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+
+    class Meta(Revision.Meta):
+        verbose_name = 'Версия архивного комментария'
+        verbose_name_plural = 'Версии архивных комментариев'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('comment', 'number'),
+                name='blog_archived_comment_revision_unique'),
+        )
@@ -0,0 +1,454 @@
+"""Offline "related posts" recommendations.
+
+Published posts are turned into L2-normalised TF-IDF vectors of their
+title and text. The score of two posts is their cosine similarity plus the
+configured boost for a shared category and a shared location. Scores are
+computed in blocks of rows with a sparse matrix product, a block holding
+at most ``RELATED_BLOCK_MEMORY`` bytes of scores, and the best
+``RELATED_POSTS_COUNT`` neighbours of each post are stored in
+:class:`~blog.models.RelatedPost`.
+
+:func:`rebuild` reads the posts in two streaming passes and saves the
+vocabulary, IDF weights and vectors to ``RELATED_MODEL_PATH``.
+:func:`update` vectorises only the new posts and appends them, or marks
+of posts that are no longer published, to a delta file next to it. The
+model is cached per process, which only reads what was appended since,
+and the delta is folded into the model by the next :func:`rebuild`.
+"""
+import fcntl
+import os
+import re
+import tempfile
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from scipy import sparse
+
+from .models import Post, RelatedPost
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+TITLE_WEIGHT = 2
+MIN_DF = 2
+MAX_DF_RATIO = 0.5
+# The sparse product behind a block needs indices and values besides the
+# dense float32 scores.
+BYTES_PER_SCORE = 16
+OFFER_FACTOR = 20
+NO_VALUE = -1
+# A delta record is this header followed by ``nnz`` int32 columns and
+# ``nnz`` float32 weights; ``nnz == REMOVED`` drops the post.
+RECORD_HEAD = np.dtype(
+    [('pk', '<i8'), ('category', '<i8'), ('location', '<i8'), ('nnz', '<i8')])
+REMOVED = -1
+
+_cache = {}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.casefold())
+
+
+def terms(title, text):
+    return Counter(tokenize(title) * TITLE_WEIGHT + tokenize(text))
+
+
+def published_rows(post_ids=None):
+    queryset = Post.objects.published()
+    if post_ids is not None:
+        queryset = queryset.filter(pk__in=post_ids)
+    return queryset.order_by('pk').values_list(
+        'pk', 'title', 'text', 'category_id', 'location_id').iterator(
+            chunk_size=2000)
+
+
+class Model:
+    """Vectors of the published posts, row ``i`` is ``ids[i]``."""
+
+    def __init__(self, vocabulary, idf, ids, matrix, categories, locations):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.ids = ids
+        self.matrix = matrix
+        self.categories = categories
+        self.locations = locations
+
+    @classmethod
+    def fit(cls):
+        """Build the model without keeping the texts in memory."""
+        documents = 0
+        document_frequency = Counter()
+        for _, title, text, _, _ in published_rows():
+            document_frequency.update(terms(title, text).keys())
+            documents += 1
+        max_df = max(MIN_DF, MAX_DF_RATIO * documents)
+        vocabulary = {}
+        idf = array('f')
+        for term, df in document_frequency.items():
+            if MIN_DF <= df <= max_df:
+                vocabulary[term] = len(vocabulary)
+                idf.append(np.log((1 + documents) / (1 + df)) + 1)
+        del document_frequency
+        model = cls(vocabulary, np.array(idf, dtype=np.float32),
+                    None, None, None, None)
+        model.ids, model.matrix, model.categories, model.locations = (
+            model.vectorise(published_rows()))
+        return model
+
+    def vectorise(self, rows):
+        """``ids, matrix, categories, locations`` of ``rows``."""
+        ids, categories, locations = array('q'), array('q'), array('q')
+        indptr, indices, data = array('q', [0]), array('i'), array('f')
+        for pk, title, text, category_id, location_id in rows:
+            ids.append(pk)
+            categories.append(
+                NO_VALUE if category_id is None else category_id)
+            locations.append(
+                NO_VALUE if location_id is None else location_id)
+            weights = {}
+            for term, tf in terms(title, text).items():
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    weights[column] = (1 + np.log(tf)) * self.idf[column]
+            norm = np.sqrt(sum(weight ** 2 for weight in weights.values()))
+            for column, weight in weights.items():
+                indices.append(column)
+                data.append(weight / norm)
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices),
+             np.array(indptr)),
+            shape=(len(ids), len(self.vocabulary)))
+        return (np.array(ids, dtype=np.int64), matrix,
+                np.array(categories, dtype=np.int64),
+                np.array(locations, dtype=np.int64))
+
+    def replaced(self, removed, ids, matrix, categories, locations):
+        """Copy without the rows of ``removed`` and with the new rows."""
+        keep = ~np.isin(self.ids, np.concatenate([removed, ids]))
+        return type(self)(
+            self.vocabulary, self.idf,
+            np.concatenate([self.ids[keep], ids]),
+            sparse.vstack(
+                [self.matrix[keep], matrix], format='csr', dtype=np.float32),
+            np.concatenate([self.categories[keep], categories]),
+            np.concatenate([self.locations[keep], locations]))
+
+    def positions(self, post_ids):
+        return np.flatnonzero(np.isin(self.ids, post_ids))
+
+    def block_rows(self):
+        return max(1, settings.RELATED_BLOCK_MEMORY
+                   // (BYTES_PER_SCORE * max(1, len(self.ids))))
+
+    def blocks(self, positions):
+        step = self.block_rows()
+        for start in range(0, len(positions), step):
+            yield positions[start:start + step]
+
+    def scores(self, positions):
+        """Dense ``len(positions) x len(ids)`` block without self-matches."""
+        block = (self.matrix[positions] @ self.matrix.T).toarray()
+        for values, boost in (
+                (self.categories, settings.RELATED_CATEGORY_BOOST),
+                (self.locations, settings.RELATED_LOCATION_BOOST)):
+            own = values[positions][:, np.newaxis]
+            np.add(block, np.float32(boost), out=block,
+                   where=(values == own) & (own != NO_VALUE))
+        block[np.arange(len(positions)), positions] = 0
+        return block
+
+    def neighbours(self, positions, block, limit):
+        limit = min(limit, block.shape[1] - 1)
+        if limit <= 0:
+            return
+        best = np.argpartition(-block, limit - 1, axis=1)[:, :limit]
+        for row, position in enumerate(positions):
+            for column in best[row]:
+                score = block[row, column]
+                if score > 0:
+                    yield (
+                        int(self.ids[position]), int(self.ids[column]),
+                        float(score))
+
+    def append(self, path, post_ids, ids, matrix, categories, locations):
+        """Record the new rows, and removal of the other ``post_ids``."""
+        removed = np.setdiff1d(np.array(post_ids, dtype=np.int64), ids)
+        chunks = []
+        for pk in removed:
+            chunks.append(np.array(
+                (pk, NO_VALUE, NO_VALUE, REMOVED), RECORD_HEAD).tobytes())
+        for row, pk in enumerate(ids):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            chunks.append(np.array(
+                (pk, categories[row], locations[row], end - start),
+                RECORD_HEAD).tobytes())
+            chunks.append(matrix.indices[start:end].astype('<i4').tobytes())
+            chunks.append(matrix.data[start:end].astype('<f4').tobytes())
+        delta = delta_path(path)
+        with open(delta, 'ab') as stream:
+            stream.write(b''.join(chunks))
+            offset = stream.tell()
+        model = self.replaced(removed, ids, matrix, categories, locations)
+        _cache[path] = (file_key(path), offset, model)
+        return model
+
+    def read_delta(self, path, offset):
+        """Apply the records after ``offset``; return the new offset."""
+        try:
+            with open(path, 'rb') as stream:
+                stream.seek(offset)
+                raw = stream.read()
+        except FileNotFoundError:
+            return offset, self
+        records = {}
+        position = 0
+        # A record cut short by a crashed writer is ignored.
+        while position + RECORD_HEAD.itemsize <= len(raw):
+            head = np.frombuffer(raw, RECORD_HEAD, 1, position)[0]
+            start = position + RECORD_HEAD.itemsize
+            nnz = max(int(head['nnz']), 0)
+            end = start + nnz * 8
+            if end > len(raw):
+                break
+            records.pop(int(head['pk']), None)
+            records[int(head['pk'])] = None if head['nnz'] == REMOVED else (
+                int(head['category']), int(head['location']),
+                np.frombuffer(raw, '<i4', nnz, start),
+                np.frombuffer(raw, '<f4', nnz, start + nnz * 4))
+            position = end
+        if not records:
+            return offset + position, self
+        rows = {pk: row for pk, row in records.items() if row is not None}
+        indptr = np.cumsum([0] + [len(row[2]) for row in rows.values()])
+        matrix = sparse.csr_matrix(
+            (np.concatenate([row[3] for row in rows.values()] or [[]])
+             .astype(np.float32),
+             np.concatenate([row[2] for row in rows.values()] or [[]])
+             .astype(np.int32),
+             indptr),
+            shape=(len(rows), len(self.vocabulary)))
+        return offset + position, self.replaced(
+            np.array(list(records), dtype=np.int64),
+            np.array(list(rows), dtype=np.int64), matrix,
+            np.array([row[0] for row in rows.values()], dtype=np.int64),
+            np.array([row[1] for row in rows.values()], dtype=np.int64))
+
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+                dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp',
+                delete=False) as raw:
+            try:
+                np.savez(
+                    raw,
+                    vocabulary=np.frombuffer(
+                        '\n'.join(self.vocabulary).encode(), dtype=np.uint8),
+                    idf=self.idf, ids=self.ids,
+                    indptr=self.matrix.indptr, indices=self.matrix.indices,
+                    data=self.matrix.data, categories=self.categories,
+                    locations=self.locations)
+            except BaseException:
+                os.unlink(raw.name)
+                raise
+        # The delta goes first: its columns belong to the old vocabulary.
+        try:
+            os.unlink(delta_path(path))
+        except FileNotFoundError:
+            pass
+        os.replace(raw.name, path)
+        _cache[path] = (file_key(path), 0, self)
+
+    @classmethod
+    def load(cls, path):
+        """The saved model, or ``None`` if :func:`rebuild` never ran."""
+        try:
+            key = file_key(path)
+        except FileNotFoundError:
+            return None
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            _, offset, model = cached
+        else:
+            offset, model = 0, cls.read(path)
+        offset, model = model.read_delta(delta_path(path), offset)
+        _cache[path] = (key, offset, model)
+        return model
+
+    @classmethod
+    def read(cls, path):
+        with np.load(path) as stored:
+            text = stored['vocabulary'].tobytes().decode()
+            vocabulary = {
+                term: column
+                for column, term in enumerate(text.split('\n') if text else [])
+            }
+            model = cls(
+                vocabulary, stored['idf'], stored['ids'],
+                sparse.csr_matrix(
+                    (stored['data'], stored['indices'], stored['indptr']),
+                    shape=(len(stored['ids']), len(vocabulary))),
+                stored['categories'], stored['locations'])
+        return model
+
+
+def file_key(path):
+    stat = path.stat()
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def model_path():
+    return Path(settings.RELATED_MODEL_PATH)
+
+
+def delta_path(path):
+    return path.with_name(f'{path.stem}.delta')
+
+
+@contextmanager
+def locked(path):
+    """Serialise writers of the model file across worker processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f'.{path.name}.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def rebuild():
+    """Recompute the neighbours of every published post.
+
+    Each block of posts is committed on its own: its old lists, including
+    those of posts that are no longer published, are replaced in one short
+    transaction, so readers never see a post without recommendations.
+    """
+    path = model_path()
+    with locked(path):
+        model = Model.fit()
+        model.save(path)
+    limit = settings.RELATED_POSTS_COUNT
+    if not len(model.ids):
+        RelatedPost.objects.all().delete()
+        return 0
+    lower = None
+    blocks = list(model.blocks(np.arange(len(model.ids))))
+    for number, positions in enumerate(blocks):
+        upper = (int(model.ids[positions[-1]])
+                 if number < len(blocks) - 1 else None)
+        rows = [
+            RelatedPost(post_id=post_id, related_id=related_id, score=score)
+            for post_id, related_id, score in model.neighbours(
+                positions, model.scores(positions), limit)
+        ]
+        stale = RelatedPost.objects.all()
+        if lower is not None:
+            stale = stale.filter(post_id__gt=lower)
+        if upper is not None:
+            stale = stale.filter(post_id__lte=upper)
+        with transaction.atomic():
+            stale.delete()
+            RelatedPost.objects.bulk_create(rows)
+        lower = upper
+    return len(model.ids)
+
+
+def update(post_ids):
+    """Compute neighbours of new posts and offer them to existing posts.
+
+    Only the new posts are vectorised, with the vocabulary and IDF weights
+    of the last :func:`rebuild`; those of ``post_ids`` that are no longer
+    published are dropped from the model. Existing lists are not
+    recomputed: a new post is only inserted into the lists it beats,
+    replacing their weakest entry. Edited texts and drifting IDF weights
+    are picked up by the next full rebuild.
+    """
+    path = model_path()
+    with locked(path):
+        model = Model.load(path)
+        if model is None:
+            model = Model.fit()
+            model.save(path)
+        else:
+            model = model.append(
+                path, post_ids,
+                *model.vectorise(published_rows(post_ids)))
+    positions = model.positions(post_ids)
+    if not len(positions):
+        return 0
+    limit = settings.RELATED_POSTS_COUNT
+    post_ids = model.ids[positions].tolist()
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=post_ids).delete()
+        RelatedPost.objects.filter(related_id__in=post_ids).delete()
+        for block_positions in model.blocks(positions):
+            block = live_scores(model, model.scores(block_positions), limit)
+            RelatedPost.objects.bulk_create([
+                RelatedPost(post_id=post_id, related_id=related_id,
+                            score=score)
+                for post_id, related_id, score in model.neighbours(
+                    block_positions, block, limit)
+            ])
+            for row, position in enumerate(block_positions):
+                offer(int(model.ids[position]), model.ids, block[row], limit)
+    return len(positions)
+
+
+def live_scores(model, block, limit):
+    """Zero the best columns of posts gone since they were vectorised.
+
+    Rows of removed posts stay in the model until their removal is
+    recorded or the next rebuild, so only the candidates are checked.
+    """
+    width = min(limit * OFFER_FACTOR, block.shape[1])
+    checked = set()
+    while True:
+        best = np.unique(
+            np.argpartition(-block, width - 1, axis=1)[:, :width])
+        candidates = {
+            int(model.ids[column]) for column in best
+            if block[:, column].max() > 0
+        } - checked
+        if not candidates:
+            return block
+        live = set(Post.objects.published().filter(
+            pk__in=candidates).values_list('pk', flat=True))
+        checked |= live
+        if live == candidates:
+            return block
+        block[:, model.positions(list(candidates - live))] = 0
+
+
+def offer(post_id, ids, scores, limit):
+    # Posts far down the list cannot beat anyone's weakest neighbour in
+    # practice, so only the closest ones are checked.
+    columns = np.flatnonzero(scores > 0)
+    if len(columns) > limit * OFFER_FACTOR:
+        columns = columns[np.argpartition(
+            -scores[columns], limit * OFFER_FACTOR)[:limit * OFFER_FACTOR]]
+    candidates = {int(ids[column]): float(scores[column])
+                  for column in columns}
+    stats = RelatedPost.objects.filter(
+        post_id__in=candidates
+    ).values('post_id').annotate(count=Count('pk'), worst=Min('score'))
+    full = {row['post_id']: row['worst'] for row in stats
+            if row['count'] >= limit}
+    accepted = [
+        pk for pk, score in candidates.items()
+        if pk not in full or score > full[pk]
+    ]
+    for pk in accepted:
+        if pk in full:
+            RelatedPost.objects.filter(
+                pk__in=RelatedPost.objects.filter(post_id=pk).order_by(
+                    'score', 'pk').values('pk')[:1]).delete()
+    RelatedPost.objects.bulk_create([
+        RelatedPost(post_id=pk, related_id=post_id, score=candidates[pk])
+        for pk in accepted
+    ], ignore_conflicts=True)
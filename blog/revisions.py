@@ -0,0 +1,190 @@
+"""Revision history of posts and comments.
+
+When a post or comment is saved with a changed title or text, the previous
+version is stored as a :class:`~blog.models.Revision`. Like RCS, revisions
+hold reverse deltas: the data of revision ``n`` turns the next version
+(revision ``n + 1``, or the current object for the newest revision) back
+into version ``n``, copying unchanged line ranges and storing only the new
+lines, compressed with zlib. Recording an edit therefore needs only the old
+and the new text. Every ``REVISION_SNAPSHOT_EVERY``-th revision is a full
+copy instead, so rebuilding any version reads at most that many rows.
+
+Deltas point upwards, so old revisions can be dropped without touching the
+rest; :func:`compact` also thins out old revisions and re-encodes the
+remaining chain.
+"""
+import difflib
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (ArchivedComment, ArchivedCommentRevision, Comment,
+                     CommentRevision, Post, PostRevision)
+
+REVISIONS = {
+    Post: PostRevision,
+    Comment: CommentRevision,
+    ArchivedComment: ArchivedCommentRevision,
+}
+
+
+def content(obj):
+    return {field: getattr(obj, field)
+            for field in REVISIONS[type(obj)].tracked_fields}
+
+
+def diff(base, target):
+    """Operations that rebuild ``target`` from the lines of ``base``.
+
+    ``[start, end]`` copies base lines, a string is inserted as is.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(
+            None, base_lines, target_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(target_lines[j1:j2]))
+    return ops
+
+
+def patch(base, ops):
+    lines = base.splitlines(keepends=True)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(lines[op[0]:op[1]])
+        for op in ops)
+
+
+def pack(value):
+    return zlib.compress(
+        json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def encode(version, newer, is_snapshot):
+    if is_snapshot:
+        return pack(version)
+    return pack({field: diff(newer[field], value)
+                 for field, value in version.items()})
+
+
+def apply(revision, newer):
+    data = unpack(revision.data)
+    if revision.is_snapshot:
+        return data
+    return {field: patch(newer[field], ops) for field, ops in data.items()}
+
+
+def remember(instance, update_fields=None):
+    """Keep the stored version of ``instance`` until it is saved."""
+    instance._revision_base = None
+    fields = REVISIONS[type(instance)].tracked_fields
+    if instance._state.adding or (
+            update_fields is not None and not set(fields) & update_fields):
+        return
+    instance._revision_base = type(instance).objects.filter(
+        pk=instance.pk).values(*fields).first()
+
+
+def record(instance):
+    """Store the version remembered before the save if it has changed."""
+    old = getattr(instance, '_revision_base', None)
+    instance._revision_base = None
+    if old is None or old == content(instance):
+        return None
+    recent = list(instance.revisions.order_by('-number').values_list(
+        'number', 'is_snapshot')[:settings.REVISION_SNAPSHOT_EVERY - 1])
+    is_snapshot = (
+        len(recent) == settings.REVISION_SNAPSHOT_EVERY - 1
+        and not any(snapshot for _, snapshot in recent))
+    return instance.revisions.create(
+        number=recent[0][0] + 1 if recent else 1,
+        is_snapshot=is_snapshot,
+        data=encode(old, content(instance), is_snapshot),
+    )
+
+
+def version(owner, revision):
+    """Rebuild the fields of ``owner`` as they were in ``revision``."""
+    chain = []
+    for item in owner.revisions.filter(
+        number__gte=revision.number
+    ).order_by('number').iterator(
+            chunk_size=settings.REVISION_SNAPSHOT_EVERY):
+        chain.append(item)
+        if item.is_snapshot:
+            break
+    value = content(owner)
+    for item in reversed(chain):
+        value = apply(item, value)
+    return value
+
+
+def diff_lines(old, new):
+    """``(kind, line)`` pairs of a unified diff for the templates."""
+    kinds = {'+': 'added', '-': 'removed', ' ': 'context', '@': 'hunk'}
+    return [
+        (kinds[line[0]], line[1:] if line[0] != '@' else line)
+        for line in difflib.unified_diff(
+            old.splitlines(), new.splitlines(), lineterm='', n=2)
+        if not line.startswith(('---', '+++'))
+    ]
+
+
+def compact(owner, now=None):
+    """Apply the retention settings to the revisions of ``owner``.
+
+    Revisions older than ``REVISION_RETENTION_DAYS`` and all but the
+    newest ``REVISION_MAX_COUNT`` are deleted, and of revisions older than
+    ``REVISION_THIN_AFTER_DAYS`` only the last one of every day is kept.
+    Returns the number of deleted revisions.
+    """
+    now = now or timezone.now()
+    expire = now - timedelta(days=settings.REVISION_RETENTION_DAYS)
+    thin = now - timedelta(days=settings.REVISION_THIN_AFTER_DAYS)
+    revisions = list(owner.revisions.order_by('-number'))
+    keep = []
+    days = set()
+    for revision in revisions:
+        if (revision.created_at < expire
+                or len(keep) == settings.REVISION_MAX_COUNT):
+            break
+        if revision.created_at < thin:
+            day = timezone.localdate(revision.created_at)
+            if day in days:
+                continue
+            days.add(day)
+        keep.append(revision)
+    if len(keep) == len(revisions):
+        return 0
+    with transaction.atomic():
+        if keep != revisions[:len(keep)]:
+            rewrite(owner, revisions, keep)
+        owner.revisions.exclude(pk__in=[item.pk for item in keep]).delete()
+    return len(revisions) - len(keep)
+
+
+def rewrite(owner, revisions, keep):
+    """Re-encode the ``keep`` subset of ``revisions`` as a fresh chain."""
+    versions = {}
+    value = content(owner)
+    for revision in revisions:
+        value = apply(revision, value)
+        versions[revision.pk] = value
+    newer = content(owner)
+    every = settings.REVISION_SNAPSHOT_EVERY
+    for position, revision in enumerate(keep):
+        revision.is_snapshot = position % every == every - 1
+        revision.data = encode(
+            versions[revision.pk], newer, revision.is_snapshot)
+        newer = versions[revision.pk]
+    REVISIONS[type(owner)].objects.bulk_update(keep, ('is_snapshot', 'data'))
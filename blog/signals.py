@@ -0,0 +1,202 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import holes
+from users.models import Follow
+from . import (archive, autocomplete, counters, feed, hits, revisions,
+               sitemaps, tasks)
+from .models import (Category, Comment, CommentNotification, FeedItem,
+                     Location, Post)
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    instance._old_state = counters.HIDDEN
+    if raw or instance._state.adding:
+        return
+    old = Post.objects.filter(pk=instance.pk).select_related(
+        'category'
+    ).only(
+        'is_published', 'pub_date', 'category_id', 'location_id',
+        'category__is_published',
+    ).first()
+    if old is not None:
+        instance._old_state = counters.get_state(old)
+
+
+def apply_transition(old, new):
+    counters.apply_transition(old, new)
+    archive.apply_transition(old, new)
+
+
+@receiver(post_save, sender=Post)
+def track_visibility_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_old_state', counters.HIDDEN)
+    new = counters.get_state(instance)
+    apply_transition(old, new)
+    if new.visible and not old.visible:
+        tasks.update_related_posts.enqueue(instance.pk)
+        tasks.fan_out_post.enqueue(instance.pk)
+    elif old.visible and not new.visible:
+        tasks.retract_post.enqueue(instance.pk)
+    elif new.visible and old.pub_date != new.pub_date:
+        FeedItem.objects.filter(post=instance).update(pub_date=new.pub_date)
+    if old.visible or new.visible:
+        sitemaps.schedule('posts', instance.pk)
+        if old.visible != new.visible:
+            sitemaps.schedule('authors', instance.author_id)
+    if not new.visible and is_scheduled(instance):
+        tasks.publish_scheduled.enqueue(
+            instance.pk, instance.pub_date.isoformat(),
+            run_after=instance.pub_date,
+            idempotency_key=(
+                f'publish-{instance.pk}-{instance.pub_date.isoformat()}'),
+        )
+
+
+def is_scheduled(post):
+    return (
+        post.is_published
+        and post.pub_date > timezone.now()
+        and (post.category_id is None or post.category.is_published)
+    )
+
+
+@receiver(post_delete, sender=Post)
+def track_visibility_on_delete(sender, instance, **kwargs):
+    old = counters.get_state(instance)
+    apply_transition(old, counters.HIDDEN)
+    if old.visible:
+        tasks.retract_post.enqueue(instance.pk)
+        sitemaps.schedule('posts', instance.pk)
+        sitemaps.schedule('authors', instance.author_id)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, raw=False, **kwargs):
+    instance._was_published = None
+    if raw or instance._state.adding:
+        return
+    instance._was_published = Category.objects.filter(
+        pk=instance.pk).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def recount_on_category_publishing(sender, instance, raw=False, **kwargs):
+    was_published = getattr(instance, '_was_published', None)
+    if raw or was_published in (None, instance.is_published):
+        return
+    tasks.recount_category.enqueue(instance.pk)
+    tasks.rebuild_sitemaps.enqueue(['posts', 'authors'])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_category_sitemap(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sitemaps.schedule('categories', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def update_author_sitemap(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    # Logins only touch last_login; profile edits may change the username.
+    if raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    sitemaps.schedule('authors', instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def clear_autocomplete_cache(sender, **kwargs):
+    autocomplete.cache.clear()
+
+
+@receiver(post_delete, sender=Follow)
+def count_removed_follower(sender, instance, **kwargs):
+    # Follows also cascade away with either user.
+    feed.follower_removed(instance.author_id)
+
+
+def invalidate_pages(*groups):
+    # Pages rendered before the commit would otherwise be cached under the
+    # new version with the old rows.
+    transaction.on_commit(lambda: holes.invalidate(*groups))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    invalidate_pages('posts', f'post:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    # Comment counts on the post cards catch up when the lists expire.
+    invalidate_pages(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Location)
+def invalidate_all_pages(sender, **kwargs):
+    # Names and links of categories and locations are on every page.
+    invalidate_pages()
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def remember_revision_base(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    if not raw:
+        revisions.remember(instance, update_fields)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def record_revision(sender, instance, raw=False, **kwargs):
+    if not raw:
+        revisions.record(instance)
+
+
+@receiver(request_finished)
+def flush_post_views(sender, **kwargs):
+    hits.buffer.flush_if_due()
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_state(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    instance._was_published = None
+    if raw or instance._state.adding or (
+            update_fields is not None and 'is_published' not in update_fields):
+        return
+    instance._was_published = Comment.objects.filter(
+        pk=instance.pk).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def notify_post_author(sender, instance, created, raw=False, **kwargs):
+    # Queued comments are announced once a moderator publishes them.
+    published = created or getattr(instance, '_was_published', None) is False
+    if raw or not published or not instance.is_published:
+        return
+    recipients = {instance.post.author_id}
+    if instance.parent_id is not None:
+        recipients.add(instance.parent.author_id)
+    CommentNotification.objects.bulk_create([
+        CommentNotification(recipient_id=recipient_id, comment=instance)
+        for recipient_id in recipients - {instance.author_id}
+    ])
@@ -0,0 +1,186 @@
+"""Segmented XML sitemaps written as static files.
+
+Every section (posts, categories, author profiles) is split into
+segments by primary key: segment ``n`` lists the visible objects with
+``n * SITEMAP_SEGMENT_SIZE <= pk < (n + 1) * SITEMAP_SEGMENT_SIZE``, so it
+never exceeds the protocol limit of 50 000 URLs and a change to one
+object only touches one file. Segments are gzipped into
+``SITEMAP_ROOT`` next to the ``sitemap.xml`` index and are served by the
+web server like media files.
+
+Signals call :func:`schedule`; changes within ``SITEMAP_DELAY`` seconds
+are coalesced into one rebuild of each affected segment.
+"""
+import gzip
+import io
+import itertools
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+from django.urls import reverse
+from django.utils import timezone
+
+from . import tasks
+from .models import Category, Post
+
+User = get_user_model()
+
+CHUNK_SIZE = 2000
+INDEX_NAME = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+class Section(NamedTuple):
+    queryset: Callable
+    url_name: str
+    url_field: str
+    lastmod_field: Optional[str] = None
+
+
+def authors():
+    return User.objects.filter(is_active=True).filter(Exists(
+        Post.objects.published().filter(author=OuterRef('pk'))))
+
+
+SECTIONS = {
+    'posts': Section(
+        lambda: Post.objects.published(), 'blog:post_detail', 'pk',
+        'updated_at'),
+    'categories': Section(
+        lambda: Category.objects.filter(is_published=True),
+        'blog:category_posts', 'slug'),
+    'authors': Section(authors, 'users:profile', 'username'),
+}
+
+
+def segment_number(pk):
+    return pk // settings.SITEMAP_SEGMENT_SIZE
+
+
+def segment_path(section, number):
+    return Path(settings.SITEMAP_ROOT) / f'{section}-{number}.xml.gz'
+
+
+def absolute_url(path):
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def rows(name, number=None):
+    """Yield ``(pk, url, lastmod)`` of a section in primary key order."""
+    section = SECTIONS[name]
+    queryset = section.queryset().order_by('pk')
+    if number is not None:
+        size = settings.SITEMAP_SEGMENT_SIZE
+        queryset = queryset.filter(
+            pk__gte=number * size, pk__lt=(number + 1) * size)
+    fields = ['pk', section.url_field]
+    if section.lastmod_field:
+        fields.append(section.lastmod_field)
+    for pk, key, *lastmod in queryset.values_list(*fields).iterator(
+            chunk_size=CHUNK_SIZE):
+        url = absolute_url(reverse(section.url_name, args=(key,)))
+        yield pk, url, lastmod[0] if lastmod else None
+
+
+def write_atomic(path, write):
+    """Replace ``path`` with a file written through a private temp file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp',
+            delete=False) as raw:
+        try:
+            write(raw)
+            os.chmod(raw.name, 0o644)
+        except BaseException:
+            os.unlink(raw.name)
+            raise
+    os.replace(raw.name, path)
+
+
+def write_segment(section, number, entries):
+    """Write the segment file; remove it when ``entries`` is empty."""
+    path = segment_path(section, number)
+    entries = iter(entries)
+    first = next(entries, None)
+    if first is None:
+        path.unlink(missing_ok=True)
+        return 0
+    count = 0
+
+    def write(raw):
+        nonlocal count
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as compressed:
+            stream = io.TextIOWrapper(compressed, encoding='utf-8')
+            stream.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                         f'<urlset xmlns="{XMLNS}">\n')
+            for _, url, lastmod in itertools.chain((first,), entries):
+                stream.write(f'<url><loc>{escape(url)}</loc>')
+                if lastmod is not None:
+                    stream.write(f'<lastmod>{lastmod.isoformat()}</lastmod>')
+                stream.write('</url>\n')
+                count += 1
+            stream.write('</urlset>\n')
+            stream.flush()
+            stream.detach()
+
+    write_atomic(path, write)
+    return count
+
+
+def write_index():
+    root = Path(settings.SITEMAP_ROOT)
+    segments = sorted(root.glob('*.xml.gz')) if root.exists() else []
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+             f'<sitemapindex xmlns="{XMLNS}">\n']
+    for path in segments:
+        url = absolute_url(f'/{settings.SITEMAP_URL}{path.name}')
+        lastmod = datetime.fromtimestamp(
+            path.stat().st_mtime, dt_timezone.utc).isoformat()
+        lines.append(f'<sitemap><loc>{escape(url)}</loc>'
+                     f'<lastmod>{lastmod}</lastmod></sitemap>\n')
+    lines.append('</sitemapindex>\n')
+    write_atomic(root / INDEX_NAME,
+                 lambda raw: raw.write(''.join(lines).encode()))
+    return len(segments)
+
+
+def rebuild_segment(section, number):
+    count = write_segment(section, number, rows(section, number))
+    write_index()
+    return count
+
+
+def rebuild(sections=None):
+    """Regenerate whole sections in one streaming pass over each table."""
+    total = 0
+    for section in sections or SECTIONS:
+        written = set()
+        for number, entries in itertools.groupby(
+                rows(section), key=lambda row: segment_number(row[0])):
+            total += write_segment(section, number, entries)
+            written.add(segment_path(section, number))
+        root = Path(settings.SITEMAP_ROOT)
+        for path in root.glob(f'{section}-*.xml.gz'):
+            if path not in written:
+                path.unlink()
+    write_index()
+    return total
+
+
+def schedule(section, pk):
+    """Rebuild the segment holding ``pk`` at the end of the current window."""
+    delay = settings.SITEMAP_DELAY
+    number = segment_number(pk)
+    window_end = (int(timezone.now().timestamp()) // delay + 1) * delay
+    tasks.rebuild_sitemap_segment.enqueue(
+        section, number,
+        run_after=datetime.fromtimestamp(window_end, dt_timezone.utc),
+        idempotency_key=f'sitemap-{section}-{number}-{window_end}',
+    )
@@ -0,0 +1,92 @@
+from core.tasks import task
+from . import archive, counters, feed, related, sitemaps
+from .models import Category, FeedItem, Location, Post
+
+
+@task
+def recount_category(category_id):
+    counters.recount(Category, 'category', [category_id])
+    counters.recount(Location, 'location', list(
+        Post.objects.filter(category_id=category_id, location__isnull=False)
+        .order_by().values_list('location_id', flat=True).distinct()
+    ))
+    archive.rebuild()
+
+
+@task
+def recount_hidden_posts(author_id, category_ids, location_ids, months):
+    """Catch up with posts of a deleted user hidden by a bulk update."""
+    counters.recount(Category, 'category', category_ids)
+    counters.recount(Location, 'location', location_ids)
+    for key in months:
+        archive.recount(key)
+    FeedItem.objects.filter(post__author_id=author_id).delete()
+
+
+@task
+def reconcile_counters():
+    counters.recount(Category, 'category')
+    counters.recount(Location, 'location')
+    archive.rebuild()
+
+
+@task
+def update_related_posts(post_id):
+    related.update([post_id])
+
+
+@task
+def fan_out_post(post_id):
+    feed.fan_out(post_id)
+
+
+@task
+def retract_post(post_id):
+    if not Post.objects.published().filter(pk=post_id).exists():
+        FeedItem.objects.filter(post_id=post_id).delete()
+        related.update([post_id])
+
+
+@task
+def backfill_feed(user_id, author_id):
+    feed.backfill(user_id, author_id)
+
+
+@task
+def backfill_followers_feeds(author_id):
+    feed.backfill_followers(author_id)
+
+
+@task
+def publish_scheduled(post_id, pub_date):
+    """Count a post whose scheduled ``pub_date`` has arrived.
+
+    Recounting instead of applying a +1 keeps the task safe to retry and
+    to run after a manual reconcile.
+    """
+    post = Post.objects.filter(pk=post_id).select_related('category').first()
+    if post is None or post.pub_date.isoformat() != pub_date:
+        return
+    state = counters.get_state(post)
+    if not state.visible:
+        return
+    if state.category_id is not None:
+        counters.recount(Category, 'category', [state.category_id])
+    if state.location_id is not None:
+        counters.recount(Location, 'location', [state.location_id])
+    archive.recount(archive.month_key(state.pub_date))
+    feed.fan_out(post_id)
+    related.update([post_id])
+    sitemaps.rebuild_segment('posts', sitemaps.segment_number(post_id))
+    sitemaps.rebuild_segment(
+        'authors', sitemaps.segment_number(post.author_id))
+
+
+@task
+def rebuild_sitemap_segment(section, number):
+    sitemaps.rebuild_segment(section, number)
+
+
+@task
+def rebuild_sitemaps(sections=None):
+    sitemaps.rebuild(sections)
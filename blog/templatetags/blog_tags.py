@@ -0,0 +1,10 @@
+from django import template
+
+from blog.models import ArchiveMonth
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/archive_sidebar.html')
+def archive_sidebar():
+    return {'months': ArchiveMonth.objects.filter(posts_count__gt=0)}
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import revisions
+from blog.models import ArchivedComment, Comment, Post
+
+User = get_user_model()
+
+
+class TestCommentArchival(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.old_post, cls.active_post = (
+            Post.objects.create(title='title', text='text', author=cls.author)
+            for _ in range(2)
+        )
+        old = timezone.now() - timedelta(days=400)
+        for post in (cls.old_post, cls.active_post):
+            for text in ('первый', 'второй'):
+                Comment.objects.create(post=post, author=cls.author, text=text)
+        Comment.objects.update(created_at=old)
+        cls.fresh = Comment.objects.create(
+            post=cls.active_post, author=cls.author, text='fresh')
+
+    def archive(self):
+        call_command('archive_comments', batch_size=1, stdout=StringIO())
+
+    def test_only_inactive_posts_are_archived(self):
+        self.archive()
+        self.assertFalse(Comment.objects.filter(post=self.old_post).exists())
+        self.assertEqual(Comment.objects.filter(
+            post=self.active_post).count(), 3)
+        archived = ArchivedComment.objects.filter(post=self.old_post)
+        self.assertEqual(
+            [comment.text for comment in archived], ['первый', 'второй'])
+        self.old_post.refresh_from_db()
+        self.assertEqual(self.old_post.archived_comments_count, 2)
+        self.archive()
+        self.assertEqual(ArchivedComment.objects.count(), 2)
+
+    def test_revisions_are_kept(self):
+        comment = Comment.objects.get(post=self.old_post, text='первый')
+        for text in ('правка', 'вторая правка'):
+            comment.text = text
+            comment.save()
+        Comment.objects.filter(pk=comment.pk).update(
+            created_at=timezone.now() - timedelta(days=400))
+        created = list(comment.revisions.values_list('created_at', flat=True))
+        self.archive()
+        archived = ArchivedComment.objects.get(pk=comment.pk)
+        self.assertEqual(
+            list(archived.revisions.values_list('created_at', flat=True)),
+            created)
+        self.assertEqual(
+            [revisions.version(archived, revision)['text']
+             for revision in archived.revisions.all()],
+            ['правка', 'первый'])
+
+    def test_cards_count_archived_comments(self):
+        self.archive()
+        post = Post.objects.for_cards().get(pk=self.old_post.pk)
+        self.assertEqual(post.comment_count, 2)
+
+    def test_detail_loads_archive_on_demand(self):
+        self.archive()
+        url = reverse('blog:post_detail', args=(self.old_post.pk,))
+        response = self.client.get(url)
+        self.assertIsNone(response.context['archived_comments'])
+        self.assertNotContains(response, 'второй')
+        response = self.client.get(url, {'archived': 1})
+        self.assertContains(response, 'второй')
+
+    def test_threads_are_kept(self):
+        first = Comment.objects.get(post=self.old_post, text='первый')
+        reply = Comment.objects.create(
+            post=self.old_post, author=self.author, parent=first,
+            text='ответ')
+        Comment.objects.filter(pk=reply.pk).update(
+            created_at=timezone.now() - timedelta(days=400))
+        self.archive()
+        archived = ArchivedComment.objects.get(pk=reply.pk)
+        self.assertEqual(
+            (archived.parent_id, archived.path, archived.depth),
+            (first.pk, reply.path, 1))
+        response = self.client.get(
+            reverse('blog:post_detail', args=(self.old_post.pk,)),
+            {'archived': 1})
+        self.assertEqual(
+            [(comment.text, comment.indent)
+             for comment in response.context['archived_comments']],
+            [('первый', 0), ('ответ', 1), ('второй', 0)])
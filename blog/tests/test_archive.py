@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import ArchiveMonth, Category, Post
+
+User = get_user_model()
+
+
+class TestArchive(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+        cls.march = timezone.make_aware(datetime(2023, 3, 15, 12))
+
+    def create_post(self, **kwargs):
+        fields = {
+            'title': 'title', 'text': 'text', 'author': self.author,
+            'category': self.category, 'pub_date': self.march,
+        }
+        fields.update(kwargs)
+        return Post.objects.create(**fields)
+
+    def histogram(self):
+        return list(ArchiveMonth.objects.filter(posts_count__gt=0).values_list(
+            'year', 'month', 'posts_count'))
+
+    def test_histogram_follows_posts(self):
+        post = self.create_post()
+        self.create_post()
+        self.assertEqual(self.histogram(), [(2023, 3, 2)])
+        post.pub_date = self.march + timedelta(days=30)
+        post.save()
+        self.assertEqual(self.histogram(), [(2023, 4, 1), (2023, 3, 1)])
+        post.is_published = False
+        post.save()
+        self.assertEqual(self.histogram(), [(2023, 3, 1)])
+
+    def test_rebuild(self):
+        self.create_post()
+        self.create_post(pub_date=self.march.replace(year=2022))
+        ArchiveMonth.objects.all().delete()
+        call_command('rebuild_archive', stdout=StringIO())
+        self.assertEqual(self.histogram(), [(2023, 3, 1), (2022, 3, 1)])
+
+    def test_month_pages(self):
+        posts = [
+            self.create_post(pub_date=self.march + timedelta(minutes=i))
+            for i in range(settings.POSTS_ON_PAGE + 2)
+        ]
+        self.create_post(pub_date=self.march + timedelta(days=30))
+        url = reverse('blog:archive_month', args=(2023, 3))
+        response = self.client.get(url)
+        first_page = response.context['posts']
+        self.assertEqual(len(first_page), settings.POSTS_ON_PAGE)
+        self.assertEqual(first_page[0], posts[-1])
+        response = self.client.get(
+            url, {'before': response.context['next_before']})
+        self.assertEqual(list(response.context['posts']), posts[1::-1])
+        self.assertIsNone(response.context['next_before'])
+        response = self.client.get(reverse('blog:archive_year', args=(2023,)))
+        self.assertEqual(
+            [(m.month, m.posts_count) for m in response.context['months']],
+            [(4, 1), (3, settings.POSTS_ON_PAGE + 2)])
+
+    def test_invalid_month(self):
+        response = self.client.get(
+            reverse('blog:archive_month', args=(2023, 13)))
+        self.assertEqual(response.status_code, 404)
+        for args in ((1,), (9999,), (9999, 12), (99999,)):
+            response = self.client.get(reverse(
+                'blog:archive_month' if len(args) == 2
+                else 'blog:archive_year', args=args))
+            self.assertEqual(response.status_code, 404)
+
+    def test_invalid_cursor(self):
+        url = reverse('blog:archive_month', args=(2023, 3))
+        for before in ('9' * 30, '²', '-1'):
+            response = self.client.get(url, {'before': before})
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,131 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from blog import archival, revisions, threads
+from blog.models import (ArchivedComment, ArchiveMonth, Category, Comment,
+                         Location, Post)
+
+User = get_user_model()
+
+
+class TestJsonlExportImport(TestCase):
+    POSTS_COUNT = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+        cls.location = Location.objects.create(name='place')
+        cls.posts = Post.objects.bulk_create(
+            Post(
+                title=f'title {index}', text='text',
+                author=cls.author, category=cls.category,
+                location=cls.location,
+                pub_date=timezone.now() - timedelta(days=index)
+            ) for index in range(cls.POSTS_COUNT)
+        )
+        cls.comment = Comment.objects.create(
+            text='comment', author=cls.author, post=cls.posts[0])
+        Comment.objects.filter(pk=cls.comment.pk).update(
+            created_at=timezone.now() - timedelta(days=30))
+        archived = Comment.objects.create(
+            text='old', author=cls.author, post=cls.posts[1])
+        archived.text = 'archived'
+        archived.save()
+        archival.archive_posts([cls.posts[1].pk])
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / 'dump.jsonl.gz')
+
+    def test_export_import_round_trip(self):
+        comment_created = Comment.objects.get().created_at
+        call_command(
+            'export_jsonl', self.path, batch_size=2, stderr=StringIO())
+        User.objects.all().delete()
+        Category.objects.all().delete()
+        Location.objects.all().delete()
+        self.assertEqual(Post.objects.count(), 0)
+        call_command(
+            'import_jsonl', self.path, batch_size=2, stderr=StringIO())
+        self.assertEqual(User.objects.get().username, 'author')
+        self.assertEqual(Post.objects.count(), self.POSTS_COUNT)
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.assertEqual(post.category, self.category)
+        self.assertEqual(post.location, self.location)
+        self.assertEqual(post.pub_date, self.posts[0].pub_date)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post, post)
+        self.assertEqual(comment.created_at, comment_created)
+        archived = ArchivedComment.objects.get()
+        self.assertEqual(archived.post_id, self.posts[1].pk)
+        self.assertEqual(archived.text, 'archived')
+        self.assertEqual(
+            revisions.version(archived, archived.revisions.get()),
+            {'text': 'old'})
+
+    def test_import_rebuilds_derived_data(self):
+        path = Path(self.path).with_suffix('')
+        created = '2023-03-05T12:00:00+00:00'
+        comment = {'author_id': 100, 'post_id': 100, 'created_at': created,
+                   'date_edited': created}
+        records = [
+            {'model': 'users.customuser', 'pk': 100,
+             'fields': {'username': 'imported', 'password': ''}},
+            {'model': 'blog.post', 'pk': 100, 'fields': {
+                'title': 'title', 'author_id': 100,
+                'text': ' '.join(f'слово{number}' for number in range(30)),
+                'pub_date': created, 'created_at': created,
+                'updated_at': created}},
+            {'model': 'blog.comment', 'pk': 100,
+             'fields': {'text': 'root', **comment}},
+            {'model': 'blog.comment', 'pk': 101,
+             'fields': {'text': 'reply', 'parent_id': 100, **comment}},
+        ]
+        path.write_text(''.join(json.dumps(record) + '\n'
+                                for record in records))
+        call_command('import_jsonl', str(path), stderr=StringIO())
+        root, reply = Comment.objects.filter(pk__in=(100, 101)).order_by('pk')
+        self.assertEqual(reply.path, root.path + threads.segment(reply.pk))
+        self.assertEqual(reply.depth, 1)
+        self.assertIsNotNone(Post.objects.get(pk=100).text_band_0)
+        self.assertEqual(ArchiveMonth.objects.get(
+            year=2023, month=3).posts_count, 1)
+
+    def test_import_ignore_existing(self):
+        call_command('export_jsonl', self.path, models=['blog.post'],
+                     stderr=StringIO())
+        call_command('import_jsonl', self.path, ignore_existing=True,
+                     stderr=StringIO())
+        self.assertEqual(Post.objects.count(), self.POSTS_COUNT)
+
+
+class TestRenderPosts(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        Post.objects.bulk_create(
+            Post(title=f'title {index}', text=f'*text {index}*',
+                 author=cls.author)
+            for index in range(3)
+        )
+
+    def test_backfill_renders_missing_html(self):
+        call_command('render_posts', batch_size=2, stdout=StringIO(),
+                     stderr=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertEqual(
+            Post.objects.order_by('pk').first().text_html,
+            '<p><em>text 0</em></p>')
@@ -7,7 +7,8 @@ from django.conf import settings
 from django.urls import reverse
 from django.utils import timezone
 
-from blog.models import Category, Comment, Post
+from blog import autocomplete
+from blog.models import Category, Comment, Location, Post
 
 User = get_user_model()
 
@@ -135,3 +136,111 @@ class TestContent(TestCase):
                 url = reverse('blog:post_detail', kwargs=kwargs)
                 response = self.client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+
+class TestPostMarkdown(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(
+            title='title',
+            text='**bold**\n\n<script>alert(1)</script>',
+            author=cls.author,
+        )
+
+    def test_text_rendered_and_sanitised_on_save(self):
+        self.assertIn('<strong>bold</strong>', self.post.text_html)
+        self.assertNotIn('<script>', self.post.text_html)
+
+    def test_detail_page_serves_stored_html(self):
+        Post.objects.filter(pk=self.post.pk).update(text_html='<p>stored</p>')
+        response = self.client.get(
+            reverse('blog:post_detail', kwargs={'pk': self.post.pk}))
+        self.assertContains(response, '<p>stored</p>', html=True)
+
+
+class TestPostCards(TestCase):
+    LONG_TEXT = ' '.join(f'word{index}' for index in range(1000))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+        cls.post = Post.objects.create(
+            title='title', text=cls.LONG_TEXT, author=cls.author,
+            category=cls.category)
+        Comment.objects.create(text='text', author=cls.author, post=cls.post)
+
+    def test_excerpt_maintained_on_save(self):
+        self.assertEqual(
+            self.post.excerpt,
+            ' '.join(self.LONG_TEXT.split()[:20]) + '…')
+
+    def test_list_views_defer_post_text(self):
+        urls = (
+            reverse('blog:index'),
+            reverse('blog:category_posts', args=(self.category.slug,)),
+            reverse('users:profile', args=(self.author.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                post = response.context['page_obj'].object_list[0]
+                self.assertTrue(
+                    {'text', 'text_html'} <= post.get_deferred_fields())
+                self.assertEqual(post.comment_count, 1)
+                self.assertContains(response, self.post.excerpt)
+                self.assertNotContains(response, 'word999')
+
+
+class TestAutocomplete(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        Location.objects.bulk_create(
+            Location(name=f'Место {index}', search_name=f'место {index}')
+            for index in range(30)
+        )
+        cls.moscow = Location.objects.create(name='Москва')
+        cls.hidden = Location.objects.create(
+            name='Мурманск', is_published=False)
+
+    def setUp(self):
+        autocomplete.cache.clear()
+
+    def test_prefix_search_is_case_insensitive(self):
+        response = self.client.get(
+            reverse('blog:autocomplete', args=('locations',)), {'q': 'мОс'})
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.moscow.pk, 'text': 'Москва'}])
+
+    def test_results_limited_and_published_only(self):
+        response = self.client.get(
+            reverse('blog:autocomplete', args=('locations',)), {'q': 'м'})
+        results = response.json()['results']
+        self.assertEqual(len(results), settings.AUTOCOMPLETE_LIMIT)
+        self.assertNotIn(self.hidden.pk, [item['id'] for item in results])
+
+    def test_cache_cleared_on_save(self):
+        url = reverse('blog:autocomplete', args=('locations',))
+        self.client.get(url, {'q': 'мурм'})
+        self.hidden.is_published = True
+        self.hidden.save()
+        response = self.client.get(url, {'q': 'мурм'})
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_post_form_renders_only_selected_option(self):
+        post = Post.objects.create(
+            title='title', text='text', author=self.author,
+            location=self.moscow)
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('blog:post_edit', args=(post.pk,)))
+        # Empty and chosen location, empty category.
+        self.assertContains(response, '<option value=', count=3)
+        self.assertContains(response, 'Москва')
+        self.assertNotContains(response, 'Место 1')
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Location, Post
+
+User = get_user_model()
+
+
+class TestPostCounters(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+        cls.other_category = Category.objects.create(
+            title='other', description='desc', slug='other'
+        )
+        cls.location = Location.objects.create(name='place')
+
+    def create_post(self, **kwargs):
+        fields = {
+            'title': 'title', 'text': 'text', 'author': self.author,
+            'category': self.category, 'location': self.location,
+            'pub_date': timezone.now() - timedelta(hours=1),
+        }
+        fields.update(kwargs)
+        return Post.objects.create(**fields)
+
+    def assertCounters(self, obj, count, last_pub_date):
+        obj.refresh_from_db()
+        self.assertEqual(
+            (obj.posts_count, obj.last_pub_date), (count, last_pub_date))
+
+    def test_create_and_delete(self):
+        first = self.create_post()
+        second = self.create_post(pub_date=first.pub_date - timedelta(days=1))
+        self.assertCounters(self.category, 2, first.pub_date)
+        self.assertCounters(self.location, 2, first.pub_date)
+        first.delete()
+        self.assertCounters(self.category, 1, second.pub_date)
+        second.delete()
+        self.assertCounters(self.location, 0, None)
+
+    def test_hidden_and_future_posts_not_counted(self):
+        self.create_post(is_published=False)
+        self.create_post(pub_date=timezone.now() + timedelta(days=1))
+        self.assertCounters(self.category, 0, None)
+
+    def test_publish_transitions_and_category_move(self):
+        post = self.create_post(is_published=False)
+        post.is_published = True
+        post.save()
+        self.assertCounters(self.category, 1, post.pub_date)
+        post.category = self.other_category
+        post.save()
+        self.assertCounters(self.category, 0, None)
+        self.assertCounters(self.other_category, 1, post.pub_date)
+        self.assertCounters(self.location, 1, post.pub_date)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_category_unpublishing_recounts_locations(self):
+        self.create_post()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.is_published = False
+            self.category.save()
+        self.assertCounters(self.location, 0, None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.is_published = True
+            self.category.save()
+        self.assertEqual(Location.objects.get().posts_count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        post = self.create_post()
+        Category.objects.update(posts_count=10, last_pub_date=None)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounters(self.category, 1, post.pub_date)
+
+    def test_directory_pages(self):
+        self.create_post()
+        for name in ('blog:category_list', 'blog:location_list'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name))
+                counts = [
+                    obj.posts_count for obj in response.context['page_obj']]
+                self.assertIn(1, counts)
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import deletion
+from blog.models import ArchiveMonth, Category, Comment, FeedItem, Post
+from core.deletion import count_rows, run_deletion
+from core.models import DeletionJob
+
+User = get_user_model()
+
+
+@override_settings(BULK_DELETE_THRESHOLD=5, DELETION_CHUNK_SIZE=2)
+class TestBackgroundDeletion(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(
+            title='title', text='text', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text='text')
+            for _ in range(5))
+        cls.small_post = Post.objects.create(
+            title='title', text='text', author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def delete_post(self, post):
+        return self.client.post(reverse('blog:post_delete', args=(post.pk,)))
+
+    def test_small_post_is_deleted_inline(self):
+        self.delete_post(self.small_post)
+        self.assertFalse(Post.objects.filter(pk=self.small_post.pk).exists())
+        self.assertFalse(DeletionJob.objects.exists())
+
+    def test_large_post_is_hidden_then_deleted(self):
+        self.assertEqual(count_rows(Post.objects.filter(pk=self.post.pk)), 6)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.delete_post(self.post)
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.is_published)
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.status, job.total), ('pending', 6))
+        url = reverse('api:v1:deletion_detail', args=(job.pk,))
+        self.assertEqual(self.client.get(url).json()['progress'], 0)
+        with override_settings(TASKS_EAGER=True):
+            for callback in callbacks:
+                callback()
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+        data = self.client.get(url).json()
+        self.assertEqual(
+            (data['status'], data['deleted'], data['progress']),
+            ('done', 6, 1))
+
+    def test_progress_is_private(self):
+        job = deletion.delete_post(self.post, self.author)
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('api:v1:deletion_detail', args=(job.pk,)))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_user_deletion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            deletion.delete_user(self.reader, self.author)
+        self.assertFalse(User.objects.filter(pk=self.reader.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            job = deletion.delete_user(self.author)
+        self.assertFalse(Post.objects.exists())
+        job.refresh_from_db()
+        self.assertEqual(job.status, DeletionJob.Status.DONE)
+
+    def test_user_deletion_recounts_affected_rows(self):
+        category = Category.objects.create(
+            title='title', description='desc', slug='slug')
+        post = Post.objects.create(
+            title='title', text='text', author=self.reader,
+            category=category, pub_date=timezone.now())
+        FeedItem.objects.create(
+            user=self.author, post=post, pub_date=post.pub_date)
+        other = Category.objects.create(
+            title='other', description='desc', slug='other', posts_count=7)
+        local = timezone.localtime(post.pub_date)
+        month = ArchiveMonth.objects.get(year=local.year, month=local.month)
+        with self.captureOnCommitCallbacks() as callbacks, \
+                mock.patch('blog.tasks.reconcile_counters') as reconcile:
+            deletion.delete_user(self.reader)
+        reconcile.enqueue.assert_not_called()
+        with override_settings(TASKS_EAGER=True):
+            for callback in callbacks[:-1]:
+                callback()
+        category.refresh_from_db()
+        self.assertEqual(category.posts_count, 0)
+        other.refresh_from_db()
+        self.assertEqual(other.posts_count, 7)
+        posts_count = month.posts_count
+        month.refresh_from_db()
+        self.assertEqual(month.posts_count, posts_count - 1)
+        self.assertFalse(FeedItem.objects.exists())
+
+    def test_failed_job_is_resumed(self):
+        job = deletion.delete_post(self.post)
+        delete = QuerySet.delete
+        calls = []
+
+        def fail_second_chunk(queryset):
+            calls.append(queryset)
+            if len(calls) == 2:
+                raise RuntimeError('locked')
+            return delete(queryset)
+
+        with mock.patch.object(QuerySet, 'delete', fail_second_chunk), \
+                self.assertRaises(RuntimeError):
+            run_deletion(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted), ('failed', 2))
+        self.assertEqual(Comment.objects.count(), 3)
+        run_deletion(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted), ('done', 6))
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from blog import digests
+from blog.models import Comment, CommentNotification, Post
+
+User = get_user_model()
+
+
+class TestCommentDigests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com')
+        cls.hourly = User.objects.create(
+            username='hourly', email='hourly@example.com',
+            digest_frequency=User.DigestFrequency.HOURLY)
+        cls.silent = User.objects.create(
+            username='silent', email='silent@example.com',
+            digest_frequency=User.DigestFrequency.NEVER)
+        cls.reader = User.objects.create(username='reader')
+
+    def comment(self, post_author, author=None):
+        post = Post.objects.create(
+            title=f'Пост {post_author}', text='text', author=post_author)
+        return Comment.objects.create(
+            post=post, author=author or self.reader, text='Отличный пост')
+
+    def test_outbox_filled_on_comment(self):
+        self.comment(self.author)
+        self.comment(self.author, author=self.author)
+        self.assertEqual(
+            CommentNotification.objects.filter(recipient=self.author).count(),
+            1)
+
+    def test_queued_comment_notified_when_published(self):
+        comment = self.comment(self.author)
+        CommentNotification.objects.all().delete()
+        comment.is_published = False
+        comment.save()
+        self.assertFalse(CommentNotification.objects.exists())
+        comment.is_published = True
+        comment.save()
+        comment.text = 'Исправлено'
+        comment.save()
+        self.assertEqual(
+            CommentNotification.objects.get().recipient, self.author)
+
+    def test_digests_grouped_per_author(self):
+        for _ in range(2):
+            self.comment(self.author)
+        self.comment(self.hourly)
+        self.comment(self.silent)
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ['author@example.com', 'hourly@example.com'])
+        message = next(m for m in mail.outbox if m.to == [self.author.email])
+        self.assertEqual(message.body.count('Отличный пост'), 2)
+        self.assertIn('Пост author', message.body)
+        self.assertFalse(CommentNotification.objects.exists())
+
+    def test_frequency(self):
+        now = timezone.now()
+        User.objects.filter(pk__in=(self.author.pk, self.hourly.pk)).update(
+            digest_sent_at=now - timedelta(hours=2))
+        self.comment(self.author)
+        self.comment(self.hourly)
+        self.assertEqual(digests.send_digests(now), 1)
+        self.assertEqual(mail.outbox[0].to, [self.hourly.email])
+        self.assertEqual(CommentNotification.objects.get().recipient,
+                         self.author)
@@ -0,0 +1,132 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import duplicates, minhash
+from blog.models import Comment, CommentNotification, Post
+
+User = get_user_model()
+
+SPAM = ('Купите дешёвые часы прямо сейчас на нашем сайте, скидки до '
+        'пятидесяти процентов только сегодня')
+SPAM_VARIANT = SPAM.replace('пятидесяти', 'шестидесяти') + '!!'
+OTHER = ('Вчера я гулял по парку и увидел, как белки собирают орехи '
+         'на зиму, очень милое зрелище')
+
+
+class TestMinHash(TestCase):
+
+    def test_band_keys(self):
+        spam, variant, other = map(
+            minhash.band_keys, (SPAM, SPAM_VARIANT, OTHER))
+        self.assertEqual(len(spam), minhash.BANDS)
+        self.assertTrue(set(spam) & set(variant))
+        self.assertFalse(set(spam) & set(other))
+        self.assertIsNone(minhash.band_keys('Спасибо за статью!'))
+
+    def test_similarity(self):
+        self.assertGreater(minhash.similarity(SPAM, SPAM_VARIANT), 0.8)
+        self.assertLess(minhash.similarity(SPAM, OTHER), 0.2)
+
+
+class DuplicatesTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.spammer = User.objects.create(username='spammer')
+        cls.post = Post.objects.create(
+            title='title', text='text', author=cls.author,
+            pub_date=timezone.now())
+
+    def comment(self, text, **kwargs):
+        return Comment.objects.create(
+            post=self.post, author=self.spammer, text=text, **kwargs)
+
+
+class TestFind(DuplicatesTestCase):
+
+    def test_bands_follow_text(self):
+        comment = self.comment(SPAM)
+        bands = [getattr(comment, field) for field in Comment.BAND_FIELDS]
+        self.assertEqual(bands, minhash.band_keys(SPAM))
+        comment.text = OTHER
+        comment.save(update_fields=['is_published'])
+        comment.refresh_from_db()
+        self.assertEqual(comment.text_band_0, bands[0])
+        comment.text = 'Спасибо!'
+        comment.save(update_fields=['text'])
+        comment.refresh_from_db()
+        self.assertIsNone(comment.text_band_0)
+
+    def test_find(self):
+        comment = self.comment(SPAM)
+        self.comment(OTHER)
+        self.assertEqual(
+            duplicates.find(Comment.objects.all(), SPAM_VARIANT), [comment])
+        self.assertEqual(
+            duplicates.find(Comment.objects.all(), 'Спасибо!'), [])
+
+
+class TestCommentCreate(DuplicatesTestCase):
+
+    def setUp(self):
+        self.client.force_login(self.spammer)
+        self.url = reverse('blog:comment_create', args=(self.post.pk,))
+        self.comment(SPAM)
+
+    def test_duplicate_is_queued(self):
+        response = self.client.post(
+            self.url, {'text': SPAM_VARIANT},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertIn('на модерации', response.json()['html'])
+        comment = Comment.objects.latest('pk')
+        self.assertFalse(comment.is_published)
+        self.assertFalse(
+            CommentNotification.objects.filter(comment=comment).exists())
+        self.client.post(self.url, {'text': OTHER})
+        self.assertTrue(Comment.objects.latest('pk').is_published)
+
+    @override_settings(DUPLICATE_COMMENT_ACTION='reject')
+    def test_duplicate_is_rejected(self):
+        response = self.client.post(
+            self.url, {'text': SPAM_VARIANT},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('text', response.json()['errors'])
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+class TestRemoveDuplicates(DuplicatesTestCase):
+
+    def setUp(self):
+        # Bulk writes skip save(), the command indexes these texts first.
+        self.original, *self.copies, self.other = Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.spammer, text=text)
+            for text in (SPAM, SPAM_VARIANT, SPAM, OTHER))
+
+    def run_command(self, *args):
+        call_command('remove_duplicates', *args, stdout=StringIO())
+
+    def test_copies_are_unpublished(self):
+        self.run_command('--dry-run')
+        self.assertEqual(
+            Comment.objects.filter(is_published=True).count(), 4)
+        self.run_command()
+        self.assertQuerysetEqual(
+            Comment.objects.filter(is_published=True).order_by('pk'),
+            [self.original, self.other])
+        self.assertFalse(
+            Comment.objects.filter(text_band_0__isnull=True).exists())
+
+    def test_delete_and_min_copies(self):
+        self.run_command('--delete', '--min-copies', '3')
+        self.assertEqual(Comment.objects.count(), 4)
+        self.run_command('--delete', '--min-copies', '2')
+        self.assertQuerysetEqual(
+            Comment.objects.order_by('pk'), [self.original, self.other])
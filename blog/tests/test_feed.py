@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import tasks
+from blog.models import Category, FeedItem, Post
+from core.models import Task
+
+User = get_user_model()
+
+
+@override_settings(TASKS_EAGER=True, FEED_FANOUT_LIMIT=1, POSTS_ON_PAGE=2)
+class TestFeed(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='reader')
+        cls.other_reader = User.objects.create(username='other')
+        cls.author = User.objects.create(username='author')
+        cls.celebrity = User.objects.create(username='celebrity')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def create_post(self, author, hours_ago):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(
+                title='title', text='text', author=author,
+                category=self.category,
+                pub_date=timezone.now() - timedelta(hours=hours_ago),
+            )
+
+    def follow(self, user, author):
+        self.client.force_login(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('users:follow', args=(author.username,)))
+        self.client.force_login(self.reader)
+
+    def test_fan_out_on_publish(self):
+        old_post = self.create_post(self.author, 10)
+        self.follow(self.reader, self.author)
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=old_post).exists())
+        post = self.create_post(self.author, 1)
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=post).exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.is_published = False
+            post.save()
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+
+    def test_celebrities_are_merged_on_read(self):
+        self.follow(self.reader, self.celebrity)
+        self.follow(self.other_reader, self.celebrity)
+        self.follow(self.reader, self.author)
+        posts = [
+            self.create_post(self.author, 4),
+            self.create_post(self.celebrity, 3),
+            self.create_post(self.author, 2),
+        ]
+        self.assertFalse(FeedItem.objects.filter(
+            post__author=self.celebrity).exists())
+        response = self.client.get(reverse('blog:feed'))
+        self.assertEqual(list(response.context['posts']), posts[:0:-1])
+        response = self.client.get(
+            reverse('blog:feed'), {'before': response.context['next_before']})
+        self.assertEqual(list(response.context['posts']), posts[:1])
+        self.assertIsNone(response.context['next_before'])
+
+    def test_unfollow_clears_inbox(self):
+        self.follow(self.reader, self.author)
+        self.create_post(self.author, 1)
+        self.client.post(reverse('users:unfollow', args=('author',)))
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+    def test_author_crossing_the_limit(self):
+        self.follow(self.reader, self.author)
+        fanned_out = self.create_post(self.author, 3)
+        self.follow(self.other_reader, self.author)
+        self.assertTrue(FeedItem.objects.filter(post=fanned_out).exists())
+        merged = self.create_post(self.author, 2)
+        response = self.client.get(reverse('blog:feed'))
+        self.assertEqual(list(response.context['posts']), [merged, fanned_out])
+        self.assertIsNone(response.context['next_before'])
+        self.client.force_login(self.other_reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('users:unfollow', args=('author',)))
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post=merged).exists())
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('blog:feed'))
+        self.assertEqual(list(response.context['posts']), [merged, fanned_out])
+
+    def test_deleted_follower_is_uncounted(self):
+        self.follow(self.reader, self.author)
+        self.follow(self.other_reader, self.author)
+        merged = self.create_post(self.author, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_reader.delete()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post=merged).exists())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('blog:feed'), {'before': '9' * 30})
+        self.assertEqual(response.status_code, 200)
+
+
+class TestScheduledPublishing(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+
+    def test_counted_when_pub_date_arrives(self):
+        pub_date = timezone.now() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                title='title', text='text', author=self.author,
+                category=self.category, pub_date=pub_date,
+            )
+        task_row = Task.objects.get(name=tasks.publish_scheduled.task_name)
+        self.assertEqual(task_row.run_after, pub_date)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.posts_count, 0)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(minutes=1))
+        tasks.publish_scheduled(*task_row.args)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.posts_count, 0)
+        post.refresh_from_db()
+        tasks.publish_scheduled(post.pk, post.pub_date.isoformat())
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.posts_count, 1)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import hits
+from blog.models import Post, PostViews
+
+User = get_user_model()
+
+BROWSER = 'Mozilla/5.0 (X11; Linux x86_64) Firefox/120.0'
+
+
+class TestPostViews(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.first, cls.second = (
+            Post.objects.create(
+                title='title', text='text', author=cls.author,
+                pub_date=timezone.now() - timedelta(hours=1),
+            ) for _ in range(2)
+        )
+
+    def setUp(self):
+        hits.buffer.counts.clear()
+
+    def view(self, post, user_agent=BROWSER):
+        return self.client.get(
+            reverse('blog:post_detail', args=(post.pk,)),
+            HTTP_USER_AGENT=user_agent,
+        )
+
+    def test_views_are_buffered_then_flushed(self):
+        self.view(self.first)
+        self.view(self.first)
+        self.view(self.second)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 0)
+        self.assertEqual(hits.buffer.pending(), 3)
+        with self.assertNumQueries(5):
+            hits.buffer.flush()
+        self.view(self.first)
+        hits.buffer.flush()
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.views_count, 3)
+        self.assertEqual(
+            PostViews.objects.get(post=self.first).views, 3)
+
+    def test_bots_and_author_are_ignored(self):
+        self.view(self.first, user_agent='Googlebot/2.1')
+        self.view(self.first, user_agent='')
+        self.client.force_login(self.author)
+        self.view(self.first)
+        self.assertEqual(hits.buffer.pending(), 0)
+
+    def test_popular(self):
+        for _ in range(2):
+            self.view(self.second)
+        self.view(self.first)
+        hits.buffer.flush()
+        PostViews.objects.create(
+            post=self.first, views=10,
+            day=timezone.localdate() - timedelta(days=30))
+        response = self.client.get(reverse('blog:popular'))
+        self.assertEqual(
+            list(response.context['posts']), [self.second, self.first])
@@ -0,0 +1,117 @@
+import io
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.defaultfilters import filesizeformat
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from blog import images
+from blog.models import Post
+
+User = get_user_model()
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+
+
+XMP = (b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><exif:GPSLatitude>55,45N'
+       b'</exif:GPSLatitude></x:xmpmeta>')
+
+
+def make_upload(size, image_format='JPEG', exif=None, name='photo.jpg',
+                **options):
+    stream = io.BytesIO()
+    if exif is not None:
+        options['exif'] = exif
+    Image.new('RGB', size, 'red').save(stream, image_format, **options)
+    return SimpleUploadedFile(name, stream.getvalue(), 'image/jpeg')
+
+
+def gps_exif():
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif.get_ifd(GPS_IFD)[2] = (55.0, 45.0, 0.0)
+    return exif
+
+
+class TestNormalize(TestCase):
+
+    def test_metadata_is_stripped(self):
+        for image_format, name in (('JPEG', 'photo.jpg'),
+                                   ('WEBP', 'photo.webp')):
+            with self.subTest(image_format=image_format):
+                result = images.normalize(make_upload(
+                    (40, 20), image_format, exif=gps_exif(), name=name,
+                    xmp=XMP))
+                data = result.read()
+                result.seek(0)
+                self.assertNotIn(b'GPSLatitude', data)
+                self.assertNotIn(b'xmpmeta', data)
+                with Image.open(result) as image:
+                    self.assertEqual(image.format, image_format)
+                    self.assertFalse(image.getexif())
+                    self.assertNotIn('xmp', image.info)
+                    self.assertNotIn('exif', image.info)
+                    # The orientation tag was applied before it was dropped.
+                    self.assertEqual(image.size, (20, 40))
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_large_image_is_downscaled(self):
+        result = images.normalize(make_upload((400, 200)))
+        with Image.open(result) as image:
+            self.assertEqual(image.size, (100, 50))
+        self.assertEqual(result.name, 'photo.jpg')
+
+    def test_unsupported_format_is_stored_as_png(self):
+        result = images.normalize(
+            make_upload((10, 10), 'GIF', name='anim.gif'))
+        self.assertEqual(result.name, 'anim.png')
+        with Image.open(result) as image:
+            self.assertEqual(image.format, 'PNG')
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            images.normalize(make_upload((20, 20)))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestPostImageUpload(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def create_post(self, image):
+        return self.client.post(reverse('blog:post_create'), {
+            'title': 'title',
+            'text': 'text',
+            'pub_date': '2030-01-01T10:00',
+            'image': image,
+        })
+
+    def test_upload_is_normalized(self):
+        self.create_post(make_upload((40, 20), exif=gps_exif()))
+        with Image.open(Post.objects.get().image) as image:
+            self.assertFalse(image.getexif())
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload_is_rejected(self):
+        response = self.create_post(make_upload((200, 200)))
+        self.assertFormError(
+            response.context['form'], 'image',
+            f'Файл больше {filesizeformat(100)}.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_decompression_bomb_is_rejected(self):
+        response = self.create_post(make_upload((20, 20)))
+        self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
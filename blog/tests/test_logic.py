@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
+from PIL import Image
 
 from blog.models import Category, Comment, Location, Post
 
@@ -239,7 +240,8 @@ class TestPostCreate(TestCase):
         self.assertEqual(post.author, self.author)
         self.assertEqual(post.is_published, True)
         self.assertEqual(post.pub_date.date(), self.PUB_DATE_FUTURE.date())
-        self.assertEqual(post.image.read(), self.IMAGE.read())
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (1, 1))
 
     def test_anon_cant_create_post(self):
         self.client.post(reverse('blog:post_create'), self.form_data)
@@ -350,3 +352,70 @@ class TestPostEditDelete(TestCase):
         self.assertEqual(self.post_published.text, self.NEW_POST_TEXT)
         self.assertEqual(
             self.post_published.pub_date.date(), self.PUB_DATE_PAST.date())
+
+
+class TestCommentAjax(TestCase):
+    COMMENT_TEXT = 'comment text'
+    NEW_COMMENT_TEXT = 'new comment text'
+    AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(
+            title='title', text='text', author=cls.author,
+            pub_date=timezone.now() - timedelta(days=1))
+        cls.comment = Comment.objects.create(
+            text=cls.COMMENT_TEXT, author=cls.author, post=cls.post)
+        cls.create_url = reverse('blog:comment_create', args=(cls.post.pk,))
+        cls.edit_url = reverse(
+            'blog:comment_edit', args=(cls.post.pk, cls.comment.pk))
+        cls.delete_url = reverse(
+            'blog:comment_delete', args=(cls.post.pk, cls.comment.pk))
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def test_create_returns_rendered_fragment(self):
+        response = self.client.post(
+            self.create_url, {'text': self.NEW_COMMENT_TEXT}, **self.AJAX)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        comment = Comment.objects.latest('pk')
+        payload = response.json()
+        self.assertEqual(payload['id'], comment.pk)
+        self.assertIn(f'id="comment-{comment.pk}"', payload['html'])
+        self.assertIn(self.NEW_COMMENT_TEXT, payload['html'])
+
+    def test_create_uses_single_post_query(self):
+        # Session, user, two rate limit buckets, visible post, the insert
+        # and the update of its thread path in a savepoint.
+        with self.assertNumQueries(9):
+            self.client.post(
+                self.create_url, {'text': self.NEW_COMMENT_TEXT}, **self.AJAX)
+
+    def test_invalid_form_returns_errors(self):
+        response = self.client.post(self.create_url, {'text': ''}, **self.AJAX)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('text', response.json()['errors'])
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_edit_returns_rendered_fragment(self):
+        response = self.client.post(
+            self.edit_url, {'text': self.NEW_COMMENT_TEXT}, **self.AJAX)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(self.NEW_COMMENT_TEXT, response.json()['html'])
+        self.comment.refresh_from_db()
+        self.assertTrue(self.comment.is_edited)
+
+    def test_delete_returns_json(self):
+        response = self.client.post(self.delete_url, **self.AJAX)
+        self.assertEqual(
+            response.json(), {'id': self.comment.pk, 'deleted': True})
+        self.assertFalse(Comment.objects.exists())
+
+    def test_not_author_gets_forbidden(self):
+        self.client.force_login(self.reader)
+        response = self.client.post(
+            self.edit_url, {'text': self.NEW_COMMENT_TEXT}, **self.AJAX)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
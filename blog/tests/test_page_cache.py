@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class TestPageCache(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='text', author=cls.author,
+            pub_date=timezone.now() - timedelta(days=1))
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        cls.edit_url = 'href="{}"'.format(
+            reverse('blog:post_edit', args=(cls.post.pk,)))
+        cls.comment_edit_url = 'href="{}"'.format(
+            reverse('blog:comment_edit', args=(cls.post.pk, cls.comment.pk)))
+        cls.detail_url = reverse('blog:post_detail', args=(cls.post.pk,))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def get(self, url, user=None):
+        if user is None:
+            self.client.logout()
+        else:
+            self.client.force_login(user)
+        return self.client.get(url).content.decode()
+
+    def test_shared_page_is_personalised(self):
+        anonymous = self.get(reverse('blog:index'))
+        self.assertIn(reverse('login'), anonymous)
+        self.assertNotIn(self.edit_url, anonymous)
+        author = self.get(reverse('blog:index'), self.author)
+        self.assertIn(self.edit_url, author)
+        self.assertIn('Профиль: <b>author</b>', author)
+        reader = self.get(reverse('blog:index'), self.reader)
+        self.assertNotIn(self.edit_url, reader)
+        self.assertIn('Профиль: <b>reader</b>', reader)
+
+    def test_detail_holes(self):
+        self.get(self.detail_url)
+        page = self.get(self.detail_url, self.reader)
+        self.assertIn('id="comment-form"', page)
+        self.assertIn('csrfmiddlewaretoken', page)
+        self.assertIn(self.comment_edit_url, page)
+        self.assertNotIn(self.edit_url, page)
+        page = self.get(self.detail_url, self.author)
+        self.assertIn(self.edit_url, page)
+        self.assertNotIn(self.comment_edit_url, page)
+
+    def test_page_is_rendered_once(self):
+        self.get(reverse('blog:index'), self.reader)
+        Post.objects.filter(pk=self.post.pk).update(title='Обновлено')
+        self.client.force_login(self.author)
+        # Only the session and the user are loaded.
+        with self.assertNumQueries(2):
+            page = self.client.get(reverse('blog:index')).content.decode()
+        self.assertIn('Заголовок', page)
+        self.post.title = 'Обновлено'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertIn('Обновлено', self.get(reverse('blog:index')))
+
+    def test_comment_drops_only_its_post(self):
+        other = Post.objects.create(
+            title='Другой', text='text', author=self.author,
+            pub_date=timezone.now() - timedelta(days=1))
+        other_url = reverse('blog:post_detail', args=(other.pk,))
+        for url in (reverse('blog:index'), self.detail_url, other_url):
+            self.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Новый')
+        # Pages are dropped only once the comment is committed.
+        self.assertNotIn('Новый', self.get(self.detail_url))
+        for callback in callbacks:
+            callback()
+        self.assertIn('Новый', self.get(self.detail_url))
+        Post.objects.filter(pk=other.pk).update(title='Обновлено')
+        Post.objects.filter(pk=self.post.pk).update(title='Обновлено')
+        self.assertIn('Заголовок', self.get(reverse('blog:index')))
+        self.assertIn('Другой', self.get(other_url))
+
+    def test_hidden_post_is_not_shared(self):
+        Post.objects.filter(pk=self.post.pk).update(is_published=False)
+        self.assertIn('Пост снят с публикации', self.get(
+            self.detail_url, self.author))
+        self.client.force_login(self.reader)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 403)
+        self.post.is_published = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.get(self.detail_url)
+        Post.objects.filter(pk=self.post.pk).update(is_published=False)
+        self.assertEqual(self.client.get(self.detail_url).status_code, 403)
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import related
+from blog.models import Category, Post, RelatedPost
+
+User = get_user_model()
+
+
+@override_settings(RELATED_POSTS_COUNT=2)
+class TestRelatedPosts(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug'
+        )
+        texts = (
+            'горный поход палатка костёр',
+            'горный поход маршрут перевал',
+            'рецепт пирога тесто духовка',
+            'рецепт супа кастрюля духовка',
+            'палатка перевал маршрут снаряжение',
+        )
+        cls.posts = [cls.create_post(text) for text in texts]
+
+    @classmethod
+    def create_post(cls, text):
+        return Post.objects.create(
+            title='title', text=text, author=cls.author,
+            category=cls.category,
+            pub_date=timezone.now() - timedelta(hours=1),
+        )
+
+    def neighbours(self, post):
+        return list(RelatedPost.objects.filter(post=post).values_list(
+            'related', flat=True))
+
+    def test_rebuild(self):
+        call_command('build_related_posts', stdout=StringIO())
+        hiking, _, baking, soup, _ = self.posts
+        self.assertEqual(self.neighbours(baking)[0], soup.pk)
+        self.assertNotIn(baking.pk, self.neighbours(hiking))
+        self.assertTrue(all(
+            len(self.neighbours(post)) == 2 for post in self.posts))
+
+    def test_update_offers_new_post(self):
+        related.rebuild()
+        post = self.create_post('рецепт пирога тесто кастрюля духовка')
+        related.update([post.pk])
+        baking, soup = self.posts[2:4]
+        self.assertEqual(
+            set(self.neighbours(post)), {baking.pk, soup.pk})
+        self.assertIn(post.pk, self.neighbours(baking))
+        self.assertEqual(len(self.neighbours(baking)), 2)
+
+    def test_update_skips_removed_posts(self):
+        related.rebuild()
+        baking, soup = self.posts[2:4]
+        soup_pk = soup.pk
+        soup.delete()
+        post = self.create_post('рецепт пирога тесто кастрюля духовка')
+        related.update([post.pk])
+        self.assertEqual(self.neighbours(post)[0], baking.pk)
+        self.assertNotIn(soup_pk, self.neighbours(post))
+
+    def test_detail_shows_related(self):
+        related.rebuild()
+        baking, soup = self.posts[2:4]
+        soup.is_published = False
+        soup.save()
+        response = self.client.get(
+            reverse('blog:post_detail', args=(baking.pk,)))
+        self.assertNotIn(soup, response.context['related_posts'])
+        self.assertEqual(len(response.context['related_posts']), 1)
+
+    def test_update_vectorises_only_new_posts(self):
+        related.rebuild()
+        hidden = self.posts[0]
+        hidden.is_published = False
+        hidden.save()
+        post = self.create_post('рецепт пирога тесто кастрюля духовка')
+        path = related.model_path()
+        saved = related.file_key(path)
+        with mock.patch.object(
+                related.Model, 'fit', side_effect=AssertionError), \
+                mock.patch.object(
+                    related, 'terms', wraps=related.terms) as terms:
+            related.update([hidden.pk, post.pk])
+        self.assertEqual(terms.call_count, 1)
+        self.assertEqual(related.file_key(path), saved)
+        cached = related.Model.load(path)
+        related._cache.clear()
+        model = related.Model.load(path)
+        self.assertNotIn(hidden.pk, model.ids)
+        self.assertIn(post.pk, model.ids)
+        self.assertEqual(model.ids.tolist(), cached.ids.tolist())
+        self.assertEqual((model.matrix != cached.matrix).nnz, 0)
+        with open(related.delta_path(path), 'ab') as delta:
+            delta.write(b'\0' * 5)
+        related._cache.clear()
+        self.assertEqual(
+            related.Model.load(path).ids.tolist(), model.ids.tolist())
+        related.rebuild()
+        self.assertFalse(related.delta_path(path).exists())
+
+    def test_rebuild_in_small_blocks(self):
+        related.rebuild()
+        expected = list(RelatedPost.objects.values_list(
+            'post', 'related', 'score'))
+        with self.settings(RELATED_BLOCK_MEMORY=1):
+            related.rebuild()
+        self.assertEqual(
+            [(post, other, round(score, 5)) for post, other, score in
+             RelatedPost.objects.values_list('post', 'related', 'score')],
+            [(post, other, round(score, 5))
+             for post, other, score in expected])
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import revisions
+from blog.models import Comment, Post, PostRevision
+
+User = get_user_model()
+
+PARAGRAPHS = [f'Абзац {number} с текстом поста.\n' for number in range(200)]
+
+
+@override_settings(REVISION_SNAPSHOT_EVERY=4)
+class TestRevisions(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            title='Версия 0', text=''.join(PARAGRAPHS), author=self.author,
+            pub_date=timezone.now())
+
+    def edit(self, count):
+        versions = []
+        for number in range(1, count + 1):
+            versions.append(revisions.content(self.post))
+            lines = PARAGRAPHS.copy()
+            lines[number] = f'Исправленный абзац {number}.\n'
+            self.post.title = f'Версия {number}'
+            self.post.text = ''.join(lines)
+            self.post.save()
+        return versions
+
+    def test_versions_are_rebuilt(self):
+        versions = self.edit(10)
+        stored = list(self.post.revisions.order_by('number'))
+        self.assertEqual(
+            [revision.is_snapshot for revision in stored],
+            [False, False, False, True, False, False, False, True,
+             False, False])
+        for revision, expected in zip(stored, versions):
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    revisions.version(self.post, revision), expected)
+
+    def test_deltas_are_compact(self):
+        self.edit(2)
+        delta = self.post.revisions.get(number=2)
+        self.assertLess(len(delta.data), 200)
+        self.assertLess(len(delta.data) * 20, len(self.post.text.encode()))
+
+    def test_unchanged_saves_are_skipped(self):
+        self.post.save()
+        self.post.views_count = 5
+        self.post.save(update_fields=['views_count'])
+        self.post.is_published = False
+        self.post.save()
+        self.assertFalse(self.post.revisions.exists())
+
+    def test_compact(self):
+        versions = self.edit(9)
+        now = timezone.now()
+        # Two edits a day on three old days, the rest today.
+        for number, days in enumerate([40, 40, 39, 39, 38, 38], start=1):
+            PostRevision.objects.filter(post=self.post, number=number).update(
+                created_at=now - timedelta(days=days, hours=-number))
+        with self.settings(REVISION_THIN_AFTER_DAYS=30):
+            self.assertEqual(revisions.compact(self.post, now), 3)
+        kept = list(self.post.revisions.order_by('number'))
+        self.assertEqual(
+            [revision.number for revision in kept], [2, 4, 6, 7, 8, 9])
+        for revision in kept:
+            self.assertEqual(
+                revisions.version(self.post, revision),
+                versions[revision.number - 1])
+        with self.settings(REVISION_MAX_COUNT=2):
+            call_command('compact_revisions', stdout=StringIO())
+        self.assertQuerysetEqual(
+            self.post.revisions.values_list('number', flat=True), [9, 8])
+
+
+class TestRevisionViews(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(
+            title='Заголовок', text='Первая строка\nВторая строка',
+            author=cls.author, pub_date=timezone.now())
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Старый комментарий')
+
+    def test_post_diff(self):
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('blog:post_edit', args=(self.post.pk,)),
+            {'title': 'Заголовок', 'text': 'Первая строка\nНовая строка',
+             'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M')})
+        response = self.client.get(
+            reverse('blog:post_history', args=(self.post.pk,)))
+        url = reverse('blog:post_revision', args=(self.post.pk, 1))
+        self.assertContains(response, url)
+        response = self.client.get(url)
+        title, text = response.context['diffs']
+        self.assertEqual(title[1], [])
+        self.assertIn(('removed', 'Вторая строка'), text[1])
+        self.assertIn(('added', 'Новая строка'), text[1])
+        self.assertContains(response, 'Без изменений')
+        self.client.force_login(self.reader)
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.FORBIDDEN)
+
+    def test_comment_history(self):
+        self.client.force_login(self.reader)
+        self.client.post(
+            reverse('blog:comment_edit', args=(self.post.pk, self.comment.pk)),
+            {'text': 'Новый комментарий'})
+        response = self.client.get(reverse(
+            'blog:comment_revision', args=(self.post.pk, self.comment.pk, 1)))
+        self.assertEqual(response.context['diffs'], [('Текст комментария', [
+            ('hunk', '@@ -1 +1 @@'),
+            ('removed', 'Старый комментарий'),
+            ('added', 'Новый комментарий'),
+        ])])
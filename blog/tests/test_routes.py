@@ -33,6 +33,8 @@ class TestRoutes(TestCase):
             ('blog:index', None),
             ('blog:post_detail', {'pk': self.post.pk}),
             ('blog:category_posts', {'slug': self.category.slug}),
+            ('blog:category_list', None),
+            ('blog:location_list', None),
             ('login', None),
             ('logout', None),
             ('users:registration', None),
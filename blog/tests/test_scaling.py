@@ -0,0 +1,175 @@
+import tracemalloc
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+# Data sizes every view is measured at; the query count must not change.
+SIZES = (5, 20, 40)
+MEMORY_BUDGET = 4 * 1024 * 1024
+RESPONSE_BUDGET = 256 * 1024
+
+
+class Cost(NamedTuple):
+    queries: int
+    memory: int
+    size: int
+
+
+class ScalingTestCase(TestCase):
+    """Seeds growing amounts of data and measures one request per size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.admin = User.objects.create(
+            username='admin', is_staff=True, is_superuser=True)
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug')
+        cls.location = Location.objects.create(name='place')
+        cls.post = cls.create_posts(1)[0]
+
+    @classmethod
+    def create_posts(cls, count):
+        now = timezone.now()
+        return Post.objects.bulk_create(
+            Post(
+                title='title', text='text ' * 50, excerpt='text',
+                author=cls.author, category=cls.category,
+                location=cls.location,
+                pub_date=now - timedelta(minutes=index + 1),
+            ) for index in range(count)
+        )
+
+    def grow(self, size):
+        """Bring the data set up to ``size`` rows of every kind."""
+        missing = size - Post.objects.count()
+        if missing <= 0:
+            return
+        self.create_posts(missing)
+        Category.objects.bulk_create(
+            Category(title=f'c{index}', description='d', slug=f'c{index}')
+            for index in range(Category.objects.count(), size))
+        Location.objects.bulk_create(
+            Location(name=f'l{index}')
+            for index in range(Location.objects.count(), size))
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=author, text='comment')
+            for author in User.objects.bulk_create(
+                User(username=f'user{self.id()}{size}{index}')
+                for index in range(missing))
+        )
+
+    def measure(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            try:
+                response = request()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        self.assertLess(response.status_code, 400)
+        return Cost(len(queries), peak, len(response.content))
+
+    def assertScales(self, request, user=None):
+        if user is not None:
+            self.client.force_login(user)
+        # The first request fills per-process caches (content types,
+        # sessions, templates) and is not measured.
+        request()
+        costs = []
+        for size in SIZES:
+            self.grow(size)
+            costs.append(self.measure(request))
+        with self.subTest('queries'):
+            self.assertEqual(
+                len({cost.queries for cost in costs}), 1,
+                f'Query count grows with data: {costs}')
+        with self.subTest('memory'):
+            self.assertLess(max(cost.memory for cost in costs),
+                            MEMORY_BUDGET, costs)
+        with self.subTest('response size'):
+            self.assertLess(max(cost.size for cost in costs),
+                            RESPONSE_BUDGET, costs)
+        return costs
+
+
+class TestPublicViewsScaling(ScalingTestCase):
+
+    def test_index(self):
+        self.assertScales(lambda: self.client.get(reverse('blog:index')))
+
+    def test_post_detail(self):
+        self.assertScales(lambda: self.client.get(
+            reverse('blog:post_detail', args=(self.post.pk,))))
+
+    def test_category_posts(self):
+        self.assertScales(lambda: self.client.get(
+            reverse('blog:category_posts', args=(self.category.slug,))))
+
+    def test_user_profile(self):
+        self.assertScales(lambda: self.client.get(
+            reverse('users:profile', args=(self.author.username,))))
+
+    def test_directories(self):
+        for name in ('blog:category_list', 'blog:location_list'):
+            with self.subTest(name=name):
+                self.assertScales(lambda: self.client.get(reverse(name)))
+
+
+class TestFormViewsScaling(ScalingTestCase):
+
+    def test_post_create(self):
+        self.assertScales(
+            lambda: self.client.get(reverse('blog:post_create')),
+            user=self.author)
+
+    def test_post_edit(self):
+        self.assertScales(
+            lambda: self.client.get(
+                reverse('blog:post_edit', args=(self.post.pk,))),
+            user=self.author)
+
+    def test_post_delete(self):
+        self.assertScales(
+            lambda: self.client.get(
+                reverse('blog:post_delete', args=(self.post.pk,))),
+            user=self.author)
+
+    def test_comment_create(self):
+        self.assertScales(
+            lambda: self.client.post(
+                reverse('blog:comment_create', args=(self.post.pk,)),
+                {'text': 'new comment'}),
+            user=self.reader)
+
+    def test_comment_edit_and_delete(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='text')
+        for name in ('blog:comment_edit', 'blog:comment_delete'):
+            with self.subTest(name=name):
+                self.assertScales(
+                    lambda: self.client.get(
+                        reverse(name, args=(self.post.pk, comment.pk))),
+                    user=self.reader)
+
+
+class TestAdminScaling(ScalingTestCase):
+
+    def test_changelists(self):
+        for model in (Post, Comment, Category, Location):
+            with self.subTest(model=model.__name__):
+                self.assertScales(
+                    lambda: self.client.get(reverse(
+                        f'admin:blog_{model._meta.model_name}_changelist')),
+                    user=self.admin)
@@ -0,0 +1,109 @@
+import gzip
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from blog import sitemaps
+from blog.models import Category, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    TASKS_EAGER=True, SITEMAP_SEGMENT_SIZE=2, SITE_URL='http://testserver')
+class TestSitemaps(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.hidden_author = User.objects.create(username='hidden')
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug')
+        cls.posts = [
+            Post.objects.create(
+                title='title', text='text', author=cls.author,
+                category=cls.category,
+                pub_date=timezone.now() - timedelta(days=1))
+            for _ in range(3)
+        ]
+        cls.draft = Post.objects.create(
+            title='title', text='text', author=cls.hidden_author,
+            is_published=False)
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.root = Path(root)
+        override = override_settings(SITEMAP_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def read(self, section):
+        text = ''
+        for path in sorted(self.root.glob(f'{section}-*.xml.gz')):
+            with gzip.open(path, 'rt') as stream:
+                text += stream.read()
+        return text
+
+    def test_full_rebuild(self):
+        call_command('build_sitemaps', stdout=StringIO())
+        posts = self.read('posts')
+        for post in self.posts:
+            self.assertIn(f'http://testserver/posts/{post.pk}/', posts)
+        self.assertNotIn(f'/posts/{self.draft.pk}/', posts)
+        self.assertIn('/category/slug/', self.read('categories'))
+        authors = self.read('authors')
+        self.assertIn('/profile/author/', authors)
+        self.assertNotIn('/profile/hidden/', authors)
+        index = (self.root / sitemaps.INDEX_NAME).read_text()
+        for path in self.root.glob('*.xml.gz'):
+            self.assertIn(f'http://testserver/sitemaps/{path.name}', index)
+
+    def test_segments_are_split_by_primary_key(self):
+        sitemaps.rebuild(['posts'])
+        segments = {
+            sitemaps.segment_number(post.pk) for post in self.posts}
+        self.assertEqual(
+            {path.name for path in self.root.glob('posts-*.xml.gz')},
+            {f'posts-{number}.xml.gz' for number in segments})
+
+    def test_only_the_changed_segment_is_rebuilt(self):
+        sitemaps.rebuild()
+        first, *_, last = self.posts
+        other = sitemaps.segment_path(
+            'posts', sitemaps.segment_number(first.pk))
+        self.assertNotEqual(other, sitemaps.segment_path(
+            'posts', sitemaps.segment_number(last.pk)))
+        other_mtime = other.stat().st_mtime_ns
+        with self.captureOnCommitCallbacks(execute=True):
+            last.is_published = False
+            last.save()
+        self.assertNotIn(f'/posts/{last.pk}/', self.read('posts'))
+        self.assertEqual(other.stat().st_mtime_ns, other_mtime)
+
+    def test_publishing_adds_post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.is_published = True
+            self.draft.save()
+        self.assertIn(f'/posts/{self.draft.pk}/', self.read('posts'))
+        self.assertIn('/profile/hidden/', self.read('authors'))
+
+    def test_concurrent_index_writes(self):
+        sitemaps.rebuild()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for future in [executor.submit(sitemaps.write_index)
+                           for _ in range(20)]:
+                future.result()
+        self.assertEqual(
+            [path.name for path in self.root.iterdir()
+             if path.name.startswith('.')], [])
+        self.assertIn('posts-0.xml.gz',
+                      (self.root / sitemaps.INDEX_NAME).read_text())
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import threads
+from blog.models import Comment, CommentNotification, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENT_MAX_DEPTH=3, COMMENT_COLLAPSE_DEPTH=1)
+class TestThreads(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.post = Post.objects.create(
+            title='title', text='text', author=cls.author,
+            pub_date=timezone.now())
+        cls.other_post = Post.objects.create(
+            title='other', text='text', author=cls.author,
+            pub_date=timezone.now())
+
+    def reply(self, parent=None, author=None, text='reply'):
+        return Comment.objects.create(
+            post=self.post, author=author or self.reader, parent=parent,
+            text=text)
+
+    def chain(self, length):
+        comments = [self.reply()]
+        for _ in range(length - 1):
+            comments.append(self.reply(comments[-1]))
+        return comments
+
+    def test_segments_sort_like_keys(self):
+        self.assertEqual(len(threads.segment(1)), threads.SEGMENT_WIDTH)
+        self.assertLess(threads.segment(35), threads.segment(36))
+        self.assertLess(threads.segment(999), threads.segment(1000))
+
+    def test_thread_order(self):
+        first = self.reply()
+        second = self.reply()
+        first_reply = self.reply(first)
+        nested = self.reply(first_reply)
+        self.assertEqual(
+            [(comment.pk, comment.depth) for comment in
+             Comment.objects.order_by('path')],
+            [(first.pk, 0), (first_reply.pk, 1), (nested.pk, 2),
+             (second.pk, 0)])
+        self.assertQuerysetEqual(
+            Comment.objects.filter(path__startswith=first_reply.path),
+            [first_reply, nested], ordered=False)
+
+    def test_depth_limit(self):
+        *_, deepest = self.chain(4)
+        extra = self.reply(deepest)
+        self.assertEqual(extra.depth, 3)
+        self.assertEqual(extra.parent_id, deepest.parent_id)
+        self.assertTrue(extra.path.startswith(deepest.parent.path))
+
+    def test_deleted_parent_keeps_replies_in_place(self):
+        root, reply = self.chain(2)
+        root.delete()
+        reply.refresh_from_db()
+        self.assertIsNone(reply.parent_id)
+        self.assertEqual(reply.depth, 1)
+
+    def test_detail_uses_one_comment_query(self):
+        url = reverse('blog:post_detail', args=(self.post.pk,))
+        root, *_ = self.chain(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        self.chain(4)
+        self.reply(root, author=self.author)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url)
+        self.assertEqual(len(many), len(few))
+        # Replies below the collapse depth are hidden behind a link.
+        self.assertEqual(
+            [comment.indent for comment in response.context['comments']],
+            [0, 1, 1, 0, 1])
+        self.assertContains(response, 'Ещё ответов: 2')
+
+    def test_thread_page(self):
+        root, *replies = self.chain(4)
+        self.reply()
+        response = self.client.get(reverse(
+            'blog:comment_thread', args=(self.post.pk, replies[0].pk)))
+        self.assertEqual(
+            [(comment.pk, comment.indent)
+             for comment in response.context['comments']],
+            [(reply.pk, number) for number, reply in enumerate(replies)])
+
+    def test_queued_comment_holds_replies(self):
+        root, queued, reply, nested = self.chain(4)
+        Comment.objects.filter(pk=queued.pk).update(is_published=False)
+        response = self.client.get(
+            reverse('blog:post_detail', args=(self.post.pk,)))
+        self.assertEqual(
+            [comment.pk for comment in response.context['comments']],
+            [root.pk])
+        self.assertNotContains(response, 'Ещё ответов')
+        response = self.client.get(reverse(
+            'blog:comment_thread', args=(self.post.pk, root.pk)))
+        self.assertEqual(
+            [comment.pk for comment in response.context['comments']],
+            [root.pk])
+        for comment in (queued, reply):
+            self.assertEqual(self.client.get(reverse(
+                'blog:comment_thread', args=(self.post.pk, comment.pk))
+            ).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_reply_view(self):
+        parent = self.reply(author=self.author)
+        self.client.force_login(self.reader)
+        url = reverse('blog:comment_create', args=(self.post.pk,))
+        response = self.client.get(url, {'parent': parent.pk})
+        self.assertEqual(response.context['parent'], parent)
+        self.client.post(url, {'text': 'answer', 'parent': parent.pk})
+        reply = Comment.objects.get(text='answer')
+        self.assertEqual(reply.parent, parent)
+        self.assertTrue(CommentNotification.objects.filter(
+            recipient=self.author, comment=reply).exists())
+        foreign = Comment.objects.create(
+            post=self.other_post, author=self.author, text='foreign')
+        response = self.client.post(url, {'text': 'x', 'parent': foreign.pk})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('parent', response.context['form'].errors)
@@ -0,0 +1,112 @@
+"""Threaded comments stored as materialised paths.
+
+The ``path`` of a comment is the path of its parent followed by its own
+primary key in fixed-width base 36, so sorting the comments of a post by
+``path`` lists every thread depth first with replies in the order they
+were written, and a subtree is a ``path__startswith`` range of the
+``(post, path)`` index. Both load in one ordered query and are laid out
+without any per-comment queries.
+
+Replies deeper than ``COMMENT_MAX_DEPTH`` are attached to the parent of
+the comment they answer. On pages, replies below ``COMMENT_COLLAPSE_DEPTH``
+are collapsed into a link to their thread, and a comment waiting for
+moderation hides its replies until it is published.
+"""
+from django.conf import settings
+
+SEGMENT_WIDTH = 7
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def segment(pk):
+    digits = []
+    while pk:
+        pk, digit = divmod(pk, len(DIGITS))
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rjust(SEGMENT_WIDTH, '0')
+
+
+def ancestor_paths(path):
+    return [
+        path[:end] for end in range(SEGMENT_WIDTH, len(path), SEGMENT_WIDTH)]
+
+
+def limit_depth(comment):
+    """Answer the grandparent instead of a parent at the maximum depth."""
+    parent = comment.parent
+    if parent is not None and parent.depth >= settings.COMMENT_MAX_DEPTH:
+        comment.parent_id = parent.parent_id
+        comment._thread_prefix = parent.path[:-SEGMENT_WIDTH]
+        comment._thread_depth = parent.depth
+
+
+def place(comment):
+    """Set ``path`` and ``depth`` of a saved comment, return the values."""
+    if hasattr(comment, '_thread_prefix'):
+        prefix, depth = comment._thread_prefix, comment._thread_depth
+    elif comment.parent_id is not None:
+        prefix, depth = comment.parent.path, comment.parent.depth + 1
+    else:
+        prefix, depth = '', 0
+    comment.path = prefix + segment(comment.pk)
+    comment.depth = depth
+    return comment.path, comment.depth
+
+
+def layout(comments, base_depth=0, collapse_depth=None):
+    """Published comments in thread order with ``indent`` and
+    ``hidden_replies``.
+
+    ``comments`` must be ordered by ``path``. Unpublished comments are
+    left out with their subtrees. Replies deeper than ``collapse_depth``
+    levels below ``base_depth`` are left out and counted in
+    ``hidden_replies`` of their ancestor at that depth, which in path
+    order is the last comment shown before them.
+    """
+    if collapse_depth is None:
+        collapse_depth = settings.COMMENT_COLLAPSE_DEPTH
+    shown = []
+    held = None
+    for comment in comments:
+        if held is not None and comment.path.startswith(held):
+            continue
+        if not comment.is_published:
+            held = comment.path
+            continue
+        comment.indent = comment.depth - base_depth
+        comment.hidden_replies = 0
+        if comment.indent > collapse_depth:
+            if shown and comment.path.startswith(shown[-1].path):
+                shown[-1].hidden_replies += 1
+            continue
+        shown.append(comment)
+    return shown
+
+
+def backfill(model, batch_size=2000):
+    """Place comments written by bulk inserts, which skip ``save()``.
+
+    Comments are placed in primary key order, so a parent is placed before
+    its replies.
+    """
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(model.objects.filter(path='', pk__gt=last_pk).order_by(
+            'pk').only('parent')[:batch_size])
+        if not batch:
+            return updated
+        placed = dict(
+            (pk, (path, depth)) for pk, path, depth in model.objects.filter(
+                pk__in={comment.parent_id for comment in batch}
+            ).exclude(path='').values_list('pk', 'path', 'depth'))
+        for comment in batch:
+            prefix, depth = '', 0
+            if comment.parent_id in placed:
+                prefix, depth = placed[comment.parent_id]
+                depth += 1
+            comment.path = prefix + segment(comment.pk)
+            comment.depth = depth
+            placed[comment.pk] = comment.path, comment.depth
+        updated += model.objects.bulk_update(batch, ('path', 'depth'))
+        last_pk = batch[-1].pk
@@ -9,7 +9,32 @@ urlpatterns = [
     path('posts/<int:pk>/', views.post_detail, name='post_detail'),
     path('posts/create/', views.PostCreate.as_view(), name='post_create'),
     path('category/<slug:slug>/', views.category_posts, name='category_posts'),
+    path('categories/', views.category_list, name='category_list'),
+    path('feed/', views.feed, name='feed'),
+    path('popular/', views.popular, name='popular'),
+    path('archive/<int:year>/', views.archive_posts, name='archive_year'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive_posts,
+        name='archive_month'
+    ),
+    path('locations/', views.location_list, name='location_list'),
+    path(
+        'autocomplete/<str:source>/',
+        views.autocomplete,
+        name='autocomplete'
+    ),
     path('posts/<int:pk>/edit/', views.PostUpdate.as_view(), name='post_edit'),
+    path(
+        'posts/<int:pk>/history/',
+        views.post_history,
+        name='post_history'
+    ),
+    path(
+        'posts/<int:pk>/history/<int:number>/',
+        views.post_revision,
+        name='post_revision'
+    ),
     path(
         'posts/<int:pk>/delete/',
         views.PostDelete.as_view(),
@@ -30,4 +55,19 @@ urlpatterns = [
         views.CommentDelete.as_view(),
         name='comment_delete'
     ),
+    path(
+        'posts/<int:post_pk>/thread/<int:pk>/',
+        views.comment_thread,
+        name='comment_thread'
+    ),
+    path(
+        'posts/<int:post_pk>/comment_history/<int:pk>/',
+        views.comment_history,
+        name='comment_history'
+    ),
+    path(
+        'posts/<int:post_pk>/comment_history/<int:pk>/<int:number>/',
+        views.comment_revision,
+        name='comment_revision'
+    ),
     ]
@@ -1,25 +1,41 @@
+from datetime import MAXYEAR, MINYEAR, timedelta
+from http import HTTPStatus
+
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
 from django.conf import settings
-from django.db.models import Q
-from django.shortcuts import (get_list_or_404, get_object_or_404, redirect,
-                              render)
+from django.db.models import Prefetch, Q, Sum
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.functional import cached_property
+from django.views.decorators.http import require_GET
 from django.views.generic import CreateView, DeleteView, UpdateView
 
-from .forms import CommentCreateForm, PostForm
-from .models import Category, Comment, Post
+from core.holes import cached, fill, shared_page
+from core.ratelimit import RateLimitMixin
+from . import archive
+from . import autocomplete as autocomplete_search
+from . import deletion
+from . import duplicates
+from . import feed as feeds
+from . import hits
+from . import revisions
+from . import threads
+from .forms import CommentCreateForm, CommentReplyForm, PostForm
+from .models import ArchiveMonth, Category, Comment, Location, Post
+
+# Larger keys overflow the 64-bit integers of the database.
+CURSOR_MAX_DIGITS = 18
 
 
+@shared_page('posts')
 def index(request):
-    posts = Post.objects.filter(
-        Q(category__isnull=True) | Q(category__is_published=True),
-        is_published=True,
-        pub_date__lt=timezone.now()
-    ).select_related('category', 'location', 'author'
-                     ).prefetch_related('comments')
+    posts = Post.objects.published().for_cards()
     paginator = Paginator(posts, settings.POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -31,41 +47,87 @@ def index(request):
 
 def post_detail(request, pk):
     post = get_object_or_404(
-        Post.objects.select_related('location', 'category', 'author')
-        .prefetch_related('comments', 'comments__author'),
+        Post.objects.select_related('category').only(
+            'author_id', 'is_published', 'pub_date', 'category__is_published'),
         pk=pk
     )
-    if request.user != post.author and (
-        not post.is_published
-        or (post.category is not None and not post.category.is_published)
-        or post.pub_date > timezone.now()
-    ):
+    if request.user.pk != post.author_id and not post.is_visible:
         raise PermissionDenied
-    form = CommentCreateForm()
+    hits.record_view(request, post)
+    return cached(
+        request, lambda: render_post_detail(request, pk),
+        shared=post.is_visible, groups=[f'post:{pk}'])
+
+
+def render_post_detail(request, pk):
+    post = get_object_or_404(
+        Post.objects.select_related('location', 'category', 'author')
+        .prefetch_related(Prefetch(
+            'comments',
+            Comment.objects.select_related('author').order_by('path', 'pk'),
+        )),
+        pk=pk
+    )
     context = {
         'post': post,
+        'comments': threads.layout(post.comments.all()),
+        'archived_comments': (
+            threads.layout(
+                post.archived_comments.select_related('author').order_by(
+                    'path', 'pk'),
+                collapse_depth=settings.COMMENT_MAX_DEPTH)
+            if post.archived_comments_count and 'archived' in request.GET
+            else None),
+        'related_posts': Post.objects.published().filter(
+            recommended_in__post=post
+        ).order_by('-recommended_in__score').for_cards()[
+            :settings.RELATED_POSTS_COUNT],
     }
-    if not request.user.is_anonymous:
-        form = CommentCreateForm()
-        context['form'] = form
     return render(request, 'blog/detail.html', context)
 
 
+@shared_page('post:{post_pk}')
+def comment_thread(request, post_pk, pk):
+    root = get_object_or_404(
+        Comment.objects.select_related('post'),
+        pk=pk,
+        post__in=Post.objects.published(),
+        post_id=post_pk,
+        is_published=True,
+    )
+    queued = Comment.objects.filter(post_id=post_pk, is_published=False)
+    if queued.filter(path__in=threads.ancestor_paths(root.path)).exists():
+        raise Http404
+    comments = Comment.objects.filter(
+        post_id=post_pk, path__startswith=root.path, is_published=True)
+    # Replies to queued comments wait for them, see threads.layout().
+    for path in queued.filter(path__startswith=root.path).values_list(
+            'path', flat=True):
+        comments = comments.exclude(path__startswith=path)
+    paginator = Paginator(
+        comments.select_related('author').order_by('path', 'pk'),
+        settings.COMMENTS_ON_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'post': root.post,
+        'root': root,
+        'page_obj': page_obj,
+        'comments': threads.layout(
+            page_obj, root.depth, settings.COMMENT_MAX_DEPTH),
+    }
+    return render(request, 'blog/thread.html', context)
+
+
+@shared_page('posts')
 def category_posts(request, slug):
     category = get_object_or_404(
         Category,
         slug=slug
     )
-    posts = get_list_or_404(
-        Post.objects.filter(
-            is_published=True,
-            pub_date__lt=timezone.now(),
-            category__is_published=True
-        ).select_related('location', 'category', 'author'
-                         ).prefetch_related('comments'),
-        category=category
-    )
+    posts = Post.objects.published().filter(category=category).for_cards()
     paginator = Paginator(posts, settings.POSTS_ON_PAGE)
+    if not paginator.count:
+        raise Http404
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
@@ -75,14 +137,186 @@ def category_posts(request, slug):
     return render(request, 'blog/category.html', context)
 
 
+def page_cursor(request):
+    """Primary key from ``?before=``, ``None`` if missing or invalid."""
+    before = request.GET.get('before', '')
+    if (before.isascii() and before.isdigit()
+            and len(before) <= CURSOR_MAX_DIGITS):
+        return int(before)
+    return None
+
+
+@login_required
+def feed(request):
+    page = feeds.feed_posts(request.user, before=page_cursor(request))
+    context = {
+        'posts': page[:settings.POSTS_ON_PAGE],
+        'next_before': (
+            page[settings.POSTS_ON_PAGE - 1].pk
+            if len(page) > settings.POSTS_ON_PAGE else None),
+    }
+    return render(request, 'blog/feed.html', context)
+
+
+@shared_page('posts')
+def popular(request):
+    since = timezone.localdate() - timedelta(days=settings.POPULAR_DAYS - 1)
+    posts = Post.objects.published().filter(
+        daily_views__day__gte=since
+    ).annotate(
+        recent_views=Sum('daily_views__views')
+    ).order_by('-recent_views', '-pub_date').for_cards()[
+        :settings.POPULAR_POSTS_COUNT]
+    context = {
+        'posts': posts,
+        'days': settings.POPULAR_DAYS,
+    }
+    return render(request, 'blog/popular.html', context)
+
+
+@shared_page('posts')
+def archive_posts(request, year, month=None):
+    # Local bounds of the first and last years may not fit in a datetime
+    # once converted to UTC.
+    if not 1 <= (month or 1) <= 12 or not MINYEAR < year < MAXYEAR:
+        raise Http404
+    start, end = archive.month_range(year, month)
+    posts = Post.objects.published().filter(
+        pub_date__gte=start, pub_date__lt=end
+    ).order_by('-pub_date', '-id')
+    before = page_cursor(request)
+    if before is not None:
+        anchor = Post.objects.filter(pk=before).values_list(
+            'pub_date', flat=True).first()
+        if anchor is not None:
+            posts = posts.filter(
+                Q(pub_date__lt=anchor) | Q(pub_date=anchor, id__lt=before))
+    page = list(posts.for_cards()[:settings.POSTS_ON_PAGE + 1])
+    context = {
+        'year': year,
+        'month': month,
+        'posts': page[:settings.POSTS_ON_PAGE],
+        'next_before': (
+            page[settings.POSTS_ON_PAGE - 1].pk
+            if len(page) > settings.POSTS_ON_PAGE else None),
+        'months': ArchiveMonth.objects.filter(
+            year=year, posts_count__gt=0),
+    }
+    return render(request, 'blog/archive.html', context)
+
+
+def directory(request, queryset, template_name):
+    paginator = Paginator(
+        queryset.filter(is_published=True), settings.DIRECTORY_ON_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, template_name, {'page_obj': page_obj})
+
+
+@shared_page('directories')
+def category_list(request):
+    return directory(
+        request, Category.objects.all(), 'blog/category_list.html')
+
+
+@shared_page('directories')
+def location_list(request):
+    return directory(
+        request, Location.objects.all(), 'blog/location_list.html')
+
+
+def history_owner(request, model, **lookup):
+    obj = get_object_or_404(model, **lookup)
+    if obj.author_id != request.user.pk:
+        raise PermissionDenied
+    return obj
+
+
+def render_history(request, owner, context):
+    context.update(
+        owner=owner,
+        revisions=owner.revisions.only('number', 'created_at'),
+    )
+    return render(request, 'blog/history.html', context)
+
+
+def render_revision(request, owner, number, context):
+    revision = get_object_or_404(owner.revisions, number=number)
+    newer = owner.revisions.filter(number__gt=number).order_by(
+        'number').first()
+    old = revisions.version(owner, revision)
+    new = (revisions.version(owner, newer) if newer
+           else revisions.content(owner))
+    model = type(owner)
+    context.update(
+        owner=owner,
+        revision=revision,
+        newer=newer,
+        diffs=[
+            (model._meta.get_field(field).verbose_name,
+             revisions.diff_lines(old[field], new[field]))
+            for field in old
+        ],
+    )
+    return render(request, 'blog/revision.html', context)
+
+
+@login_required
+def post_history(request, pk):
+    post = history_owner(request, Post, pk=pk)
+    return render_history(request, post, {'post': post})
+
+
+@login_required
+def post_revision(request, pk, number):
+    post = history_owner(request, Post, pk=pk)
+    return render_revision(request, post, number, {'post': post})
+
+
+@login_required
+def comment_history(request, post_pk, pk):
+    comment = history_owner(
+        request, Comment.objects.select_related('post'),
+        pk=pk, post_id=post_pk)
+    return render_history(
+        request, comment, {'post': comment.post, 'comment': comment})
+
+
+@login_required
+def comment_revision(request, post_pk, pk, number):
+    comment = history_owner(
+        request, Comment.objects.select_related('post'),
+        pk=pk, post_id=post_pk)
+    return render_revision(
+        request, comment, number, {'post': comment.post, 'comment': comment})
+
+
+@require_GET
+def autocomplete(request, source):
+    if source not in autocomplete_search.SOURCES:
+        raise Http404
+    return JsonResponse({
+        'results': autocomplete_search.search(
+            source, request.GET.get('q', '')),
+    })
+
+
 class PostMixing(LoginRequiredMixin):
     model = Post
     template_name = 'blog/create_post.html'
 
 
-class PostCreate(PostMixing, CreateView):
+class PostFormMixin(PostMixing):
     form_class = PostForm
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['oversized'] = getattr(self.request, 'oversized_uploads', ())
+        return kwargs
+
+
+class PostCreate(PostFormMixin, RateLimitMixin, CreateView):
+    ratelimit_policy = 'post_create'
+
     def get_success_url(self):
         return reverse_lazy(
             'users:profile', kwargs={'username': self.request.user.username})
@@ -92,8 +326,7 @@ class PostCreate(PostMixing, CreateView):
         return super().form_valid(form)
 
 
-class PostUpdate(PostMixing, UpdateView):
-    form_class = PostForm
+class PostUpdate(PostFormMixin, UpdateView):
 
     def dispatch(self, request, *args, **kwargs):
         instance = get_object_or_404(Post, pk=kwargs['pk'])
@@ -121,45 +354,69 @@ class PostDelete(PostMixing, DeleteView):
             return redirect('blog:post_detail', pk=instance.pk)
         return super().dispatch(request, *args, **kwargs)
 
+    def form_valid(self, form):
+        if not deletion.is_large(self.object):
+            return super().form_valid(form)
+        deletion.delete_post(self.object, self.request.user)
+        return redirect(self.get_success_url())
+
+
+def is_ajax(request):
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
 
 class CommentMixin(LoginRequiredMixin):
     model = Comment
     template_name = 'blog/create_comment.html'
+    fragment_template_name = 'includes/comment_card.html'
 
+    def render_fragment(self, comment):
+        comment.indent = comment.depth
+        html = fill(self.request, render_to_string(
+            self.fragment_template_name,
+            {'comment': comment, 'post': comment.post},
+            request=self.request,
+        ))
+        return JsonResponse({'id': comment.pk, 'html': html})
 
-class CommentCreate(CommentMixin, CreateView):
-    form_class = CommentCreateForm
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if is_ajax(self.request):
+            return self.render_fragment(self.object)
+        return response
 
-    def get_success_url(self):
-        return reverse_lazy(
-            'blog:post_detail',
-            kwargs={'pk': self.object.post.id}
-        )
+    def form_invalid(self, form):
+        if is_ajax(self.request):
+            return JsonResponse(
+                {'errors': form.errors}, status=HTTPStatus.BAD_REQUEST)
+        return super().form_invalid(form)
 
-    def form_valid(self, form):
-        form.instance.author = self.request.user
-        post = get_object_or_404(
-            Post, Q(category__isnull=True) | Q(category__is_published=True),
-            pk=self.kwargs['pk'], is_published=True,
-            pub_date__lte=timezone.now(),
-        )
-        form.instance.post = post
-        return super().form_valid(form)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        post = get_object_or_404(Post, pk=self.kwargs['pk'])
-        context['post'] = post
-        return context
+class CommentAuthorMixin(CommentMixin):
 
+    def dispatch(self, request, *args, **kwargs):
+        self.object = get_object_or_404(
+            Comment.objects.select_related('post', 'author'),
+            Q(post__category__isnull=True) | Q(
+                post__category__is_published=True),
+            pk=kwargs['pk'],
+            post__is_published=True,
+            post__pub_date__lte=timezone.now(),
+        )
+        if self.object.author_id != request.user.pk:
+            if is_ajax(request):
+                return JsonResponse(
+                    {'errors': {'__all__': ['Недостаточно прав']}},
+                    status=HTTPStatus.FORBIDDEN)
+            return redirect('blog:post_detail', pk=self.kwargs['post_pk'])
+        return super().dispatch(request, *args, **kwargs)
 
-class CommentUpdate(CommentMixin, UpdateView):
-    form_class = CommentCreateForm
+    def get_object(self, queryset=None):
+        return self.object
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = get_object_or_404(Post, pk=self.kwargs['post_pk'])
-        context['post'] = post
+        context['post'] = self.object.post
         return context
 
     def get_success_url(self):
@@ -168,41 +425,66 @@ class CommentUpdate(CommentMixin, UpdateView):
             kwargs={'pk': self.kwargs['post_pk']}
         )
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(
-            Comment,
-            Q(post__category__isnull=True) | Q(
-                post__category__is_published=True),
-            pk=kwargs['pk'],
-            post__is_published=True,
-            post__pub_date__lte=timezone.now(),
-        )
-        if instance.author != self.request.user:
-            return redirect('blog:post_detail', pk=self.kwargs['post_pk'])
-        return super().dispatch(request, *args, **kwargs)
 
-    def form_valid(self, form):
-        form.instance.is_edited = True
-        return super().form_valid(form)
+class CommentCreate(CommentMixin, RateLimitMixin, CreateView):
+    form_class = CommentReplyForm
+    ratelimit_policy = 'comment_create'
 
+    @cached_property
+    def commented_post(self):
+        return get_object_or_404(
+            Post.objects.published(), pk=self.kwargs['pk'])
 
-class CommentDelete(CommentMixin, DeleteView):
+    def get_initial(self):
+        return {'parent': self.request.GET.get('parent')}
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_or_404(
-            Comment,
-            Q(post__category__isnull=True) | Q(
-                post__category__is_published=True),
-            pk=kwargs['pk'],
-            post__is_published=True,
-            post__pub_date__lte=timezone.now(),
-        )
-        if instance.author != self.request.user:
-            return redirect('blog:post_detail', pk=self.kwargs['post_pk'])
-        return super().dispatch(request, *args, **kwargs)
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields['parent'].queryset = Comment.objects.filter(
+            post=self.kwargs['pk'], is_published=True)
+        return form
 
     def get_success_url(self):
         return reverse_lazy(
             'blog:post_detail',
-            kwargs={'pk': self.kwargs['post_pk']}
+            kwargs={'pk': self.object.post_id}
         )
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
+        form.instance.post = self.commented_post
+        action = settings.DUPLICATE_COMMENT_ACTION
+        if action and duplicates.find(
+                Comment.objects.only('text'), form.instance.text, limit=1):
+            if action == 'reject':
+                form.add_error('text', 'Такой комментарий уже оставляли.')
+                return self.form_invalid(form)
+            form.instance.is_published = False
+        return super().form_valid(form)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['post'] = self.commented_post
+        parent = context['form']['parent'].value()
+        context['parent'] = (
+            context['form'].fields['parent'].queryset.filter(
+                pk=parent).first()
+            if str(parent).isdigit() else None)
+        return context
+
+
+class CommentUpdate(CommentAuthorMixin, UpdateView):
+    form_class = CommentCreateForm
+
+    def form_valid(self, form):
+        form.instance.is_edited = True
+        return super().form_valid(form)
+
+
+class CommentDelete(CommentAuthorMixin, DeleteView):
+
+    def form_valid(self, form):
+        if is_ajax(self.request):
+            self.object.delete()
+            return JsonResponse({'id': self.kwargs['pk'], 'deleted': True})
+        return super().form_valid(form)
@@ -0,0 +1,20 @@
+"""Warm-up hooks of the blog, listed in ``WARMUP_HOOKS``."""
+from django.conf import settings
+from django.urls import reverse
+
+from . import autocomplete
+from .models import Category
+
+
+def prime_autocomplete():
+    for source in autocomplete.SOURCES:
+        autocomplete.search(source, '')
+
+
+def top_categories():
+    return [
+        reverse('blog:category_posts', args=(slug,))
+        for slug in Category.objects.filter(is_published=True).order_by(
+            '-posts_count').values_list('slug', flat=True)[
+                :settings.WARMUP_TOP_CATEGORIES]
+    ]
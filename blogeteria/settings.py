@@ -7,7 +7,135 @@ load_dotenv()
 
 POSTS_ON_PAGE = 9
 
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DIRECTORY_ON_PAGE = 30
+
+AUTOCOMPLETE_LIMIT = 20
+
+AUTOCOMPLETE_CACHE_SIZE = 512
+
+AUTOCOMPLETE_CACHE_TIMEOUT = 60
+
+RELATED_POSTS_COUNT = 5
+RELATED_CATEGORY_BOOST = 0.15
+RELATED_LOCATION_BOOST = 0.1
+# Upper bound for the scores of one block of posts, in bytes.
+RELATED_BLOCK_MEMORY = 64 * 2 ** 20
+
+DUPLICATE_SIMILARITY = 0.8
+DUPLICATE_CANDIDATES = 100
+# What CommentCreate does with a near-duplicate comment: 'queue' saves it
+# unpublished for moderation, 'reject' returns a form error, None allows it.
+DUPLICATE_COMMENT_ACTION = 'queue'
+
+REVISION_SNAPSHOT_EVERY = 10
+REVISION_RETENTION_DAYS = 365
+REVISION_MAX_COUNT = 50
+REVISION_THIN_AFTER_DAYS = 30
+
+VIEWS_FLUSH_INTERVAL = 30
+POPULAR_DAYS = 7
+POPULAR_POSTS_COUNT = 30
+
+FEED_FANOUT_LIMIT = 1000
+FEED_BATCH_SIZE = 1000
+
+TASKS_EAGER = False
+
+TASKS_MAX_ATTEMPTS = 5
+
+TASKS_RETRY_DELAY = 10
+
+TASKS_LEASE_SECONDS = 300
+
+API_PAGE_SIZE = 20
+
+API_MAX_PAGE_SIZE = 100
+
+EMAIL_BACKEND = getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+
+EMAIL_HOST = getenv('EMAIL_HOST', 'localhost')
+
+EMAIL_PORT = int(getenv('EMAIL_PORT', 25))
+
+EMAIL_HOST_USER = getenv('EMAIL_HOST_USER', '')
+
+EMAIL_HOST_PASSWORD = getenv('EMAIL_HOST_PASSWORD', '')
+
+EMAIL_USE_TLS = getenv('EMAIL_USE_TLS', '') == 'True'
+
+DEFAULT_FROM_EMAIL = getenv('DEFAULT_FROM_EMAIL', 'noreply@blogeteria.local')
+
+SITE_URL = getenv('SITE_URL', 'http://127.0.0.1:8000')
+
+DIGEST_BATCH_SIZE = 100
+
+COMMENTS_ARCHIVE_DAYS = 365
+
+COMMENT_MAX_DEPTH = 8
+COMMENT_COLLAPSE_DEPTH = 3
+COMMENTS_ON_PAGE = 50
+
+DELETION_CHUNK_SIZE = 500
+
+BULK_DELETE_THRESHOLD = 1000
+
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.MaxSizeUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+
+IMAGE_MAX_PIXELS = 25_000_000
+
+IMAGE_MAX_DIMENSION = 2048
+
+RATELIMIT_ENABLED = getenv('RATELIMIT_ENABLED', 'True') == 'True'
+
+# Set to e.g. 'HTTP_X_REAL_IP' behind a reverse proxy that sets it.
+RATELIMIT_IP_META = getenv('RATELIMIT_IP_META', 'REMOTE_ADDR')
+
+RATELIMIT_METHODS = ('POST',)
+
+RATELIMIT_PRUNE_AFTER = 24 * 60 * 60
+
+# Policy: [(scope, requests, seconds), ...], scope is 'ip' or 'user'.
+RATELIMITS = {
+    'login': [('ip', 10, 60)],
+    'registration': [('ip', 5, 60 * 60)],
+    'post_create': [('user', 10, 60 * 60), ('ip', 30, 60 * 60)],
+    'comment_create': [('user', 10, 60), ('ip', 30, 60)],
+}
+
+PAGE_CACHE_TIMEOUT = int(getenv('PAGE_CACHE_TIMEOUT', 0))
+
+# The page cache needs a backend shared by all workers, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache.
+CACHES = {
+    'default': {
+        'BACKEND': getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': getenv('CACHE_LOCATION', ''),
+    }
+}
+
+WARMUP_ON_START = getenv('WARMUP_ON_START', '') == 'True'
+
+WARMUP_URLS = ['/', '/?page=2', '/categories/', '/popular/', '/api/v1/posts/']
+
+WARMUP_HOOKS = [
+    'blog.warmup.prime_autocomplete',
+    'blog.warmup.top_categories',
+]
+
+WARMUP_TOP_CATEGORIES = 5
+
+PROFILE_SAMPLE_RATE = float(getenv('PROFILE_SAMPLE_RATE', 0))
+
+PROFILE_SLOW_MS = int(getenv('PROFILE_SLOW_MS', 0))
+
+PROFILE_SAMPLE_INTERVAL = 0.005
 
 USE_L10N = True
 
@@ -25,6 +153,19 @@ MEDIA_ROOT = BASE_DIR / 'media_dev'
 
 MEDIA_URL = 'media/'
 
+SITEMAP_ROOT = getenv('SITEMAP_ROOT', BASE_DIR / 'sitemaps')
+
+SITEMAP_URL = 'sitemaps/'
+
+SITEMAP_SEGMENT_SIZE = 50_000
+
+SITEMAP_DELAY = 300
+
+PROFILE_DIR = getenv('PROFILE_DIR', BASE_DIR / 'profiles')
+
+RELATED_MODEL_PATH = getenv(
+    'RELATED_MODEL_PATH', BASE_DIR / 'related' / 'model.npz')
+
 STATIC_DIR = BASE_DIR / 'static_dev'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -44,6 +185,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -54,18 +196,22 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.holes.HoleMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware'
 ]
 
 ROOT_URLCONF = 'blogeteria.urls'
 
+TEST_RUNNER = 'core.test_runner.TemporaryFilesRunner'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -1,19 +1,26 @@
 from django.contrib import admin
+from django.contrib.auth.views import LoginView
 from django.conf import settings
 from django.urls import include, path
 from django.conf.urls.static import static
 
+from core.ratelimit import ratelimit
+
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.forbidden'
 handler500 = 'core.views.server_error'
 
 urlpatterns = [
+    path('login/', ratelimit('login')(LoginView.as_view()), name='login'),
     path('', include('django.contrib.auth.urls')),
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('auth/', include('users.urls', namespace='users')),
+    path('api/', include('api.urls', namespace='api')),
     path('admin/', admin.site.urls),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += static(
+    settings.SITEMAP_URL, document_root=settings.SITEMAP_ROOT)
 
 if settings.DEBUG:
     import debug_toolbar
@@ -0,0 +1,42 @@
+from django.contrib import admin
+
+from .deletion import run_deletion
+from .models import DeletionJob, Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'created_at',
+        'finished_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('name', 'idempotency_key')
+    readonly_fields = ('locked_by', 'locked_until', 'last_error')
+
+
+admin.site.register(Task, TaskAdmin)
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'object_repr',
+        'content_type',
+        'status',
+        'deleted',
+        'total',
+        'created_at',
+        'finished_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('requested_by',)
+    actions = ('resume',)
+
+    @admin.action(description='Продолжить прерванные удаления')
+    def resume(self, request, queryset):
+        for job in queryset.filter(status=DeletionJob.Status.FAILED):
+            run_deletion.enqueue(job.pk)
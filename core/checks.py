@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_page_cache(app_configs, **kwargs):
+    """Page versions must be seen by every worker, see :mod:`core.holes`."""
+    if (settings.PAGE_CACHE_TIMEOUT
+            and settings.CACHES['default']['BACKEND'] in PROCESS_CACHES):
+        return [Error(
+            'PAGE_CACHE_TIMEOUT требует общего для всех процессов кэша.',
+            hint='Укажите в CACHES["default"] Redis, Memcached или '
+                 'DatabaseCache.',
+            id='core.E001',
+        )]
+    return []
@@ -0,0 +1,104 @@
+"""Background deletion of large object graphs in small transactions.
+
+Django's collector loads every related row into memory and deletes the
+whole graph in one transaction. :func:`schedule` records a
+:class:`DeletionJob` instead and the ``run_deletion`` task walks the
+reverse relations depth first: ``CASCADE`` children are deleted in
+chunks of ``DELETION_CHUNK_SIZE`` rows, ``SET_NULL`` references are
+cleared, and each chunk commits on its own so the write lock is held
+briefly. The final ``delete()`` of every chunk still goes through the
+collector, so signals and any other ``on_delete`` rule behave as usual.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import DeletionJob
+from .tasks import task
+
+
+def relations(model):
+    """Reverse foreign keys to ``model``'s primary key that can be chunked."""
+    for field in model._meta.get_fields(include_hidden=True):
+        if not field.auto_created or field.concrete or field.many_to_many:
+            continue
+        if field.field.target_field != model._meta.pk:
+            continue
+        if field.on_delete in (models.CASCADE, models.SET_NULL):
+            yield field
+
+
+def count_rows(queryset):
+    """Estimate how many rows deleting ``queryset`` will cascade to."""
+    total = queryset.count()
+    for relation in relations(queryset.model):
+        if relation.on_delete is models.CASCADE:
+            total += count_rows(relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': queryset.values('pk')}))
+    return total
+
+
+def delete_steps(queryset, chunk_size):
+    """Delete ``queryset`` children first, yielding rows deleted per chunk.
+
+    Every step runs in the caller's transaction; the generator does not
+    hold database state between steps, so each one can commit.
+    """
+    model = queryset.model
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        for relation in relations(model):
+            related = relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': pks})
+            if relation.on_delete is models.CASCADE:
+                yield from delete_steps(related, chunk_size)
+            else:
+                related.update(**{relation.field.name: None})
+        deleted, _ = model._base_manager.filter(pk__in=pks).delete()
+        yield deleted
+
+
+def schedule(obj, requested_by=None):
+    job = DeletionJob.objects.create(
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.pk,
+        object_repr=str(obj)[:256],
+        requested_by=requested_by,
+        total=count_rows(type(obj)._base_manager.filter(pk=obj.pk)),
+    )
+    run_deletion.enqueue(job.pk)
+    return job
+
+
+@task
+def run_deletion(job_id):
+    """Run or resume a job.
+
+    Steps start from whatever is left in the database, so a retry after a
+    failed step continues with that step.
+    """
+    job = DeletionJob.objects.select_related('content_type').get(pk=job_id)
+    job.status = DeletionJob.Status.RUNNING
+    job.save(update_fields=('status',))
+    model = job.content_type.model_class()
+    steps = delete_steps(
+        model._base_manager.filter(pk=job.object_id),
+        settings.DELETION_CHUNK_SIZE)
+    try:
+        while True:
+            with transaction.atomic():
+                deleted = next(steps, None)
+                if deleted is None:
+                    break
+                job.deleted += deleted
+                job.save(update_fields=('deleted',))
+    except Exception:
+        job.status = DeletionJob.Status.FAILED
+        job.save(update_fields=('status',))
+        raise
+    job.status = DeletionJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=('status', 'finished_at'))
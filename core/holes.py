@@ -0,0 +1,137 @@
+"""Shared page caching with per-user holes.
+
+Templates mark personalised bits with ``{% hole "name" key=value %}``
+(``{% load holes %}``). The tag only writes a placeholder, so the rest of
+the page is the same for every user and :func:`cached` can store it once
+per URL. :class:`HoleMiddleware` then replaces the placeholders of every
+HTML response, fresh from the cache or not, with the output of the hole
+function registered under ``name``, called as ``func(request, **kwargs)``.
+Hole functions live in the ``holes`` modules of the apps.
+
+Cached pages expire after ``PAGE_CACHE_TIMEOUT`` seconds or when one of
+their groups is passed to :func:`invalidate`, e.g. ``'post:1'`` for the
+pages of one post; a call without groups drops every page. ``0`` disables
+page caching. The group versions are kept in the default cache, which must
+be shared by all workers (see :mod:`core.checks`).
+"""
+import base64
+import hashlib
+import json
+import re
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.crypto import salted_hmac
+
+REGISTRY = {}
+ALL = 'all'
+# Markup of users is escaped or sanitised, but the secret part of the
+# marker also keeps anyone from forging a placeholder.
+MARKER = '<!--hole-{}:'.format(
+    salted_hmac('core.holes', 'marker').hexdigest()[:16])
+PLACEHOLDER_RE = re.compile(re.escape(MARKER) + r'([\w=-]+)-->')
+
+
+def hole(func):
+    REGISTRY[func.__name__] = func
+    return func
+
+
+def placeholder(name, kwargs):
+    payload = json.dumps([name, kwargs], separators=(',', ':'))
+    return f'{MARKER}{base64.urlsafe_b64encode(payload.encode()).decode()}-->'
+
+
+def fill(request, content):
+    def render(match):
+        name, kwargs = json.loads(base64.urlsafe_b64decode(match[1]))
+        func = REGISTRY.get(name)
+        return func(request, **kwargs) if func else ''
+
+    return PLACEHOLDER_RE.sub(render, content)
+
+
+class HoleMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (not response.streaming
+                and response.get('Content-Type', '').startswith('text/html')
+                and MARKER.encode() in response.content):
+            response.content = fill(
+                request, response.content.decode(response.charset))
+        return response
+
+
+def version_key(group):
+    return f'pages:version:{group}'
+
+
+def versions(groups):
+    keys = [version_key(group) for group in (ALL, *groups)]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        found.update(cache.get_many(missing))
+    return [found[key] for key in keys]
+
+
+def invalidate(*groups):
+    """Drop the cached pages of ``groups``, or of every group."""
+    if settings.PAGE_CACHE_TIMEOUT:
+        cache.set_many({
+            version_key(group): uuid.uuid4().hex
+            for group in groups or (ALL,)
+        }, None)
+
+
+def page_key(request, groups=()):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    version = hashlib.md5(':'.join(versions(groups)).encode()).hexdigest()
+    return f'pages:{version}:{translation.get_language()}:{url}'
+
+
+def cached(request, render, shared=True, groups=()):
+    """Return the shared part of the page from the cache or ``render()``.
+
+    The page is dropped when any of ``groups`` is invalidated.
+    ``shared=False`` bypasses the cache for pages that differ per user
+    outside of holes, e.g. a draft visible only to its author.
+    """
+    timeout = settings.PAGE_CACHE_TIMEOUT
+    if not timeout or not shared or request.method not in ('GET', 'HEAD'):
+        return render()
+    key = page_key(request, groups)
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content)
+    response = render()
+    if (response.status_code == 200 and not response.streaming
+            and not response.cookies):
+        cache.set(key, response.content, timeout)
+    return response
+
+
+def shared_page(*groups):
+    """Cache the output of the view for every user, see :func:`cached`.
+
+    ``groups`` are formatted with the keyword arguments of the view, e.g.
+    ``@shared_page('post:{post_pk}')``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached(
+                request, lambda: view(request, *args, **kwargs),
+                groups=[group.format(**kwargs) for group in groups])
+        return wrapper
+    return decorator
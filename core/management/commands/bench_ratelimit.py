@@ -0,0 +1,50 @@
+import multiprocessing
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import ratelimit
+from core.models import RateLimitBucket
+
+
+def worker(key, capacity, calls):
+    connections.close_all()
+    allowed = 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        allowed += ratelimit.take(key, capacity, 1e-9)[0]
+    elapsed = time.perf_counter() - started
+    connections.close_all()
+    return allowed, elapsed
+
+
+class Command(BaseCommand):
+    help = ('Замер накладных расходов ограничителя запросов: несколько '
+            'процессов одновременно берут токены из одного ведра. Число '
+            'пропущенных запросов должно совпасть с ёмкостью ведра.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--calls', type=int, default=500)
+        parser.add_argument('--capacity', type=int, default=100)
+
+    def handle(self, *args, **options):
+        key = f'bench:{uuid.uuid4().hex}'
+        processes, calls = options['processes'], options['calls']
+        connections.close_all()
+        try:
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                results = pool.starmap(
+                    worker, [(key, options['capacity'], calls)] * processes)
+        finally:
+            RateLimitBucket.objects.filter(key=key).delete()
+        allowed = sum(result[0] for result in results)
+        per_call = max(result[1] for result in results) / calls * 1e6
+        self.stdout.write(
+            f'{processes} процесс(а) × {calls} проверок: пропущено '
+            f'{allowed} из {options["capacity"]}, '
+            f'{per_call:.0f} мкс на проверку')
+        if allowed != options['capacity']:
+            self.stderr.write('Ведро потеряло обновления!')
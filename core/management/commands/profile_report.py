@@ -0,0 +1,56 @@
+import gzip
+import io
+import marshal
+import pstats
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import UNSAFE_CHARS_RE
+
+SORT_KEYS = ('tottime', 'cumulative', 'ncalls')
+
+
+class LoadedProfile:
+    """Adapter that lets ``pstats.Stats`` read an unpacked stats dict."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Сводный отчёт по сохранённым профилям запросов: '
+            'самые затратные функции по всем или выбранным view.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.PROFILE_DIR)
+        parser.add_argument('--top', type=int, default=30)
+        parser.add_argument('--sort', choices=SORT_KEYS, default='tottime')
+        parser.add_argument(
+            '--view', default='',
+            help='Учитывать только профили view с этой подстрокой в имени')
+
+    def handle(self, *args, **options):
+        view = UNSAFE_CHARS_RE.sub('_', options['view'])
+        paths = sorted(
+            path for path in Path(options['dir']).glob('*.prof.gz')
+            if view in path.name)
+        if not paths:
+            raise CommandError('Профили не найдены')
+        stats = None
+        report = io.StringIO()
+        for path in paths:
+            with gzip.open(path, 'rb') as stream:
+                profile = LoadedProfile(marshal.loads(stream.read()))
+            if stats is None:
+                stats = pstats.Stats(profile, stream=report)
+            else:
+                stats.add(profile)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(
+            options['top'])
+        self.stdout.write(f'Профилей: {len(paths)}')
+        self.stdout.write(report.getvalue())
@@ -0,0 +1,70 @@
+import logging
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+logger = logging.getLogger(__name__)
+
+POOLS = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+
+class Command(BaseCommand):
+    help = ('Обработчик фоновых задач: забирает готовые к запуску задачи '
+            'из очереди и выполняет их в пуле потоков или процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--pool', choices=POOLS, default='thread',
+            help='Пул потоков или процессов (для CPU-ёмких задач)')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить все готовые задачи и выйти')
+        parser.add_argument(
+            '--prune', type=int, metavar='DAYS',
+            help='Удалить выполненные задачи старше DAYS дней и выйти')
+
+    def handle(self, *args, **options):
+        if options['prune'] is not None:
+            deleted = tasks.prune(timedelta(days=options['prune']))
+            self.stdout.write(f'Удалено задач: {deleted}')
+            return
+        workers = options['workers']
+        # Forked workers must not share the parent's database connection.
+        connections.close_all()
+        running = set()
+        with POOLS[options['pool']](max_workers=workers) as pool:
+            try:
+                while True:
+                    for pk in tasks.claim(workers - len(running)):
+                        running.add(pool.submit(tasks.run, pk))
+                    if running:
+                        done, running = wait(
+                            running, timeout=options['poll_interval'],
+                            return_when=FIRST_COMPLETED)
+                        for future in done:
+                            # Errors of the task itself are recorded by
+                            # tasks.run; anything else leaves the row leased
+                            # until it expires and must not stop the loop.
+                            try:
+                                future.result()
+                            except Exception:
+                                logger.exception('Сбой обработчика задач')
+                    elif options['once']:
+                        break
+                    else:
+                        time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write('Остановка, ждём выполняющиеся задачи')
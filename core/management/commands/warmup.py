@@ -0,0 +1,80 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from blog.models import Post
+from core import warmup
+
+MODES = ('cold', 'warm')
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction + 0.5) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Прогревает процесс: шаблоны, URL, кэши и первые страницы, и '
+            'печатает время каждого шага. С --measure N запускает N '
+            'холодных и N прогретых процессов и сравнивает задержку их '
+            'первых запросов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--measure', type=int, default=0, metavar='N',
+            help='Сравнить задержку первых запросов на N процессах')
+        parser.add_argument('--probe', choices=MODES, help=(
+            'Служебный режим для --measure: выполнить запросы в этом '
+            'процессе и вывести задержки в JSON'))
+
+    def handle(self, *args, **options):
+        if options['probe']:
+            self.probe(options['probe'] == 'warm')
+        elif options['measure']:
+            self.measure(options['measure'])
+        else:
+            for step, elapsed in warmup.warm_up().items():
+                self.stdout.write(f'{step:14} {elapsed * 1000:8.1f} ms')
+
+    def probe(self, warm):
+        if warm:
+            warmup.warm_up()
+        paths = warmup.run_hooks()
+        post = Post.objects.published().order_by('-pub_date').first()
+        if post is not None:
+            # Not requested during warm-up, shows the generic effect.
+            paths.append(reverse('blog:post_detail', args=(post.pk,)))
+        handler = WSGIHandler()
+        timings = []
+        for path in paths:
+            started = time.perf_counter()
+            warmup.request(handler, path)
+            timings.append(time.perf_counter() - started)
+        self.stdout.write(json.dumps(timings))
+
+    def measure(self, count):
+        for mode in MODES:
+            first, every = [], []
+            for _ in range(count):
+                result = subprocess.run(
+                    [sys.executable, '-m', 'django', 'warmup',
+                     '--probe', mode],
+                    capture_output=True, text=True)
+                if result.returncode:
+                    raise CommandError(result.stderr)
+                timings = json.loads(result.stdout.splitlines()[-1])
+                first.append(timings[0])
+                every += timings
+            self.stdout.write(
+                f'{mode:5} первый запрос: '
+                f'p50 {statistics.median(first) * 1000:7.1f} ms  '
+                f'p99 {percentile(first, 0.99) * 1000:7.1f} ms;  '
+                f'все запросы: '
+                f'p50 {statistics.median(every) * 1000:7.1f} ms  '
+                f'p99 {percentile(every, 0.99) * 1000:7.1f} ms')
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_deletionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('key', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('tokens', models.FloatField(verbose_name='Токены')),
+                ('updated_at', models.FloatField(db_index=True, verbose_name='Обновлено (Unix time)')),
+                ('allowed', models.BooleanField(default=True, verbose_name='Последний запрос разрешён')),
+            ],
+            options={
+                'verbose_name': 'Ограничитель частоты',
+                'verbose_name_plural': 'Ограничители частоты',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deletionjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class PublishedModel(models.Model):
@@ -14,3 +16,113 @@ class PublishedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField('Задача', max_length=256)
+    args = models.JSONField('Позиционные аргументы', default=list)
+    kwargs = models.JSONField('Именованные аргументы', default=dict)
+    idempotency_key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=256,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=5)
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'), name='core_task_queue_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.get_status_display()})'
+
+
+class DeletionJob(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Завершено'
+        FAILED = 'failed', 'Ошибка'
+
+    content_type = models.ForeignKey(
+        'contenttypes.ContentType',
+        verbose_name='Тип объекта',
+        on_delete=models.CASCADE,
+    )
+    object_id = models.PositiveBigIntegerField('Идентификатор объекта')
+    object_repr = models.CharField('Объект', max_length=256)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Инициатор',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    total = models.PositiveIntegerField('Строк к удалению', default=0)
+    deleted = models.PositiveIntegerField('Удалено строк', default=0)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновое удаление'
+        verbose_name_plural = 'Фоновые удаления'
+        ordering = ('-created_at',)
+
+    def __str__(self):
+        return f'{self.object_repr} ({self.get_status_display()})'
+
+    @property
+    def progress(self):
+        if self.status == self.Status.DONE:
+            return 1.0
+        return min(self.deleted / self.total, 1.0) if self.total else 0.0
+
+
+class RateLimitBucket(models.Model):
+    key = models.CharField('Ключ', max_length=200, primary_key=True)
+    tokens = models.FloatField('Токены')
+    updated_at = models.FloatField('Обновлено (Unix time)', db_index=True)
+    allowed = models.BooleanField('Последний запрос разрешён', default=True)
+
+    class Meta:
+        verbose_name = 'Ограничитель частоты'
+        verbose_name_plural = 'Ограничители частоты'
+
+    def __str__(self):
+        return f'{self.key}: {self.tokens:.2f}'
@@ -0,0 +1,163 @@
+"""Sampled request profiling.
+
+``ProfilingMiddleware`` runs a random ``PROFILE_SAMPLE_RATE`` fraction of
+requests under :mod:`cProfile`. With ``PROFILE_SLOW_MS`` set, a background
+thread also samples the stacks of every running request and keeps the
+samples of requests that turned out slower than the threshold. Profiles
+are written as gzipped marshalled :mod:`pstats` dictionaries named after
+the view and request id; ``manage.py profile_report`` aggregates them.
+
+With both settings at zero the middleware removes itself at startup.
+"""
+import cProfile
+import gzip
+import marshal
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+MAX_DEPTH = 64
+UNSAFE_CHARS_RE = re.compile(r'[^\w.-]+')
+
+
+def frame_key(code):
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+class StackSampler(threading.Thread):
+    """Counts the call stacks of registered threads every ``interval``."""
+
+    def __init__(self, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.interval = interval
+        self.threads = {}
+
+    def track(self, thread_id):
+        self.threads[thread_id] = Counter()
+
+    def untrack(self, thread_id):
+        return self.threads.pop(thread_id, Counter())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for thread_id, samples in list(self.threads.items()):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(frame_key(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    samples[tuple(stack)] += 1
+
+
+def samples_to_stats(samples, interval):
+    """Convert stack samples to the ``pstats`` dictionary format."""
+    stats = {}
+    for stack, count in samples.items():
+        elapsed = count * interval
+        for depth, key in enumerate(dict.fromkeys(stack)):
+            calls, _, own, total, callers = stats.get(
+                key, (0, 0, 0.0, 0.0, {}))
+            if depth == 0:
+                own += elapsed
+            stats[key] = (calls + count, calls + count, own,
+                          total + elapsed, callers)
+    return stats
+
+
+def write_profile(stats, view_name, request_id):
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = UNSAFE_CHARS_RE.sub('_', view_name)
+    path = directory / (
+        f'{timezone.now():%Y%m%d-%H%M%S}-{name}-{request_id}.prof.gz')
+    with gzip.open(path, 'wb') as stream:
+        stream.write(marshal.dumps(stats))
+    return path
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_SAMPLE_RATE and not settings.PROFILE_SLOW_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampling = bool(settings.PROFILE_SLOW_MS)
+        self.sampler = None
+        self.sampler_pid = None
+        self.sampler_lock = threading.Lock()
+
+    def get_sampler(self):
+        """The sampler thread of this process, started on first use.
+
+        Threads do not survive a fork, so a middleware built in a
+        ``gunicorn --preload`` master starts a sampler in every worker.
+        """
+        if not self.sampling:
+            return None
+        pid = os.getpid()
+        if self.sampler_pid != pid:
+            with self.sampler_lock:
+                if self.sampler_pid != pid:
+                    self.sampler = StackSampler(
+                        settings.PROFILE_SAMPLE_INTERVAL)
+                    self.sampler.start()
+                    self.sampler_pid = pid
+        return self.sampler
+
+    def __call__(self, request):
+        request_id = UNSAFE_CHARS_RE.sub(
+            '', request.headers.get('X-Request-ID', ''))[:64]
+        request_id = request_id or uuid.uuid4().hex
+        if random.random() < settings.PROFILE_SAMPLE_RATE:
+            response, stats = self.profile(request)
+        else:
+            response, stats = self.sample(request)
+        if stats:
+            match = request.resolver_match
+            write_profile(
+                stats, match.view_name if match else 'unresolved', request_id)
+        response.headers.setdefault('X-Request-ID', request_id)
+        return response
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread.
+            return self.sample(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        return response, profiler.stats
+
+    def sample(self, request):
+        sampler = self.get_sampler()
+        if sampler is None:
+            return self.get_response(request), None
+        thread_id = threading.get_ident()
+        sampler.track(thread_id)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = sampler.untrack(thread_id)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < settings.PROFILE_SLOW_MS or not samples:
+            return response, None
+        return response, samples_to_stats(samples, sampler.interval)
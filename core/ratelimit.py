@@ -0,0 +1,125 @@
+"""Token-bucket rate limiting shared by all worker processes.
+
+``RATELIMITS`` maps a policy name to ``(scope, limit, period)`` rules:
+up to ``limit`` requests in a burst, refilled at ``limit / period`` per
+second, counted per client IP (``'ip'``) or per signed-in user
+(``'user'``). Buckets are rows of :class:`~core.models.RateLimitBucket`,
+and every check refills and takes a token in a single atomic
+``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` statement, so
+concurrent workers never lose updates. A rejected request gets ``429``
+with ``Retry-After``.
+
+Apply a policy with :func:`ratelimit` on function views or with
+:class:`RateLimitMixin` on class-based ones.
+"""
+import math
+import random
+import time
+from functools import wraps
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+
+from .models import RateLimitBucket
+from .views import too_many_requests
+
+PRUNE_PROBABILITY = 0.001
+
+
+class Rule(NamedTuple):
+    scope: str
+    limit: int
+    period: float
+
+    @property
+    def rate(self):
+        return self.limit / self.period
+
+
+def client_ip(request):
+    return request.META.get(settings.RATELIMIT_IP_META, '') or 'unknown'
+
+
+def bucket_key(policy, rule, request):
+    if rule.scope == 'user':
+        if not request.user.is_authenticated:
+            return None
+        return f'{policy}:user:{request.user.pk}'
+    return f'{policy}:ip:{client_ip(request)}'
+
+
+def take(key, capacity, rate, now=None):
+    """Take a token from the bucket, return ``(allowed, tokens_left)``."""
+    now = time.time() if now is None else now
+    quote = connection.ops.quote_name
+    table = quote(RateLimitBucket._meta.db_table)
+    key_column = quote('key')
+    refilled = f'{table}.tokens + (%(now)s - {table}.updated_at) * %(rate)s'
+    capped = (f'CASE WHEN {refilled} > %(capacity)s THEN %(capacity)s '
+              f'ELSE {refilled} END')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({key_column}, tokens, updated_at, allowed) '
+            f'VALUES (%(key)s, %(capacity)s - 1, %(now)s, TRUE) '
+            f'ON CONFLICT ({key_column}) DO UPDATE SET '
+            f'tokens = CASE WHEN {capped} >= 1 THEN {capped} - 1 '
+            f'ELSE {capped} END, '
+            f'allowed = {capped} >= 1, '
+            f'updated_at = %(now)s '
+            f'RETURNING allowed, tokens',
+            {'key': key, 'capacity': capacity, 'rate': rate, 'now': now},
+        )
+        allowed, tokens = cursor.fetchone()
+    return bool(allowed), tokens
+
+
+def prune(now=None):
+    """Delete buckets that have been full for a day, they hold no state."""
+    now = time.time() if now is None else now
+    deleted, _ = RateLimitBucket.objects.filter(
+        updated_at__lt=now - settings.RATELIMIT_PRUNE_AFTER).delete()
+    return deleted
+
+
+def check(policy, request):
+    """Return the seconds to wait, or ``0`` if the request may proceed."""
+    if not settings.RATELIMIT_ENABLED:
+        return 0
+    if random.random() < PRUNE_PROBABILITY:
+        prune()
+    wait = 0
+    for rule in map(Rule._make, settings.RATELIMITS[policy]):
+        key = bucket_key(policy, rule, request)
+        if key is None:
+            continue
+        allowed, tokens = take(key, rule.limit, rule.rate)
+        if not allowed:
+            wait = max(wait, math.ceil((1 - tokens) / rule.rate))
+    return wait
+
+
+def limited(policy, request):
+    """The ``429`` response for a throttled request, otherwise ``None``."""
+    if request.method in settings.RATELIMIT_METHODS:
+        wait = check(policy, request)
+        if wait:
+            return too_many_requests(request, wait)
+    return None
+
+
+def ratelimit(policy):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return limited(policy, request) or view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMixin:
+    ratelimit_policy = None
+
+    def dispatch(self, request, *args, **kwargs):
+        return (limited(self.ratelimit_policy, request)
+                or super().dispatch(request, *args, **kwargs))
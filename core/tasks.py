@@ -0,0 +1,135 @@
+"""Small durable task queue stored in the ``core_task`` table.
+
+Functions decorated with :func:`task` are registered by dotted name and can
+be scheduled with ``func.enqueue(*args, **kwargs)``. The row is inserted
+only after the surrounding transaction commits, so workers never see
+tasks for data that was rolled back. ``manage.py run_tasks`` executes
+them with retries and exponential backoff.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def task(func=None, *, max_attempts=None):
+    if func is None:
+        return partial(task, max_attempts=max_attempts)
+    name = f'{func.__module__}.{func.__qualname__}'
+    REGISTRY[name] = func
+    func.task_name = name
+    func.max_attempts = max_attempts or settings.TASKS_MAX_ATTEMPTS
+    func.enqueue = partial(enqueue, func)
+    return func
+
+
+def enqueue(func, *args, idempotency_key=None, run_after=None, **kwargs):
+    """Schedule ``func(*args, **kwargs)`` once the transaction commits.
+
+    A task with an ``idempotency_key`` that is already queued (or was kept
+    after finishing) is not added again.
+    """
+    transaction.on_commit(partial(
+        _insert, func, args, kwargs, idempotency_key, run_after))
+
+
+def _insert(func, args, kwargs, idempotency_key, run_after):
+    if settings.TASKS_EAGER:
+        func(*args, **kwargs)
+        return
+    Task.objects.bulk_create([Task(
+        name=func.task_name,
+        args=list(args),
+        kwargs=kwargs,
+        idempotency_key=idempotency_key,
+        max_attempts=func.max_attempts,
+        run_after=run_after or timezone.now(),
+    )], ignore_conflicts=True)
+
+
+def claimable():
+    now = timezone.now()
+    return (
+        Q(status=Task.Status.PENDING, run_after__lte=now)
+        | Q(status=Task.Status.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(limit):
+    """Lease up to ``limit`` due tasks to this worker and return their ids.
+
+    Expired leases of crashed workers are claimed again. The random token
+    tells which rows this worker won when several poll at once.
+    """
+    if limit <= 0:
+        return []
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        candidates = list(Task.objects.filter(claimable()).order_by(
+            'run_after', 'id').values_list('id', flat=True)[:limit])
+        if not candidates:
+            return []
+        Task.objects.filter(claimable(), pk__in=candidates).update(
+            status=Task.Status.RUNNING,
+            locked_by=token,
+            locked_until=timezone.now() + timedelta(
+                seconds=settings.TASKS_LEASE_SECONDS),
+            attempts=F('attempts') + 1,
+        )
+    return list(Task.objects.filter(
+        locked_by=token, status=Task.Status.RUNNING
+    ).values_list('id', flat=True))
+
+
+def run(pk):
+    close_old_connections()
+    try:
+        task_row = Task.objects.get(pk=pk)
+        try:
+            func = REGISTRY[task_row.name]
+            func(*task_row.args, **task_row.kwargs)
+        except Exception:
+            logger.exception('Задача %s завершилась с ошибкой', task_row)
+            fail(task_row, traceback.format_exc())
+        else:
+            task_row.status = Task.Status.DONE
+            task_row.finished_at = timezone.now()
+            task_row.locked_by = ''
+            task_row.save(update_fields=(
+                'status', 'finished_at', 'locked_by'))
+    finally:
+        close_old_connections()
+
+
+def fail(task_row, error):
+    task_row.last_error = error
+    task_row.locked_by = ''
+    if task_row.attempts >= task_row.max_attempts:
+        task_row.status = Task.Status.FAILED
+        task_row.finished_at = timezone.now()
+    else:
+        task_row.status = Task.Status.PENDING
+        task_row.run_after = timezone.now() + timedelta(
+            seconds=settings.TASKS_RETRY_DELAY * 2 ** (task_row.attempts - 1))
+    task_row.save(update_fields=(
+        'last_error', 'locked_by', 'status', 'finished_at', 'run_after'))
+
+
+def prune(older_than):
+    deleted, _ = Task.objects.filter(
+        status=Task.Status.DONE,
+        finished_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
@@ -0,0 +1,30 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TemporaryFilesRunner(DiscoverRunner):
+    """Keep files written by tests out of the project directory.
+
+    Sitemaps, profiles, uploads and the related posts model go to a
+    temporary directory that is removed after the run.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.files_root = Path(tempfile.mkdtemp(prefix='blogeteria-tests-'))
+        self.files_override = override_settings(
+            SITEMAP_ROOT=self.files_root / 'sitemaps',
+            PROFILE_DIR=self.files_root / 'profiles',
+            MEDIA_ROOT=self.files_root / 'media',
+            RELATED_MODEL_PATH=self.files_root / 'related' / 'model.npz',
+        )
+        self.files_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.files_override.disable()
+        shutil.rmtree(self.files_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,62 @@
+import json
+
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import checks, holes
+
+
+@holes.hole
+def greeting(request, name):
+    return f'<b>{request.user}, {name}</b>'
+
+
+class TestHoles(SimpleTestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = 'reader'
+
+    def middleware(self, response):
+        return holes.HoleMiddleware(lambda request: response)(self.request)
+
+    def test_placeholder_is_filled(self):
+        content = 'a ' + holes.placeholder('greeting', {'name': '-->'}) + ' b'
+        self.assertEqual(
+            holes.fill(self.request, content), 'a <b>reader, --></b> b')
+
+    def test_unknown_and_forged_holes(self):
+        forged = holes.placeholder('greeting', {'name': 'x'}).replace(
+            holes.MARKER, '<!--hole-0000000000000000:')
+        content = holes.placeholder('missing', {}) + forged
+        self.assertEqual(holes.fill(self.request, content), forged)
+
+    def test_middleware_fills_html_only(self):
+        placeholder = holes.placeholder('greeting', {'name': 'x'})
+        response = self.middleware(HttpResponse(placeholder))
+        self.assertEqual(response.content.decode(), '<b>reader, x</b>')
+        response = self.middleware(JsonResponse({'html': placeholder}))
+        self.assertIn(holes.MARKER, json.loads(response.content)['html'])
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_groups_are_invalidated_separately(self):
+        key = holes.page_key(self.request, ['post:1'])
+        holes.invalidate('post:2')
+        self.assertEqual(holes.page_key(self.request, ['post:1']), key)
+        holes.invalidate('post:1')
+        self.assertNotEqual(holes.page_key(self.request, ['post:1']), key)
+        key = holes.page_key(self.request, ['post:2'])
+        holes.invalidate()
+        self.assertNotEqual(holes.page_key(self.request, ['post:2']), key)
+
+    def test_page_cache_needs_shared_backend(self):
+        self.assertEqual(checks.check_page_cache(None), [])
+        with override_settings(PAGE_CACHE_TIMEOUT=60):
+            self.assertEqual(
+                [error.id for error in checks.check_page_cache(None)],
+                ['core.E001'])
+            shared = {'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': 'redis://localhost:6379'}}
+            with override_settings(CACHES=shared):
+                self.assertEqual(checks.check_page_cache(None), [])
@@ -0,0 +1,76 @@
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import ProfilingMiddleware
+
+
+def slow_view(request):
+    time.sleep(0.05)
+    return HttpResponse()
+
+
+class TestProfilingMiddleware(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def profiles(self):
+        return list(self.directory.glob('*.prof.gz'))
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(slow_view)
+
+    def test_sampled_request_is_profiled(self):
+        with override_settings(
+                PROFILE_SAMPLE_RATE=1, PROFILE_DIR=self.directory):
+            response = self.client.get(
+                reverse('pages:about'), HTTP_X_REQUEST_ID='abc-1')
+        self.assertEqual(response.headers['X-Request-ID'], 'abc-1')
+        [path] = self.profiles()
+        self.assertIn('pages_about-abc-1', path.name)
+        output = StringIO()
+        call_command(
+            'profile_report', dir=self.directory, view='pages:about',
+            stdout=output)
+        self.assertIn('Профилей: 1', output.getvalue())
+        self.assertIn('function calls', output.getvalue())
+
+    def test_slow_request_is_sampled(self):
+        with override_settings(
+                PROFILE_SLOW_MS=20, PROFILE_SAMPLE_INTERVAL=0.001,
+                PROFILE_DIR=self.directory):
+            middleware = ProfilingMiddleware(slow_view)
+            middleware(RequestFactory().get('/'))
+            self.assertEqual(len(self.profiles()), 1)
+            with override_settings(PROFILE_SLOW_MS=10_000):
+                middleware(RequestFactory().get('/'))
+            self.assertEqual(len(self.profiles()), 1)
+        output = StringIO()
+        call_command(
+            'profile_report', dir=self.directory, sort='cumulative',
+            stdout=output)
+        self.assertIn('slow_view', output.getvalue())
+
+    @override_settings(PROFILE_SLOW_MS=20)
+    def test_sampler_starts_in_each_process(self):
+        middleware = ProfilingMiddleware(slow_view)
+        self.assertIsNone(middleware.sampler)
+        with mock.patch('os.getpid', return_value=1):
+            master = middleware.get_sampler()
+            self.assertIs(middleware.get_sampler(), master)
+        with mock.patch('os.getpid', return_value=2):
+            worker = middleware.get_sampler()
+        self.assertIsNot(worker, master)
+        self.assertTrue(worker.is_alive())
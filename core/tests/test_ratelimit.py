@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from core import ratelimit
+from core.models import RateLimitBucket
+
+User = get_user_model()
+
+
+class TestTokenBucket(TestCase):
+
+    def test_burst_then_refill(self):
+        results = [ratelimit.take('key', 3, 1, now=100)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        self.assertFalse(ratelimit.take('key', 3, 1, now=100.5)[0])
+        self.assertTrue(ratelimit.take('key', 3, 1, now=101.5)[0])
+        # Tokens never exceed the capacity however long the bucket idles.
+        results = [
+            ratelimit.take('key', 3, 1, now=1000)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_prune(self):
+        ratelimit.take('old', 1, 1, now=0)
+        ratelimit.take('new', 1, 1)
+        self.assertEqual(ratelimit.prune(), 1)
+        self.assertQuerysetEqual(
+            RateLimitBucket.objects.values_list('key', flat=True), ['new'])
+
+
+@override_settings(RATELIMITS={
+    'login': [('ip', 2, 60)],
+    'comment_create': [('user', 1, 60), ('ip', 10, 60)],
+})
+class TestRateLimitedViews(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='user')
+        cls.post = Post.objects.create(
+            title='title', text='text', author=cls.user,
+            pub_date=timezone.now())
+
+    def test_login_is_limited_per_ip(self):
+        url = reverse('login')
+        data = {'username': 'user', 'password': 'wrong'}
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post(url, data).status_code, HTTPStatus.OK)
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+        response = self.client.post(url, data, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_comments_are_limited_per_user(self):
+        self.client.force_login(self.user)
+        url = reverse('blog:comment_create', args=(self.post.pk,))
+        self.client.post(url, {'text': 'first'})
+        response = self.client.post(
+            url, {'text': 'second'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('__all__', response.json()['errors'])
+        self.assertEqual(self.post.comments.count(), 1)
+
+    def test_user_rules_skip_anonymous(self):
+        request = RequestFactory().post('/')
+        request.user = AnonymousUser()
+        self.assertEqual(ratelimit.check('comment_create', request), 0)
+        self.assertQuerysetEqual(
+            RateLimitBucket.objects.values_list('key', flat=True),
+            ['comment_create:ip:127.0.0.1'])
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(3):
+            response = self.client.post(reverse('login'), {})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
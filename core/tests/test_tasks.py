@@ -0,0 +1,108 @@
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core import tasks
+from core.models import Task
+
+CALLS = []
+
+
+@tasks.task
+def record(value):
+    CALLS.append(value)
+
+
+@tasks.task(max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class TestEnqueue(TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_inserted_only_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.enqueue(1)
+            self.assertFalse(Task.objects.exists())
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.name, record.task_name)
+        self.assertEqual(task_row.args, [1])
+
+    def test_idempotency_key(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.enqueue(1, idempotency_key='once')
+            record.enqueue(2, idempotency_key='once')
+        self.assertEqual(Task.objects.count(), 1)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.enqueue(3)
+        self.assertEqual(CALLS, [3])
+        self.assertFalse(Task.objects.exists())
+
+    def test_retries_then_fails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            explode.enqueue()
+        [pk] = tasks.claim(10)
+        tasks.run(pk)
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.status, Task.Status.PENDING)
+        self.assertIn('boom', task_row.last_error)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(run_after=task_row.created_at)
+        [pk] = tasks.claim(10)
+        tasks.run(pk)
+        task_row.refresh_from_db()
+        self.assertEqual(task_row.status, Task.Status.FAILED)
+        self.assertEqual(task_row.attempts, 2)
+
+
+class TestWorker(TransactionTestCase):
+
+    def setUp(self):
+        CALLS.clear()
+
+    def test_run_tasks_once(self):
+        for value in range(5):
+            record.enqueue(value)
+        # The in-memory test database is shared between threads and fails
+        # with "table is locked" instead of waiting, so run one at a time.
+        call_command('run_tasks', once=True, workers=1, stdout=StringIO())
+        self.assertEqual(sorted(CALLS), list(range(5)))
+        self.assertEqual(
+            Task.objects.filter(status=Task.Status.DONE).count(), 5)
+
+    def test_workers_run_in_parallel_and_survive_errors(self):
+        # Workers on the shared in-memory database hit "table is locked",
+        # so the queue itself is replaced here.
+        pending = list(range(8))
+        barrier = threading.Barrier(4, timeout=5)
+        threads = set()
+
+        def claim(limit):
+            claimed = pending[:limit]
+            del pending[:limit]
+            return claimed
+
+        def run(pk):
+            threads.add(threading.get_ident())
+            if pk < 4:
+                barrier.wait()
+            if pk == 5:
+                raise Task.DoesNotExist
+            CALLS.append(pk)
+
+        with mock.patch.object(tasks, 'claim', claim), \
+                mock.patch.object(tasks, 'run', run), \
+                self.assertLogs(
+                    'core.management.commands.run_tasks', 'ERROR'):
+            call_command('run_tasks', once=True, workers=4, stdout=StringIO())
+        self.assertEqual(sorted(CALLS), [0, 1, 2, 3, 4, 6, 7])
+        self.assertEqual(len(threads), 4)
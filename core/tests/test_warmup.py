@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog import autocomplete
+from blog.models import Category
+from core import warmup
+
+
+class TestWarmUp(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(
+            title='title', description='desc', slug='slug', posts_count=3)
+
+    def test_templates_are_compiled(self):
+        templates = [
+            path for path in settings.TEMPLATES_DIR.rglob('*')
+            if path.suffix in warmup.TEMPLATE_SUFFIXES
+        ]
+        self.assertEqual(warmup.load_templates(), len(templates))
+
+    def test_urls_are_populated(self):
+        self.assertGreater(warmup.load_urls(), 0)
+
+    def test_hooks_prime_caches_and_add_paths(self):
+        autocomplete.cache.clear()
+        paths = warmup.run_hooks()
+        self.assertIn(
+            reverse('blog:category_posts', args=(self.category.slug,)),
+            paths)
+        self.assertEqual(autocomplete.cache.get(('categories', '')), [
+            {'id': self.category.pk, 'text': self.category.title}])
+
+    def test_request_goes_through_middleware(self):
+        self.assertEqual(
+            warmup.request(WSGIHandler(), reverse('blog:index')), 200)
+
+    @override_settings(WARMUP_URLS=['/', '/missing/'], WARMUP_HOOKS=[])
+    def test_warm_up(self):
+        with mock.patch.object(
+            warmup, 'request', wraps=warmup.request
+        ) as request, self.assertLogs(warmup.logger, 'WARNING'):
+            handler = WSGIHandler()
+            timings = warmup.warm_up(handler=handler)
+        self.assertEqual(
+            [call.args for call in request.call_args_list],
+            [(handler, '/'), (handler, '/missing/')])
+        self.assertEqual(list(timings), [
+            'translations', 'templates', 'urls', 'hooks', 'requests'])
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """Stop receiving a file as soon as it exceeds ``FILE_UPLOAD_MAX_SIZE``.
+
+    The rest of the file is skipped without being buffered or written to
+    disk, and its field name is added to ``request.oversized_uploads`` so
+    that the form can report the error.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.FILE_UPLOAD_MAX_SIZE:
+            if not hasattr(self.request, 'oversized_uploads'):
+                self.request.oversized_uploads = set()
+            self.request.oversized_uploads.add(self.field_name)
+            raise SkipFile
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
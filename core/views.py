@@ -1,3 +1,4 @@
+from django.http import JsonResponse
 from django.shortcuts import render
 
 
@@ -15,3 +16,16 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def too_many_requests(request, retry_after):
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        response = JsonResponse({'errors': {'__all__': [
+            f'Слишком много запросов, повторите через {retry_after} с.'
+        ]}}, status=429)
+    else:
+        response = render(
+            request, 'core/429.html', {'retry_after': retry_after},
+            status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
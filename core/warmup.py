@@ -0,0 +1,123 @@
+"""Warming a freshly started process up before it serves traffic.
+
+The first request of every worker otherwise pays for loading translation
+catalogs, template libraries (``django_bootstrap5`` and friends),
+compiling templates, populating the URL resolvers and filling the
+per-process caches. :func:`warm_up` does all of that up front, runs the
+``WARMUP_HOOKS`` and requests ``WARMUP_URLS`` through the full middleware
+stack. It closes the database connections at the end, so it is safe to
+call in a master process before it forks workers (``gunicorn --preload``
+with ``WARMUP_ON_START=True``, see ``blogeteria/wsgi.py``).
+"""
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.test import RequestFactory
+from django.urls import get_resolver
+from django.utils import translation
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def load_translations():
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.gettext('')
+
+
+def load_templates():
+    """Compile every project template into the cached template loader."""
+    count = 0
+    for engine in engines.all():
+        for directory in map(Path, engine.engine.dirs):
+            for path in directory.rglob('*'):
+                if path.suffix not in TEMPLATE_SUFFIXES:
+                    continue
+                name = path.relative_to(directory).as_posix()
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Шаблон %s не загрузился', name)
+                else:
+                    count += 1
+    return count
+
+
+def load_urls(resolver=None):
+    """Populate the reverse lookup tables of every (namespaced) resolver."""
+    resolver = resolver or get_resolver()
+    count = len(resolver.reverse_dict)
+    for _, namespace_resolver in resolver.namespace_dict.values():
+        count += load_urls(namespace_resolver)
+    return count
+
+
+def run_hooks():
+    """Call ``WARMUP_HOOKS``; a hook may return more paths to request."""
+    paths = list(settings.WARMUP_URLS)
+    for hook in settings.WARMUP_HOOKS:
+        paths += import_string(hook)() or []
+    return paths
+
+
+def server_name():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def request(handler, path):
+    """Run ``path`` through the full middleware stack, return the status."""
+    # A documentation address keeps INTERNAL_IPS-only tooling out of it.
+    environ = RequestFactory(
+        SERVER_NAME=server_name(), REMOTE_ADDR='192.0.2.1',
+    ).get(path).environ
+    statuses = []
+    response = handler(
+        environ, lambda status, headers: statuses.append(status))
+    for _ in response:
+        pass
+    response.close()
+    return int(statuses[0].split()[0])
+
+
+def make_requests(paths, handler=None):
+    handler = handler or WSGIHandler()
+    for path in paths:
+        status = request(handler, path)
+        if status >= 400:
+            logger.warning('Прогрев %s вернул %s', path, status)
+
+
+def warm_up(requests=True, handler=None):
+    """Warm this process up and return the duration of every step.
+
+    Pass the process's WSGI ``handler`` so requests go through the same
+    middleware instances that will serve traffic.
+    """
+    timings = {}
+
+    def step(name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        timings[name] = time.perf_counter() - started
+        return result
+
+    try:
+        step('translations', load_translations)
+        step('templates', load_templates)
+        step('urls', load_urls)
+        paths = step('hooks', run_hooks)
+        if requests:
+            step('requests', make_requests, paths, handler)
+    finally:
+        connections.close_all()
+    return timings
@@ -0,0 +1,63 @@
+(function () {
+  var DELAY = 200;
+
+  function setOptions(select, results) {
+    var current = select.value;
+    var keep = Array.prototype.filter.call(select.options, function (option) {
+      return option.value === '' || option.value === current;
+    });
+    select.innerHTML = '';
+    keep.forEach(function (option) {
+      select.appendChild(option);
+    });
+    results.forEach(function (item) {
+      if (String(item.id) === current) {
+        return;
+      }
+      var option = document.createElement('option');
+      option.value = item.id;
+      option.textContent = item.text;
+      select.appendChild(option);
+    });
+  }
+
+  function attach(select) {
+    var input = document.createElement('input');
+    var timer = null;
+    input.type = 'search';
+    input.className = 'form-control mb-1';
+    input.placeholder = 'Начните вводить название';
+    input.setAttribute('autocomplete', 'off');
+    select.parentNode.insertBefore(input, select);
+
+    function load() {
+      var url = select.dataset.autocompleteUrl +
+        '?q=' + encodeURIComponent(input.value);
+      fetch(url, {credentials: 'same-origin'})
+        .then(function (response) {
+          return response.json();
+        })
+        .then(function (payload) {
+          setOptions(select, payload.results);
+          if (input.value && select.options.length > 1) {
+            select.size = Math.min(select.options.length, 8);
+          }
+        });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(load, DELAY);
+    });
+    select.addEventListener('focus', function () {
+      if (select.options.length <= 2) {
+        load();
+      }
+    });
+    select.addEventListener('change', function () {
+      select.size = 0;
+    });
+  }
+
+  document.querySelectorAll('select[data-autocomplete-url]').forEach(attach);
+})();
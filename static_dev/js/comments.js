@@ -0,0 +1,123 @@
+(function () {
+  var form = document.getElementById('comment-form');
+  var comments = document.getElementById('comments');
+  if (!form || !comments) {
+    return;
+  }
+  var csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+
+  function send(url, data) {
+    return fetch(url, {
+      method: 'POST',
+      body: data,
+      credentials: 'same-origin',
+      headers: {
+        'X-Requested-With': 'XMLHttpRequest',
+        'X-CSRFToken': csrfToken
+      }
+    }).then(function (response) {
+      var type = response.headers.get('Content-Type') || '';
+      if (type.indexOf('application/json') === -1) {
+        throw new Error('unexpected response');
+      }
+      return response.json().then(function (payload) {
+        payload.ok = response.ok;
+        return payload;
+      });
+    });
+  }
+
+  function errorsText(errors) {
+    return Object.keys(errors).map(function (field) {
+      return errors[field].join(' ');
+    }).join(' ');
+  }
+
+  function fragment(html) {
+    var wrapper = document.createElement('div');
+    wrapper.innerHTML = html.trim();
+    return wrapper.firstElementChild;
+  }
+
+  function showErrors(container, errors) {
+    var box = container.querySelector('.comment-errors');
+    if (!box) {
+      box = document.createElement('div');
+      box.className = 'comment-errors text-danger mt-1';
+      container.appendChild(box);
+    }
+    box.textContent = errorsText(errors);
+  }
+
+  form.addEventListener('submit', function (event) {
+    event.preventDefault();
+    send(form.action, new FormData(form)).then(function (payload) {
+      if (!payload.ok) {
+        showErrors(form, payload.errors);
+        return;
+      }
+      comments.appendChild(fragment(payload.html));
+      form.reset();
+      var box = form.querySelector('.comment-errors');
+      if (box) {
+        box.remove();
+      }
+    }).catch(function () {
+      form.submit();
+    });
+  });
+
+  function startEdit(link) {
+    var card = link.closest('.card');
+    var text = card.querySelector('[data-comment-text]');
+    if (card.querySelector('textarea')) {
+      return;
+    }
+    var editor = document.createElement('div');
+    var area = document.createElement('textarea');
+    area.className = 'form-control';
+    area.rows = 4;
+    area.value = text.textContent.trim();
+    var save = document.createElement('button');
+    save.type = 'button';
+    save.className = 'btn btn-outline-primary btn-sm mt-1';
+    save.textContent = 'Сохранить';
+    editor.appendChild(area);
+    editor.appendChild(save);
+    text.replaceWith(editor);
+    save.addEventListener('click', function () {
+      var data = new FormData();
+      data.append('text', area.value);
+      send(link.href, data).then(function (payload) {
+        if (!payload.ok) {
+          showErrors(editor, payload.errors);
+          return;
+        }
+        card.replaceWith(fragment(payload.html));
+      }).catch(function () {
+        window.location.href = link.href;
+      });
+    });
+  }
+
+  comments.addEventListener('click', function (event) {
+    var edit = event.target.closest('[data-comment-edit]');
+    var remove = event.target.closest('[data-comment-delete]');
+    if (edit) {
+      event.preventDefault();
+      startEdit(edit);
+    } else if (remove) {
+      event.preventDefault();
+      if (!window.confirm('Удалить комментарий?')) {
+        return;
+      }
+      send(remove.href, new FormData()).then(function (payload) {
+        if (payload.ok) {
+          remove.closest('.card').remove();
+        }
+      }).catch(function () {
+        window.location.href = remove.href;
+      });
+    }
+  });
+})();
@@ -1,6 +1,38 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import CustomUser
+from blog import deletion
+from .models import CustomUser, Follow
 
-admin.site.register(CustomUser, UserAdmin)
+
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin):
+
+    def get_deleted_objects(self, objs, request):
+        # Listing every post and comment of a prolific author would load
+        # the whole graph that background deletion exists to avoid.
+        large = [obj for obj in objs if deletion.is_large(obj)]
+        if not large:
+            return super().get_deleted_objects(objs, request)
+        return (
+            [f'{obj} (удаление в фоне)' for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        if deletion.is_large(obj):
+            deletion.delete_user(obj, request.user)
+        else:
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            self.delete_model(request, user)
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('follower', 'author', 'created_at')
+    raw_id_fields = ('follower', 'author')
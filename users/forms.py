@@ -20,4 +20,5 @@ class CustomUserChangeForm(UserChangeForm):
             'email',
             'first_name',
             'last_name',
+            'digest_frequency',
         ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='digest_frequency',
+            field=models.CharField(choices=[('never', 'Не присылать'), ('hourly', 'Раз в час'), ('daily', 'Раз в день'), ('weekly', 'Раз в неделю')], default='daily', max_length=16, verbose_name='Сводка новых комментариев'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='digest_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя сводка'),
+        ),
+    ]
@@ -1,5 +1,57 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 
 class CustomUser(AbstractUser):
-    pass
+
+    class DigestFrequency(models.TextChoices):
+        NEVER = 'never', 'Не присылать'
+        HOURLY = 'hourly', 'Раз в час'
+        DAILY = 'daily', 'Раз в день'
+        WEEKLY = 'weekly', 'Раз в неделю'
+
+    followers_count = models.PositiveIntegerField(
+        'Подписчики',
+        default=0,
+        editable=False)
+    digest_frequency = models.CharField(
+        'Сводка новых комментариев',
+        max_length=16,
+        choices=DigestFrequency.choices,
+        default=DigestFrequency.DAILY)
+    digest_sent_at = models.DateTimeField(
+        'Последняя сводка',
+        null=True,
+        blank=True,
+        editable=False)
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='following'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='followers'
+    )
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('follower', 'author'), name='users_follow_unique'),
+            models.CheckConstraint(
+                check=~models.Q(follower=models.F('author')),
+                name='users_follow_not_self'),
+        )
+
+    def __str__(self):
+        return f'{self.follower_id} → {self.author_id}'
@@ -7,6 +7,8 @@ app_name = 'users'
 urlpatterns = [
     path(
         'profile/<str:username>/', views.user_profile_view, name='profile'),
+    path('profile/<str:username>/follow/', views.follow, name='follow'),
+    path('profile/<str:username>/unfollow/', views.unfollow, name='unfollow'),
     path('registration/', views.UserCreateView.as_view(), name='registration'),
     path(
         'profile/<int:pk>/edit/',
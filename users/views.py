@@ -2,23 +2,28 @@ from django.contrib.auth import get_user_model
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
 from django.conf import settings
-from django.shortcuts import get_object_or_404, render
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.views.decorators.http import require_POST
 from django.views.generic import CreateView, UpdateView
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.utils import timezone
 
+from core.ratelimit import RateLimitMixin
 from .forms import CustomUserCreationForm, CustomUserChangeForm
+from .models import Follow
+from blog import feed
 from blog.models import Post
 
 User = get_user_model()
 
 
-class UserCreateView(CreateView):
+class UserCreateView(RateLimitMixin, CreateView):
     model = User
     form_class = CustomUserCreationForm
     success_url = reverse_lazy('blog:index')
     template_name = 'users/registration_form.html'
+    ratelimit_policy = 'registration'
 
 
 class UserChangeView(LoginRequiredMixin, UpdateView):
@@ -39,23 +44,34 @@ class UserChangeView(LoginRequiredMixin, UpdateView):
 
 def user_profile_view(request, username):
     user = get_object_or_404(User, username=username)
-    if request.user == user:
-        posts = Post.objects.filter(
-            author=user).select_related('category', 'location', 'author'
-                                        ).prefetch_related('comments')
-    else:
-        posts = Post.objects.filter(
-            author=user,
-            is_published=True,
-            pub_date__lt=timezone.now(),
-            category__is_published=True).select_related(
-                'category', 'location', 'author'
-                ).prefetch_related('comments')
+    posts = Post.objects.visible_to(request.user).filter(
+        author=user).for_cards()
     paginator = Paginator(posts, settings.POSTS_ON_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
         'user': user,
         'page_obj': page_obj,
+        'is_following': (
+            request.user.is_authenticated
+            and Follow.objects.filter(
+                follower=request.user, author=user).exists()),
     }
     return render(request, 'users/profile.html', context)
+
+
+@login_required
+@require_POST
+def follow(request, username):
+    author = get_object_or_404(User, username=username, is_active=True)
+    if author != request.user:
+        feed.follow(request.user, author)
+    return redirect('users:profile', username=username)
+
+
+@login_required
+@require_POST
+def unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    feed.unfollow(request.user, author)
+    return redirect('users:profile', username=username)